@@ -0,0 +1,397 @@
+import json
+import math
+import operator
+import queue
+import smtplib
+import threading
+import time
+from collections import OrderedDict
+from email.message import EmailMessage
+
+import requests
+
+import logstore
+import telemetry
+from config import config_version, get_miner_configs, load_config
+
+THRESHOLD = "threshold"
+RATE = "rate"
+ABSENCE = "absence"
+OPERATORS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le}
+SEVERITIES = ("info", "warning", "error")
+
+_lock = threading.Lock()      # Guards everything below; held only for O(1) work per reading
+_rules = {}                   # name -> Rule
+_by_ip = {}                   # ip -> [(Rule, _State)] for every rule that covers the miner
+_states = {}                  # (rule name, ip) -> _State
+_last_seen = {}               # absence rule name -> OrderedDict(ip -> last reading), oldest first
+_sinks = []                   # [(name, sink)]
+_stats = {"fired": 0, "resolved": 0, "suppressed": 0, "dropped": 0, "sink_errors": 0}
+_settings_cache = {"loaded_at": 0, "key": None}
+_refresh_lock = threading.Lock()
+_queue = queue.Queue(maxsize=1000)
+_log_callback = None
+_started = False
+
+
+class Rule:
+    """One entry of alert_rules in config.json, validated once when the config changes."""
+
+    __slots__ = ("name", "kind", "field", "op", "value", "clear", "for_seconds", "window", "per", "seconds",
+                 "cooldown", "severity", "miners", "groups", "sinks", "source")
+
+    def __init__(self, rule):
+        self.source = rule
+        self.name = rule.get("name")
+        if not self.name:
+            raise ValueError("rule without a name")
+        self.kind = rule.get("type", THRESHOLD)
+        if self.kind not in (THRESHOLD, RATE, ABSENCE):
+            raise ValueError(f"unknown type '{self.kind}'")
+        self.severity = rule.get("severity", "warning")
+        if self.severity not in SEVERITIES:
+            raise ValueError(f"severity must be one of {', '.join(SEVERITIES)}")
+        self.cooldown = float(rule.get("cooldown", 300))
+        self.for_seconds = float(rule.get("for", 0))
+        self.miners = set(rule.get("miners", ()))
+        self.groups = set(rule.get("groups", ()))
+        self.sinks = set(rule.get("sinks", ()))
+        self.field = self.op = self.value = self.clear = None
+        self.window = self.per = self.seconds = None
+        if self.kind == ABSENCE:
+            self.seconds = float(rule.get("seconds", 60))
+            return
+        self.field = rule.get("field")
+        if not self.field:
+            raise ValueError("field is required")
+        self.op = rule.get("op", ">")
+        if self.op not in OPERATORS:
+            raise ValueError(f"op must be one of {', '.join(OPERATORS)}")
+        if "value" not in rule:
+            raise ValueError("value is required")
+        self.value = float(rule["value"])
+        # Hysteresis: once firing, the alert only clears when the reading is back past this level
+        self.clear = float(rule.get("clear", self.value))
+        if self.kind == RATE:
+            self.per = float(rule.get("per", 60))
+            self.window = float(rule.get("window", 60))
+
+    def covers(self, miner):
+        if not self.miners and not self.groups:
+            return True
+        return miner.ip in self.miners or (miner.group is not None and miner.group in self.groups)
+
+
+class _State:
+    __slots__ = ("active", "since", "fired_at", "notified_at", "suppressed", "observed", "prev_value", "prev_ts",
+                 "rate")
+
+    def __init__(self):
+        self.active = False
+        self.since = None         # When the condition started to hold, for "for"
+        self.fired_at = None
+        self.notified_at = None   # Last firing notification, for the cooldown
+        self.suppressed = False   # Fired inside the cooldown, so no notifications for this episode
+        self.observed = None
+        self.prev_value = self.prev_ts = self.rate = None
+
+
+class WebhookSink:
+    """POSTs each alert as JSON."""
+
+    def __init__(self, options):
+        self.url = options["url"]
+        self.timeout = options.get("timeout", 5)
+        self.headers = options.get("headers", {})
+
+    def send(self, alert):
+        requests.post(self.url, json=alert, headers=self.headers, timeout=self.timeout).raise_for_status()
+
+
+class SmtpSink:
+    """Emails each alert through an SMTP server, by default the local one on port 25."""
+
+    def __init__(self, options):
+        self.to = options["to"] if isinstance(options["to"], list) else [options["to"]]
+        self.host = options.get("host", "localhost")
+        self.port = options.get("port", 25)
+        self.sender = options.get("from", "bitaxe-autotuner@localhost")
+        self.starttls = options.get("starttls", False)
+        self.username = options.get("username")
+        self.password = options.get("password")
+        self.timeout = options.get("timeout", 10)
+
+    def send(self, alert):
+        message = EmailMessage()
+        message["Subject"] = f"[{alert['severity'].upper()}] {alert['rule']} {alert['state']} on {alert['ip']}"
+        message["From"] = self.sender
+        message["To"] = ", ".join(self.to)
+        message.set_content(f"{alert['message']}\n\n{json.dumps(alert, indent=2)}\n")
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            smtp.send_message(message)
+
+
+class FileSink:
+    """Appends each alert as a JSON line."""
+
+    def __init__(self, options):
+        self.path = options.get("path", "alerts.jsonl")
+
+    def send(self, alert):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(alert) + "\n")
+
+
+SINK_TYPES = {"webhook": WebhookSink, "smtp": SmtpSink, "file": FileSink}
+
+
+def register_sink(kind, sink_class):
+    """Make a sink type available to alert_sinks. sink_class(options) must have send(alert)."""
+    SINK_TYPES[kind] = sink_class
+
+
+def set_log_callback(callback):
+    """Route alert notifications and sink errors to the GUI or headless log."""
+    global _log_callback
+    _log_callback = callback
+
+
+def _log(message, level):
+    if _log_callback:
+        _log_callback(message, level)
+    else:
+        print(message)
+
+
+def _refresh(now):
+    """Rebuild rules and sinks when config.json changes, at most every 5 seconds.
+
+    Rules that are unchanged keep their state, so a config save does not re-fire
+    or forget alerts that are already active.
+    """
+    if now - _settings_cache["loaded_at"] < 5 or not _refresh_lock.acquire(blocking=False):
+        return
+    try:
+        _settings_cache["loaded_at"] = now
+        # Miners come from the same file, so its stamp also catches miners added, removed or regrouped
+        version = config_version()
+        config = load_config()
+        key = (json.dumps([config.get("alert_rules", []), config.get("alert_sinks", [])], sort_keys=True), version)
+        if key == _settings_cache["key"]:
+            return
+        _settings_cache["key"] = key
+        miners = get_miner_configs()
+
+        rules = {}
+        for entry in config.get("alert_rules", []):
+            try:
+                rule = Rule(entry)
+            except (KeyError, TypeError, ValueError) as e:
+                _log(f"Alerts -> Error in rule '{entry.get('name', '?')}': {e}", "error")
+                continue
+            rules[rule.name] = rule
+        sinks = []
+        for index, entry in enumerate(config.get("alert_sinks", [])):
+            name = entry.get("name", f"{entry.get('type')}-{index}")
+            try:
+                sinks.append((name, SINK_TYPES[entry.get("type")](entry)))
+            except (KeyError, TypeError, ValueError) as e:
+                _log(f"Alerts -> Error in sink '{name}': {e!r}", "error")
+        _install(rules, sinks, miners, now)
+    finally:
+        _refresh_lock.release()
+
+
+def _install(rules, sinks, miners, now):
+    global _rules, _by_ip, _states, _last_seen, _sinks
+    with _lock:
+        states, by_ip, last_seen = {}, {}, {}
+        for rule in rules.values():
+            unchanged = _rules.get(rule.name) is not None and _rules[rule.name].source == rule.source
+            seen = _last_seen.get(rule.name, {}) if unchanged else {}
+            if rule.kind == ABSENCE:
+                last_seen[rule.name] = OrderedDict()
+            for ip, miner in miners.items():
+                if not rule.covers(miner):
+                    continue
+                state = _states.get((rule.name, ip)) if unchanged else None
+                states[(rule.name, ip)] = state = state or _State()
+                by_ip.setdefault(ip, []).append((rule, state))
+                if rule.kind == ABSENCE and not state.active:
+                    # Miners that have not reported yet are timed from now
+                    last_seen[rule.name][ip] = seen.get(ip, now)
+            if rule.kind == ABSENCE:
+                last_seen[rule.name] = OrderedDict(sorted(last_seen[rule.name].items(), key=lambda item: item[1]))
+        _rules, _by_ip, _states, _last_seen, _sinks = rules, by_ip, states, last_seen, sinks
+
+
+def _fire(rule, state, ip, observed, now, events):
+    state.active, state.fired_at, state.observed = True, now, observed
+    _stats["fired"] += 1
+    if state.notified_at is not None and now - state.notified_at < rule.cooldown:
+        state.suppressed = True
+        _stats["suppressed"] += 1
+        return
+    state.suppressed, state.notified_at = False, now
+    events.append((rule, ip, "firing", observed, now))
+
+
+def _resolve(rule, state, ip, observed, now, events):
+    state.active, state.since = False, None
+    _stats["resolved"] += 1
+    if not state.suppressed:
+        events.append((rule, ip, "resolved", observed, now))
+    state.suppressed = False
+
+
+def _evaluate(rule, state, ip, info, now, events):
+    value = info.get(rule.field)
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        return
+    observed = value
+    if rule.kind == RATE:
+        # Exponentially smoothed change per rule.per seconds; one reading per miner is all that is kept
+        if state.prev_ts is None or now <= state.prev_ts:
+            state.prev_value, state.prev_ts = value, now
+            return
+        dt = now - state.prev_ts
+        rate = (value - state.prev_value) / dt * rule.per
+        alpha = 1 - math.exp(-dt / rule.window) if rule.window > 0 else 1
+        state.rate = rate if state.rate is None else state.rate + alpha * (rate - state.rate)
+        state.prev_value, state.prev_ts = value, now
+        observed = state.rate
+    compare = OPERATORS[rule.op]
+    if state.active:
+        if not compare(observed, rule.clear):
+            _resolve(rule, state, ip, observed, now, events)
+        else:
+            state.observed = observed
+        return
+    if not compare(observed, rule.value):
+        state.since = None
+        return
+    if state.since is None:
+        state.since = now
+    if now - state.since >= rule.for_seconds:
+        _fire(rule, state, ip, observed, now, events)
+
+
+def observe(bitaxe_ip, info, now=None):
+    """Evaluate every rule that covers the miner against one reading (a telemetry listener).
+
+    Only the miner's own rules are touched, each in constant time, so the cost per
+    reading does not grow with the fleet. Notifications are sent by a background
+    thread.
+    """
+    now = time.time() if now is None else now
+    _refresh(now)
+    events = []
+    with _lock:
+        for rule, state in _by_ip.get(bitaxe_ip, ()):
+            if rule.kind == ABSENCE:
+                seen = _last_seen[rule.name]
+                seen.pop(bitaxe_ip, None)
+                seen[bitaxe_ip] = now
+                if state.active:
+                    _resolve(rule, state, bitaxe_ip, 0, now, events)
+            else:
+                _evaluate(rule, state, bitaxe_ip, info, now, events)
+    _enqueue(events)
+
+
+def check_absence(now=None):
+    """Fire absence rules for miners whose last reading is too old.
+
+    Readings are kept oldest first per rule, so only the overdue miners and one
+    more are looked at.
+    """
+    now = time.time() if now is None else now
+    events = []
+    with _lock:
+        for name, seen in _last_seen.items():
+            rule = _rules[name]
+            while seen:
+                ip, last = next(iter(seen.items()))
+                if now - last < rule.seconds:
+                    break
+                del seen[ip]  # Back in the queue with its next reading
+                _fire(rule, _states[(name, ip)], ip, now - last, now, events)
+    _enqueue(events)
+
+
+def _describe(rule, ip, state, observed):
+    if state == "resolved":
+        return f"{ip} -> Resolved alert {rule.name}"
+    if rule.kind == ABSENCE:
+        return f"{ip} -> ALERT {rule.name}: no reading for {int(observed)}s"
+    if rule.kind == RATE:
+        return f"{ip} -> ALERT {rule.name}: {rule.field} changing {observed:+.2f} per {rule.per:g}s ({rule.op} {rule.value:g})"
+    return f"{ip} -> ALERT {rule.name}: {rule.field} {observed:g} {rule.op} {rule.value:g}"
+
+
+def _enqueue(events):
+    for event in events:
+        try:
+            _queue.put_nowait(event)
+        except queue.Full:
+            _stats["dropped"] += 1
+
+
+def _dispatch():
+    while True:
+        rule, ip, state, observed, ts = _queue.get()
+        miner = get_miner_configs().get(ip)
+        alert = {"rule": rule.name, "type": rule.kind, "state": state, "severity": rule.severity, "ip": ip,
+                 "nickname": miner.nickname if miner else None, "group": miner.group if miner else None,
+                 "field": rule.field, "value": observed, "threshold": rule.value if rule.kind != ABSENCE else rule.seconds,
+                 "ts": ts, "message": _describe(rule, ip, state, observed)}
+        _log(logstore.line(alert["message"], "alert", ip, value=observed),
+             "success" if state == "resolved" else rule.severity)
+        for name, sink in list(_sinks):
+            if rule.sinks and name not in rule.sinks:
+                continue
+            try:
+                sink.send(alert)
+            except Exception as e:  # A broken sink must not stop the others
+                _stats["sink_errors"] += 1
+                _log(f"Alerts -> Error sending {rule.name} to {name}: {e}", "error")
+
+
+def active():
+    """Alerts currently firing, oldest first."""
+    with _lock:
+        found = [{"rule": rule_name, "ip": ip, "severity": _rules[rule_name].severity, "since": state.fired_at,
+                  "value": state.observed, "notified": not state.suppressed}
+                 for (rule_name, ip), state in _states.items() if state.active]
+    return sorted(found, key=lambda alert: alert["since"])
+
+
+def stats():
+    with _lock:
+        return dict(_stats, rules=len(_rules), sinks=len(_sinks), queued=_queue.qsize())
+
+
+def start(log_callback=None):
+    """Listen to telemetry and start the absence checker and notifier threads (once per process)."""
+    global _started
+    if log_callback is not None:
+        set_log_callback(log_callback)
+    with _lock:
+        if _started:
+            return
+        _started = True
+    _refresh(time.time())
+    telemetry.add_listener(observe)
+
+    def absence_loop():
+        while True:
+            time.sleep(1)
+            _refresh(time.time())
+            check_absence()
+
+    threading.Thread(target=absence_loop, name="alert-absence", daemon=True).start()
+    threading.Thread(target=_dispatch, name="alert-dispatch", daemon=True).start()
@@ -0,0 +1,184 @@
+import asyncio
+import json
+import re
+
+import httpx
+from a2wsgi import WSGIMiddleware
+
+import health
+import telemetry
+from config import load_config
+from headless import app as flask_app
+from headless import init, log_message
+
+# Async serving mode: run with `python main.py headless-async` or `uvicorn asgi:app`.
+# Routes that wait on miners are served here on the event loop. Every other route
+# goes to the Flask app on a thread pool.
+
+_client = None
+
+
+def _get_client():
+    global _client
+    if _client is None:
+        limit = load_config().get("async_max_connections", 100)
+        _client = httpx.AsyncClient(limits=httpx.Limits(max_connections=limit, max_keepalive_connections=limit))
+    return _client
+
+
+async def get_system_info(bitaxe_ip):
+    """Async version of autotune.get_system_info, with the same circuit breaker and telemetry."""
+    timeout = health.before_request(bitaxe_ip, 10)
+    if timeout is None:
+        telemetry.publish_offline(bitaxe_ip)
+        return f"Error fetching system info from {bitaxe_ip}: miner unreachable, circuit open"
+    settled = False
+    try:
+        response = await _get_client().get(f"http://{bitaxe_ip}/api/system/info", timeout=timeout)
+        response.raise_for_status()
+        info = response.json()
+        settled = True
+    except (httpx.HTTPError, ValueError) as e:
+        settled = True
+        health.record_failure(bitaxe_ip, e)
+        telemetry.publish_offline(bitaxe_ip)
+        return f"Error fetching system info from {bitaxe_ip}: {e}"
+    finally:
+        if not settled:
+            # Cancelled mid-request (e.g. the client went away): free the probe for the next caller
+            health.abandon_probe(bitaxe_ip)
+    health.record_success(bitaxe_ip)
+    telemetry.publish(bitaxe_ip, info)
+    return info
+
+
+async def restart_bitaxe(bitaxe_ip):
+    """Async version of autotune.restart_bitaxe."""
+    timeout = health.before_request(bitaxe_ip, 10)
+    if timeout is None:
+        return f"{bitaxe_ip} -> Error restarting system: miner unreachable, circuit open"
+    settled = False
+    try:
+        response = await _get_client().post(f"http://{bitaxe_ip}/api/system/restart", timeout=timeout)
+        response.raise_for_status()
+        settled = True
+    except httpx.HTTPError as e:
+        settled = True
+        health.record_failure(bitaxe_ip, e)
+        return f"{bitaxe_ip} -> Error restarting system: {e}"
+    finally:
+        if not settled:
+            health.abandon_probe(bitaxe_ip)
+    health.record_success(bitaxe_ip)
+    return f"{bitaxe_ip} -> Restart initiated."
+
+
+class AsyncSubscriber(telemetry.Subscriber):
+    """A telemetry subscriber that wakes an asyncio task instead of a blocked thread."""
+
+    def __init__(self, loop):
+        super().__init__()
+        self._loop = loop
+        self.ready = asyncio.Event()
+
+    def push(self, bitaxe_ip, changes):
+        super().push(bitaxe_ip, changes)
+        try:
+            self._loop.call_soon_threadsafe(self.ready.set)
+        except RuntimeError:
+            pass  # Event loop already closed
+
+
+async def _send_json(send, payload, status=200):
+    body = json.dumps(payload).encode()
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def miner_info(scope, receive, send, bitaxe_ip):
+    info = await get_system_info(bitaxe_ip)
+    if isinstance(info, str):
+        await _send_json(send, {"message": info}, 503 if health.is_open(bitaxe_ip) else 500)
+    else:
+        await _send_json(send, info)
+
+
+async def restart_miner(scope, receive, send, bitaxe_ip):
+    log_message(f"Restarting miner at {bitaxe_ip}...", "warning")
+    msg = await restart_bitaxe(bitaxe_ip)
+    log_message(msg, "info")
+    await _send_json(send, {"message": msg})
+
+
+async def stream(scope, receive, send):
+    """Same events as the Flask /api/stream route, without holding a thread per dashboard."""
+    subscriber, current = telemetry.subscribe(AsyncSubscriber(asyncio.get_running_loop()))
+
+    async def wait_for_disconnect():
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    disconnected = asyncio.ensure_future(wait_for_disconnect())
+    try:
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache"),
+                                (b"x-accel-buffering", b"no")]})
+        await send({"type": "http.response.body", "more_body": True,
+                    "body": f"event: snapshot\ndata: {json.dumps(current)}\n\n".encode()})
+        while not disconnected.done():
+            ready = asyncio.ensure_future(subscriber.ready.wait())
+            await asyncio.wait({ready, disconnected}, timeout=15, return_when=asyncio.FIRST_COMPLETED)
+            woken = ready.done()
+            ready.cancel()
+            if disconnected.done():
+                break
+            subscriber.ready.clear()
+            changes = subscriber.drain(timeout=0)
+            if changes:
+                body = f"event: delta\ndata: {json.dumps(changes)}\n\n"
+            elif woken:
+                continue  # Woken by a change that already went out with the previous delta
+            else:
+                body = ": keepalive\n\n"
+            await send({"type": "http.response.body", "body": body.encode(), "more_body": True})
+    finally:
+        disconnected.cancel()
+        telemetry.unsubscribe(subscriber)
+
+
+ROUTES = (
+    ("GET", re.compile(r"^/api/miner-info/([^/]+)$"), miner_info),
+    ("POST", re.compile(r"^/api/restart-miner/([^/]+)$"), restart_miner),
+    ("GET", re.compile(r"^/api/stream$"), stream),
+)
+
+_wsgi = WSGIMiddleware(flask_app, workers=load_config().get("async_wsgi_workers", 32))
+
+
+async def _lifespan(receive, send):
+    global _client
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            init()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            if _client is not None:
+                await _client.aclose()
+                _client = None
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] == "http":
+        for method, pattern, handler in ROUTES:
+            match = pattern.match(scope["path"])
+            if match and scope["method"] == method:
+                await handler(scope, receive, send, *match.groups())
+                return
+    await _wsgi(scope, receive, send)
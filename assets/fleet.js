@@ -0,0 +1,46 @@
+// Fleet overview (templates/fleet.html). Run `python static_assets.py` after editing.
+
+function fmt(value, digits, unit) {
+    return (value === null || value === undefined) ? '-' : `${Number(value).toFixed(digits)}${unit}`;
+}
+
+function fillRow(tbody, values, className) {
+    const row = tbody.insertRow();
+    if (className) row.className = className;
+    values.forEach(v => { row.insertCell().textContent = v; });
+}
+
+async function refreshFleet() {
+    try {
+        const response = await fetch('/api/fleet');
+        if (!response.ok) return;
+        const fleet = await response.json();
+
+        const t = fleet.totals;
+        document.getElementById('totals').textContent =
+            `${t.online}/${t.miners} miners online | ${fmt(t.hashrate, 2, ' GH/s')} | ${fmt(t.power, 1, ' W')} | ${fmt(t.jth, 2, ' J/TH')}`;
+
+        const sitesBody = document.querySelector('#sites-table tbody');
+        sitesBody.innerHTML = '';
+        for (const [name, site] of Object.entries(fleet.sites)) {
+            fillRow(sitesBody, [name, site.status, site.miners, site.online, fmt(site.hashrate, 2, ' GH/s'),
+                                fmt(site.power, 1, ' W'), fmt(site.jth, 2, ''), fmt(site.max_temp, 1, '°C')],
+                    site.status === 'ok' ? '' : site.status);
+        }
+
+        const fleetBody = document.querySelector('#fleet-table tbody');
+        fleetBody.innerHTML = '';
+        for (const m of fleet.miners) {
+            fillRow(fleetBody, [m.site, m.nickname || '', m.ip, m.frequency ?? '-', m.coreVoltage ?? '-',
+                                fmt(m.temp, 1, '°C'), fmt(m.vrTemp, 1, '°C'), fmt(m.hashRate, 2, ' GH/s'), fmt(m.power, 2, ' W')],
+                    !m.online ? 'down' : (m.stale ? 'stale' : ''));
+        }
+    } catch (error) {
+        console.error('Fleet refresh failed:', error);
+    }
+}
+
+window.onload = function() {
+    refreshFleet();
+    setInterval(refreshFleet, 10000);
+};
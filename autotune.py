@@ -1,7 +1,19 @@
 import requests
 import time
 import threading
-from config import load_config, get_miners, get_miner_defaults, detect_miners
+from config import load_config, get_miner_defaults, get_miner_configs, detect_miners, moved_miner
+from models import MinerConfig, MinerState, Sample
+import power_budget
+import efficiency
+import fan_control
+import calibration
+import health
+import logstore
+import shares
+import stall
+import telemetry
+import thermal_watchdog
+import os
 import pandas as pd
 
 # Load global configuration
@@ -11,12 +23,20 @@ FREQUENCY_STEP = config["frequency_step"]
 MONITOR_INTERVAL = config["monitor_interval"]
 TEMP_TOLERANCE = config["temp_tolerance"]
 
-# Global Running Flag
-running = True
-
-def load_scaling_table():
+# Stop events of every running tuner; stop_autotuning() sets them all
+_stop_events = set()
+_tuned = {}   # ip -> number of running tuners holding the miner's settings
+_stop_lock = threading.Lock()
+
+def load_scaling_table(bitaxe_ip=None):
+    """Load the tier table, preferring a miner's calibrated table when one has been fitted."""
+    path = "cpu_voltage_scaling_safeguards.csv"
+    if bitaxe_ip and load_config().get("use_calibrated_tiers", True):
+        calibrated_path = calibration.tiers_path(bitaxe_ip)
+        if os.path.exists(calibrated_path):
+            path = calibrated_path
     try:
-        df = pd.read_csv("cpu_voltage_scaling_safeguards.csv")
+        df = pd.read_csv(path)
         df = df.rename(columns=lambda x: x.strip().lower().replace(" ", "_"))
         df = df.sort_values(by="frequency_(mhz)").reset_index(drop=True)
         return df.to_dict(orient="records")
@@ -39,32 +59,235 @@ def get_target_hashrate_for_freq(freq, tier_list):
 
 def get_system_info(bitaxe_ip):
     """Fetch system info from Bitaxe API."""
+    timeout = health.before_request(bitaxe_ip, 10)
+    if timeout is None:
+        telemetry.publish_offline(bitaxe_ip)
+        return f"Error fetching system info from {bitaxe_ip}: miner unreachable, circuit open"
     try:
-        response = requests.get(f"http://{bitaxe_ip}/api/system/info", timeout=10)
+        response = requests.get(f"http://{bitaxe_ip}/api/system/info", timeout=timeout)
         response.raise_for_status()
-        return response.json()
+        health.record_success(bitaxe_ip)
+        info = response.json()
+        # Every reading, whoever asked for it, is pushed to connected dashboards
+        telemetry.publish(bitaxe_ip, info)
+        return info
     except requests.exceptions.RequestException as e:
+        health.record_failure(bitaxe_ip, e)
+        telemetry.publish_offline(bitaxe_ip)
         return f"Error fetching system info from {bitaxe_ip}: {e}"
 
 def set_system_settings(bitaxe_ip, core_voltage, frequency):
     """Set system parameters via Bitaxe API dynamically."""
     settings = {"coreVoltage": core_voltage, "frequency": frequency}
+    timeout = health.before_request(bitaxe_ip, 10)
+    if timeout is None:
+        return f"{bitaxe_ip} -> Error setting system settings: miner unreachable, circuit open"
     try:
-        response = requests.patch(f"http://{bitaxe_ip}/api/system", json=settings, timeout=10)
+        response = requests.patch(f"http://{bitaxe_ip}/api/system", json=settings, timeout=timeout)
         response.raise_for_status()
+        health.record_success(bitaxe_ip)
         return f"{bitaxe_ip} -> Applied settings: Voltage = {core_voltage}mV, Frequency = {frequency}MHz"
     except requests.exceptions.RequestException as e:
+        health.record_failure(bitaxe_ip, e)
         return f"{bitaxe_ip} -> Error setting system settings: {e}"
 
+def set_fan_speed(bitaxe_ip, fan_speed):
+    """Set a fixed fan speed (percent) via Bitaxe API, or hand control back to auto fan when None."""
+    settings = {"autofanspeed": 1} if fan_speed is None else {"autofanspeed": 0, "fanspeed": fan_speed}
+    timeout = health.before_request(bitaxe_ip, 10)
+    if timeout is None:
+        return f"{bitaxe_ip} -> Error setting fan speed: miner unreachable, circuit open"
+    try:
+        response = requests.patch(f"http://{bitaxe_ip}/api/system", json=settings, timeout=timeout)
+        response.raise_for_status()
+        health.record_success(bitaxe_ip)
+        if fan_speed is None:
+            return f"{bitaxe_ip} -> Applied settings: Fan = auto"
+        return f"{bitaxe_ip} -> Applied settings: Fan = {fan_speed}%"
+    except requests.exceptions.RequestException as e:
+        health.record_failure(bitaxe_ip, e)
+        return f"{bitaxe_ip} -> Error setting fan speed: {e}"
+
 def restart_bitaxe(bitaxe_ip):
     """Restart the Bitaxe using the API."""
+    timeout = health.before_request(bitaxe_ip, 10)
+    if timeout is None:
+        return f"{bitaxe_ip} -> Error restarting system: miner unreachable, circuit open"
     try:
-        response = requests.post(f"http://{bitaxe_ip}/api/system/restart", timeout=10)
+        response = requests.post(f"http://{bitaxe_ip}/api/system/restart", timeout=timeout)
         response.raise_for_status()
+        health.record_success(bitaxe_ip)
         return f"{bitaxe_ip} -> Restart initiated."
     except requests.exceptions.RequestException as e:
+        health.record_failure(bitaxe_ip, e)
         return f"{bitaxe_ip} -> Error restarting system: {e}"
 
+class MinerApi:
+    """The miner I/O the tuner depends on: the Bitaxe HTTP API and config.json.
+
+    replay.py substitutes recording and replaying implementations.
+    """
+
+    def get_system_info(self, bitaxe_ip):
+        return get_system_info(bitaxe_ip)
+
+    def set_system_settings(self, bitaxe_ip, core_voltage, frequency):
+        return set_system_settings(bitaxe_ip, core_voltage, frequency)
+
+    def set_fan_speed(self, bitaxe_ip, fan_speed):
+        return set_fan_speed(bitaxe_ip, fan_speed)
+
+    def restart_bitaxe(self, bitaxe_ip):
+        return restart_bitaxe(bitaxe_ip)
+
+    def load_config(self):
+        return load_config()
+
+    def load_miner(self, bitaxe_ip):
+        """The miner's current MinerConfig, or None if it is no longer configured."""
+        return get_miner_configs().get(bitaxe_ip)
+
+    def find_moved(self, miner):
+        """The miner's MinerConfig at a new IP if rediscovery has moved it, otherwise None."""
+        return moved_miner(miner)
+
+    def close(self):
+        pass
+
+class FencedApi(MinerApi):
+    """A MinerApi that refuses writes once its tuner has been told to stop.
+
+    A tuner may still be finishing a poll when it is stopped, for example after its
+    shard lease was handed over. Nothing it decides after that reaches the miner.
+    """
+
+    def __init__(self, api, stop_event):
+        self.api = api
+        self.stop_event = stop_event
+
+    def get_system_info(self, bitaxe_ip):
+        return self.api.get_system_info(bitaxe_ip)
+
+    def set_system_settings(self, bitaxe_ip, core_voltage, frequency):
+        if self.stop_event.is_set():
+            return f"{bitaxe_ip} -> Error setting system settings: tuner stopped"
+        return self.api.set_system_settings(bitaxe_ip, core_voltage, frequency)
+
+    def set_fan_speed(self, bitaxe_ip, fan_speed):
+        if self.stop_event.is_set():
+            return f"{bitaxe_ip} -> Error setting fan speed: tuner stopped"
+        return self.api.set_fan_speed(bitaxe_ip, fan_speed)
+
+    def restart_bitaxe(self, bitaxe_ip):
+        if self.stop_event.is_set():
+            return f"{bitaxe_ip} -> Error restarting system: tuner stopped"
+        return self.api.restart_bitaxe(bitaxe_ip)
+
+    def load_config(self):
+        return self.api.load_config()
+
+    def load_miner(self, bitaxe_ip):
+        return self.api.load_miner(bitaxe_ip)
+
+    def find_moved(self, miner):
+        return self.api.find_moved(miner)
+
+    def close(self):
+        self.api.close()
+
+class SystemClock:
+    """Wall-clock time for the tuner. replay.py substitutes a simulated clock."""
+
+    def time(self):
+        return time.time()
+
+    def sleep(self, seconds, stop_event=None):
+        if stop_event is not None:
+            stop_event.wait(seconds)
+        else:
+            time.sleep(seconds)
+
+class SettingsReconciler:
+    """Keeps a miner's applied voltage/frequency in line with what the tuner wants.
+
+    The tuner only records the desired settings. Each poll, the values the miner
+    reports in /api/system/info are compared with them and a PATCH is issued only
+    when they differ. Changes made within coalesce_seconds of each other go out as
+    one write. A write is verified on the next poll, and failed or unverified
+    writes are retried with exponential backoff.
+    """
+
+    def __init__(self, bitaxe_ip, log_callback, coalesce_seconds=0, retry_base=5, retry_max=300, api=None):
+        self.bitaxe_ip = bitaxe_ip
+        self.api = api or MinerApi()
+        self.log_callback = log_callback
+        self.coalesce_seconds = coalesce_seconds
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.desired_voltage = None
+        self.desired_frequency = None
+        self.changed_at = 0
+        self.awaiting_verify = False
+        self.failures = 0
+        self.next_attempt = 0
+
+    def set_desired(self, core_voltage, frequency, now):
+        """Record the settings the tuner wants. now comes from the tuner's clock."""
+        if (core_voltage, frequency) == (self.desired_voltage, self.desired_frequency):
+            return
+        self.desired_voltage, self.desired_frequency = core_voltage, frequency
+        self.changed_at = now
+        self.awaiting_verify = False
+        self.failures = 0
+        self.next_attempt = 0
+
+    def matches(self, info):
+        """True when the miner reports the desired voltage and frequency."""
+        try:
+            return (abs(float(info.get("coreVoltage")) - self.desired_voltage) < 1
+                    and abs(float(info.get("frequency")) - self.desired_frequency) < 1)
+        except (TypeError, ValueError):
+            return False
+
+    def _backoff(self, now):
+        self.failures += 1
+        self.next_attempt = now + min(self.retry_base * 2 ** (self.failures - 1), self.retry_max)
+
+    def reconcile(self, info, now):
+        """Compare observed settings with the desired ones and write if needed. Returns True if a write was sent."""
+        if self.desired_voltage is None:
+            return False
+
+        if self.matches(info):
+            if self.awaiting_verify:
+                self.log_callback(logstore.line(
+                    f"{self.bitaxe_ip} -> Verified settings: Voltage = {self.desired_voltage}mV, Frequency = {self.desired_frequency}MHz",
+                    "verified", self.bitaxe_ip, voltage=self.desired_voltage, frequency=self.desired_frequency), "info")
+            self.awaiting_verify = False
+            self.failures = 0
+            return False
+
+        if self.awaiting_verify:
+            self.awaiting_verify = False
+            self._backoff(now)
+            self.log_callback(logstore.line(
+                f"{self.bitaxe_ip} -> Miner reports {info.get('coreVoltage')}mV / {info.get('frequency')}MHz, "
+                f"expected {self.desired_voltage}mV / {self.desired_frequency}MHz. Retrying.",
+                "drift", self.bitaxe_ip, voltage=self.desired_voltage, frequency=self.desired_frequency), "warning")
+
+        if now - self.changed_at < self.coalesce_seconds or now < self.next_attempt:
+            return False
+
+        result = self.api.set_system_settings(self.bitaxe_ip, self.desired_voltage, self.desired_frequency)
+        fields = {"voltage": self.desired_voltage, "frequency": self.desired_frequency}
+        if " -> Error" in result:
+            self._backoff(now)
+            self.log_callback(logstore.line(result, "write_error", self.bitaxe_ip, **fields), "error")
+        else:
+            self.awaiting_verify = True
+            self.log_callback(logstore.line(result, "write", self.bitaxe_ip, **fields), "info")
+        return True
+
 def get_tier_voltage_for_freq(freq, tier_list):
     """Return voltage for the closest frequency in tier list."""
     sorted_tiers = sorted(tier_list, key=lambda x: x["frequency_(mhz)"])
@@ -73,49 +296,220 @@ def get_tier_voltage_for_freq(freq, tier_list):
             return tier["voltage"]
     return sorted_tiers[0]["voltage"]
 
+def exceeds_limits(temp, vr_temp, power, max_temp, max_watts, max_vr_temp):
+    """True when a reading breaks the miner's temperature, VR temperature or power limit."""
+    return (temp is None or power > max_watts or temp > max_temp
+            or (max_vr_temp is not None and vr_temp > max_vr_temp))
+
+def decide_step(temp, vr_temp, hash_rate, power, expected_hashrate, target_hashrate,
+                current_voltage, current_frequency, min_freq, max_freq, min_volt, max_volt,
+                max_temp, max_watts, max_vr_temp, temp_tolerance, voltage_step, frequency_step, tier_list):
+    """The AutoTuner's threshold rules for one reading.
+
+    Returns (new_voltage, new_frequency, stepping_down, reason). fleet_engine.py
+    evaluates the same rules for many miners at once and must stay in step with this.
+    """
+    new_voltage, new_frequency = current_voltage, current_frequency
+
+    if exceeds_limits(temp, vr_temp, power, max_temp, max_watts, max_vr_temp):
+        tier_freqs = [t["frequency_(mhz)"] for t in tier_list]
+        current_idx = tier_freqs.index(current_frequency) if current_frequency in tier_freqs else -1
+        if current_idx > 0:
+            new_frequency = tier_freqs[current_idx - 1]
+            new_voltage = get_tier_voltage_for_freq(new_frequency, tier_list)
+            return new_voltage, new_frequency, True, "drop_tier"
+        return new_voltage, new_frequency, True, "at_min_tier"
+
+    if temp < (max_temp - temp_tolerance) and power < max_watts and hash_rate < expected_hashrate:
+        volt_range_percent = (current_voltage - min_volt) / (max_volt - min_volt)
+        freq_range_percent = (current_frequency - min_freq) / (max_freq - min_freq)
+        if ((freq_range_percent >= 0.25 and volt_range_percent <= 0.25) or
+            (freq_range_percent >= 0.5 and volt_range_percent <= 0.5) or
+            (freq_range_percent >= 0.75 and volt_range_percent <= 0.75)):
+            return new_voltage + voltage_step, new_frequency, False, "raise_voltage"
+        if ((freq_range_percent < 0.25 and volt_range_percent <= 0.25) or
+            (freq_range_percent < 0.5 and volt_range_percent <= 0.5) or
+            (freq_range_percent < 0.75 and volt_range_percent <= 0.75)):
+            return new_voltage, new_frequency + frequency_step, False, "raise_frequency"
+        return new_voltage, new_frequency, False, "at_max"
+
+    if hash_rate > expected_hashrate and hash_rate < target_hashrate:
+        tier_freqs = [t["frequency_(mhz)"] for t in tier_list]
+        current_idx = tier_freqs.index(current_frequency) if current_frequency in tier_freqs else -1
+        if current_idx >= 0 and current_idx + 1 < len(tier_freqs):
+            new_frequency = tier_freqs[current_idx + 1]
+            new_voltage = get_tier_voltage_for_freq(new_frequency, tier_list)
+            return new_voltage, new_frequency, False, "step_up_tier"
+        return new_voltage, new_frequency, False, "below_target"
+
+    if hash_rate > expected_hashrate and hash_rate > target_hashrate:
+        return new_voltage, new_frequency, False, "healthy"
+
+    new_voltage = new_voltage - voltage_step if new_voltage - voltage_step >= min_volt else min_volt
+    new_frequency = new_frequency - frequency_step if new_frequency - frequency_step >= min_freq else min_freq
+    return new_voltage, new_frequency, True, "decrease"
+
+def share_backoff(bitaxe_ip, config, current_voltage, current_frequency, min_freq, min_volt, max_volt,
+                  frequency_step, scaling_table, now):
+    """Back-off settings when accepted shares say the miner is pushed too hard.
+
+    Returns (new_voltage, new_frequency, reason, message) or None. The frequency given
+    up is also recorded as a ceiling the tuner stays below for share_ceiling_ttl seconds.
+    """
+    signal = shares.assess(bitaxe_ip, current_frequency, max_reject_rate=config.get("max_reject_rate", 0.02),
+                           min_shares=config.get("share_min_count", 20),
+                           stats_ttl=config.get("share_stats_ttl", 1800),
+                           z=config.get("share_confidence_z", 2.0), now=now)
+    if signal is None or current_frequency <= min_freq:
+        return None
+    if signal[0] == "reject_rate":
+        lower = [t["frequency_(mhz)"] for t in scaling_table if min_freq <= t["frequency_(mhz)"] < current_frequency]
+        new_frequency = max(lower) if lower else max(current_frequency - frequency_step, min_freq)
+        reason = "reject_backoff"
+        message = f"Reject rate {signal[1]:.1%} is over {config.get('max_reject_rate', 0.02):.1%}."
+    else:
+        _, new_frequency, lower_effective, effective = signal
+        reason = "effective_backoff"
+        message = (f"{current_frequency} MHz gives clearly less extra accepted work than expected over "
+                   f"{new_frequency} MHz ({effective:.0f} vs {lower_effective:.0f} GH/s effective).")
+    tier_voltage = get_tier_voltage_for_freq(new_frequency, scaling_table) if scaling_table else current_voltage
+    new_voltage = min(max(tier_voltage, min_volt), max_volt, current_voltage)
+    shares.set_ceiling(bitaxe_ip, current_frequency, now + config.get("share_ceiling_ttl", 3600))
+    return new_voltage, new_frequency, reason, f"{message} Backing off to {new_frequency} MHz / {new_voltage} mV"
+
+def run_stall_action(bitaxe_ip, verdict, voltage, frequency, bounce_frequency, log_callback, api=None):
+    """Log a stall detector verdict and carry out its action.
+
+    A soft reset writes bounce_frequency; the settings reconciler sees the drift on
+    the next reading and writes the wanted frequency back, re-initialising the clock.
+    """
+    api = api or MinerApi()
+    action = verdict["action"]
+    message, level = stall.describe(bitaxe_ip, verdict)
+    log_callback(logstore.line(message, f"stall_{action}", bitaxe_ip, confidence=verdict["confidence"],
+                               **{f"{signal}_evidence": value for signal, value in verdict["evidence"].items()}), level)
+    if action == stall.REAPPLY:
+        result = api.set_system_settings(bitaxe_ip, voltage, frequency)
+    elif action == stall.SOFT_RESET:
+        result = api.set_system_settings(bitaxe_ip, voltage, bounce_frequency)
+    elif action == stall.RESTART:
+        result = api.restart_bitaxe(bitaxe_ip)
+    else:
+        return
+    if " -> Error" in result:
+        log_callback(result, "error")
+
+def describe_decision(reason, temp, new_voltage, new_frequency, target_hashrate):
+    """Log messages, as (message, level) pairs, for a decide_step or fleet engine outcome."""
+    if reason == "budget_cap":
+        return [(f"Over group power budget. Capping to {new_frequency} MHz / {new_voltage} mV", "warning")]
+    if reason == "budget_hold":
+        return [(f"Holding at {new_frequency} MHz: group power budget reached.", "info")]
+    if reason == "drop_tier":
+        return [(f"Dropping to tier: {new_frequency} MHz / {new_voltage} mV", "warning")]
+    if reason == "at_min_tier":
+        return [("Already at minimum tier. Holding.", "warning")]
+    if reason in ("raise_voltage", "raise_frequency", "at_max"):
+        checking = (f"Temp {temp}°C. Checking if program should optimize.", "info")
+        if reason == "raise_voltage":
+            return [checking, (f"Increasing voltage to {new_voltage}mV.", "info")]
+        if reason == "raise_frequency":
+            return [checking, (f"Increasing frequency to {new_frequency}MHz.", "info")]
+        return [checking, ("Already at maximum safe settings.", "info")]
+    if reason in ("below_target", "step_up_tier"):
+        below = (f"Hashrate below target hashrate {target_hashrate} GH/s.", "warning")
+        if reason == "below_target":
+            return [below]
+        return [below, (f"Stepping up to tier: {new_frequency} MHz / {new_voltage} mV", "info")]
+    if reason == "healthy":
+        return [("Hashrate above target and healthy. No adjustment needed.", "success")]
+    return [("Decreasing voltage and frequency due to inefficiency.", "warning")]
+
 def monitor_and_adjust(bitaxe_ip, bitaxe_type, interval, log_callback,
                        min_freq, max_freq, min_volt, max_volt,
-                       max_temp, max_watts, start_freq=None, start_volt=None, max_vr_temp=None):
-    """Monitor and auto-adjust miner settings dynamically based on user-defined AutoTuner settings."""
-    global running, tier_list
-
-    running = True
-    last_tune_time = 0
-
-    # Load scaling table and config
-    scaling_table = load_scaling_table()
-    config = load_config()
-    enforce_tiers = config.get("enforce_safe_pairing", False)
-    tier_list = scaling_table if enforce_tiers else []
-
-    # Flatline detection
-    hashrate_history = []
-    flatline_repeat_count = config.get("flatline_hashrate_repeat_count", 5)
-    flatline_enabled = config.get("flatline_detection_enabled", True)
-
-    required_fields = [min_freq, max_freq, min_volt, max_volt, max_temp, max_watts]
-    if any(value is None or value == "" for value in required_fields):
+                       max_temp, max_watts, start_freq=None, start_volt=None, max_vr_temp=None,
+                       stop_event=None, clock=None, api=None):
+    """Monitor and auto-adjust miner settings dynamically based on user-defined AutoTuner settings.
+
+    Kept for callers that pass settings individually; builds a MinerConfig and runs tune_miner.
+    """
+    try:
+        miner = MinerConfig.from_dict({"ip": bitaxe_ip, "type": bitaxe_type, "min_freq": min_freq,
+                                       "max_freq": max_freq, "min_volt": min_volt, "max_volt": max_volt,
+                                       "max_temp": max_temp, "max_watts": max_watts, "start_freq": start_freq,
+                                       "start_volt": start_volt, "max_vr_temp": max_vr_temp})
+    except ValueError as e:
+        log_callback(f"{e}. Skipping tuning.", "error")
+        return
+    tune_miner(miner, log_callback, stop_event=stop_event, clock=clock, api=api)
+
+def tune_miner(miner, log_callback, stop_event=None, clock=None, api=None):
+    """Monitor and auto-adjust one miner's settings based on its MinerConfig.
+
+    Tuning stops when stop_autotuning() is called, or for this miner alone when stop_event is set.
+    No writes reach the miner once it is set. Create it with new_stop_event() before
+    starting the thread, so a stop_autotuning() in between is not missed.
+    clock and api default to wall-clock time and the live miner; replay.py passes
+    simulated ones to run recorded telemetry through this loop faster than real time.
+
+    If rediscovery moves the miner to another IP, tuning stops and the miner's
+    MinerConfig at the new IP is returned, with stop_event still registered, so
+    run_tuner can carry on there. Otherwise returns None.
+    """
+    live = clock is None  # The thermal watchdog only guards real miners, not replays
+    clock = clock or SystemClock()
+    stop_event = stop_event or new_stop_event()
+    with _stop_lock:
+        _stop_events.add(stop_event)
+    unfenced_api = api or MinerApi()
+    api = FencedApi(unfenced_api, stop_event)
+    bitaxe_ip = miner.ip
+
+    if miner.missing_fields():
         log_callback(f"{bitaxe_ip} -> Missing AutoTuner settings. Skipping tuning.", "error")
-        running = False
+        release_stop_event(stop_event)
+        api.close()
         return
 
-    current_frequency = start_freq if start_freq not in [None, ""] else min_freq
-    current_voltage = start_volt if start_volt not in [None, ""] else min_volt
-
-    frequency_range = max_freq - min_freq
-    voltage_range = max_volt - min_volt
-
-    applied_settings = set_system_settings(bitaxe_ip, current_voltage, current_frequency)
-    log_callback(applied_settings, "info")
-
-    last_config_refresh = 0
-    config = load_config()
-
-    while running:
+    hold_miner(bitaxe_ip)
+
+    # Limits are fixed for the tuner's lifetime; group and objective follow config.json
+    min_freq, max_freq, min_volt, max_volt = miner.min_freq, miner.max_freq, miner.min_volt, miner.max_volt
+    max_temp, max_watts, max_vr_temp = miner.max_temp, miner.max_watts, miner.max_vr_temp
+    state = MinerState(miner.start_volt if miner.start_volt is not None else min_volt,
+                       miner.start_freq if miner.start_freq is not None else min_freq)
+
+    # Load scaling table (calibrated for this miner if available) and config
+    scaling_table = load_scaling_table(bitaxe_ip)
+    config = api.load_config()
+    tier_list = scaling_table if config.get("enforce_safe_pairing", False) else []
+    settings = miner
+    interval = config.get("monitor_interval", 5)
+
+    # Settings are written only when the miner's reported state differs from what we want
+    reconciler = SettingsReconciler(bitaxe_ip, log_callback,
+                                    coalesce_seconds=config.get("settings_coalesce_seconds", 0),
+                                    retry_base=config.get("settings_retry_base", 5),
+                                    retry_max=config.get("settings_retry_max", 300),
+                                    api=api)
+    reconciler.set_desired(state.voltage, state.frequency, clock.time())
+    if live:
+        thermal_watchdog.watch(miner, scaling_table, api.set_system_settings, log_callback)
+
+    def wait(seconds):
+        clock.sleep(seconds, stop_event)
+
+    moved = None
+    while not stop_event.is_set():
         try:
-            if time.time() - last_config_refresh > 5:
-                config = load_config()
-                last_config_refresh = time.time()
+            if clock.time() - state.last_config_refresh > 5:
+                config = api.load_config()
+                moved = api.find_moved(settings)
+                if moved is not None:
+                    log_callback(f"{bitaxe_ip} -> Miner moved to {moved.ip}. Restarting its tuner there.", "warning")
+                    break
+                settings = api.load_miner(bitaxe_ip) or settings
+                state.last_config_refresh = clock.time()
 
             voltage_step = config.get("voltage_step", 10)
             frequency_step = config.get("frequency_step", 5)
@@ -123,127 +517,264 @@ def monitor_and_adjust(bitaxe_ip, bitaxe_type, interval, log_callback,
             interval = config.get("monitor_interval", 5)
             refresh_interval = config.get("refresh_interval", 60)
 
-            info = get_system_info(bitaxe_ip)
-            if not running:
+            info = api.get_system_info(bitaxe_ip)
+            if stop_event.is_set():
                 break
 
             if isinstance(info, str):
-                log_callback(info, "error")
-                time.sleep(interval)
+                # Reachability changes are logged once by the health tracker
+                wait(interval)
                 continue
 
             if not isinstance(info, dict):
                 log_callback(f"{bitaxe_ip} -> Unexpected system info format: {info}", "error")
-                time.sleep(interval)
+                wait(interval)
                 continue
 
-            small_core_count = info.get("smallCoreCount", 0)
-            asic_count = info.get("asicCount", 0)
-            expected_hashrate = int(current_frequency * ((small_core_count * asic_count) / 1000))
+            # The thermal watchdog may have dropped the settings since the last reading; adopt them
+            now = clock.time()
+            emergency = thermal_watchdog.take_emergency(bitaxe_ip)
+            if emergency is not None:
+                state.voltage, state.frequency = emergency
+                state.last_tune_time = now
+                reconciler.set_desired(state.voltage, state.frequency, now)
+
+            # Verify the last write and correct drift from manual changes or reboots
+            reconciler.reconcile(info, now)
+
+            sample = Sample.from_info(info)
+            current_voltage, current_frequency = state.voltage, state.frequency
+
+            # Fan control: hold the fan at our setting, or give it back to the miner when turned off
+            fan_managed = settings.max_fan is not None
+            min_fan = settings.min_fan if settings.min_fan is not None else config.get("min_fan", 25)
+            if fan_managed and state.fan is None:
+                reported_fan = info.get("fanspeed")
+                state.fan = fan_control.clamp(reported_fan if reported_fan is not None else settings.max_fan,
+                                              min_fan, settings.max_fan)
+            elif not fan_managed and state.fan is not None:
+                state.fan = None
+                log_callback(api.set_fan_speed(bitaxe_ip, None), "info")
+            if fan_managed and (info.get("autofanspeed") or info.get("fanspeed", state.fan) != state.fan):
+                result = api.set_fan_speed(bitaxe_ip, state.fan)
+                if " -> Error" in result:
+                    log_callback(result, "error")
+            fan_power = fan_control.fan_watts(state.fan, config.get("fan_max_watts", 2.0)) if fan_managed else 0
+            expected_hashrate = int(current_frequency * ((sample.small_core_count * sample.asic_count) / 1000))
             target_hashrate = get_target_hashrate_for_freq(current_frequency, tier_list)
 
             if target_hashrate is None:
                 log_callback(f"{bitaxe_ip} -> WARNING: No target hashrate found for {current_frequency} MHz", "warning")
                 target_hashrate = expected_hashrate
 
-            temp = info.get("temp", 0)
-            vr_temp = info.get("vrTemp", 0)
-            hash_rate = info.get("hashRate", 0)
-            power_consumption = info.get("power", 0)
-
-            # Flatline detection
-            hashrate_history.append(hash_rate)
-            if len(hashrate_history) > flatline_repeat_count:
-                hashrate_history.pop(0)
-
-            if flatline_enabled and len(set(hashrate_history)) == 1 and len(hashrate_history) == flatline_repeat_count:
-                log_callback(f"{bitaxe_ip} -> Flatline detected ({hash_rate} GH/s). Restarting...", "error")
-                restart_bitaxe(bitaxe_ip)
-                hashrate_history.clear()
-                time.sleep(60)
+            settled = now - state.last_tune_time > interval
+
+            # Group power budget: report this reading and fetch our allocated frequency ceiling
+            power_budget.report_reading(bitaxe_ip, config, settings.group, scaling_table,
+                                        current_frequency, current_voltage, sample.power, sample.hashrate,
+                                        min_freq, max_freq, now=now)
+            frequency_cap = power_budget.get_frequency_cap(bitaxe_ip)
+
+            # Efficiency objective: record this reading once the last change has had time to settle
+            objective = settings.objective or efficiency.OBJECTIVE_MAX_HASHRATE
+            efficiency.record_sample(bitaxe_ip, objective, current_frequency, sample.power + fan_power,
+                                     sample.hashrate, update_tier=settled, now=now)
+            jth = efficiency.joules_per_th(sample.power + fan_power, sample.hashrate)
+
+            # Calibration: keep settled readings for the per-miner tier table fit
+            if config.get("calibration_enabled", True) and settled:
+                calibration.record_observation(bitaxe_ip, info.get("frequency", current_frequency),
+                                               info.get("coreVoltage", current_voltage), info, expected_hashrate,
+                                               now=now)
+
+            # Share counters: reject rate and effective hashrate at the frequency the miner reports
+            share_window = None
+            if config.get("share_tuning_enabled", True):
+                shares.record(bitaxe_ip, info, info.get("frequency", current_frequency),
+                              window_seconds=config.get("share_window", 600),
+                              stats_ttl=config.get("share_stats_ttl", 1800), now=now)
+                share_window = shares.window(bitaxe_ip)
+
+            # Stall detection: escalate without blocking, and keep tuning decisions off a stalled miner
+            verdict = stall.observe(bitaxe_ip, info, now, config)
+            if verdict is not None and verdict["action"] is not None:
+                bounce = current_frequency - frequency_step
+                run_stall_action(bitaxe_ip, verdict, current_voltage, current_frequency,
+                                 bounce if bounce >= min_freq else current_frequency + frequency_step, log_callback, api)
+
+            reject_rate = share_window["reject_rate"] if share_window else None
+            effective_hashrate = share_window["effective_hashrate"] if share_window else None
+            log_callback(logstore.line(
+                f"{bitaxe_ip} -> Temp: {sample.temp}°C | Hashrate: {int(sample.hashrate)}/{expected_hashrate} GH/s | Power: {round(sample.power,2)}W | Efficiency: {round(jth, 2) if jth else '-'} J/TH | Rejects: {f'{reject_rate:.1%}' if reject_rate is not None else '-'}{f' | Fan: {state.fan}%' if fan_managed else ''} | Voltage: {current_voltage}V | Frequency: {current_frequency} MHz",
+                "sample", bitaxe_ip, temp=sample.temp, vr_temp=sample.vr_temp, hashrate=sample.hashrate,
+                expected_hashrate=expected_hashrate, power=sample.power, jth=jth,
+                effective_hashrate=effective_hashrate, reject_rate=reject_rate, fan=state.fan,
+                voltage=current_voltage, frequency=current_frequency), "success")
+
+            if verdict is not None and verdict["stalled"]:
+                wait(interval)
                 continue
 
-            log_callback(f"{bitaxe_ip} -> Temp: {temp}°C | Hashrate: {int(hash_rate)}/{expected_hashrate} GH/s | Power: {round(power_consumption,2)}W | Voltage: {current_voltage}V | Frequency: {current_frequency} MHz", "success")
-
-            now = time.time()
             new_voltage, new_frequency = current_voltage, current_frequency
-            volt_range_percent = (current_voltage - min_volt) / voltage_range
-            freq_range_percent = (current_frequency - min_freq) / frequency_range
             stepping_down = False
 
             # Main tuning logic
-            if now - last_tune_time >= refresh_interval:
-                if temp is None or power_consumption > max_watts or temp > max_temp or vr_temp > max_vr_temp:
+            if now - state.last_tune_time >= refresh_interval:
+                capped = frequency_cap is not None and current_frequency > frequency_cap
+                backoff = share_backoff(bitaxe_ip, config, current_voltage, current_frequency, min_freq, min_volt,
+                                        max_volt, frequency_step, scaling_table, now) if share_window and not capped else None
+                reason = None
+                if capped:
+                    reason = "budget_cap"
                     stepping_down = True
-                    tier_freqs = [t["frequency_(mhz)"] for t in tier_list]
-                    current_idx = tier_freqs.index(current_frequency) if current_frequency in tier_freqs else -1
-                    if current_idx > 0:
-                        new_frequency = tier_freqs[current_idx - 1]
-                        new_voltage = get_tier_voltage_for_freq(new_frequency, tier_list)
-                        log_callback(f"{bitaxe_ip} -> Dropping to tier: {new_frequency} MHz / {new_voltage} mV", "warning")
-                    else:
-                        log_callback(f"{bitaxe_ip} -> Already at minimum tier. Holding.", "warning")
-
-                elif temp < (max_temp - temp_tolerance) and power_consumption < max_watts and hash_rate < expected_hashrate:
-                    log_callback(f"{bitaxe_ip} -> Temp {temp}°C. Checking if program should optimize.", "info")
-                    if ((freq_range_percent >= 0.25 and volt_range_percent <= 0.25) or
-                        (freq_range_percent >= 0.5 and volt_range_percent <= 0.5) or
-                        (freq_range_percent >= 0.75 and volt_range_percent <= 0.75)):
-                        new_voltage += voltage_step
-                        log_callback(f"{bitaxe_ip} -> Increasing voltage to {new_voltage}mV.", "info")
-                    elif ((freq_range_percent < 0.25 and volt_range_percent <= 0.25) or
-                          (freq_range_percent < 0.5 and volt_range_percent <= 0.5) or
-                          (freq_range_percent < 0.75 and volt_range_percent <= 0.75)):
-                        new_frequency += frequency_step
-                        log_callback(f"{bitaxe_ip} -> Increasing frequency to {new_frequency}MHz.", "info")
-                    else:
-                        log_callback(f"{bitaxe_ip} -> Already at maximum safe settings.", "info")
-
-                elif hash_rate > expected_hashrate and hash_rate < target_hashrate:
-                    log_callback(f"{bitaxe_ip} -> Hashrate below target hashrate {target_hashrate} GH/s.", "warning")
-                    tier_freqs = [t["frequency_(mhz)"] for t in tier_list]
-                    current_idx = tier_freqs.index(current_frequency) if current_frequency in tier_freqs else -1
-                    if current_idx >= 0 and current_idx + 1 < len(tier_freqs):
-                        new_frequency = tier_freqs[current_idx + 1]
-                        new_voltage = get_tier_voltage_for_freq(new_frequency, tier_list)
-                        log_callback(f"{bitaxe_ip} -> Stepping up to tier: {new_frequency} MHz / {new_voltage} mV", "info")
-
-                elif hash_rate > expected_hashrate and hash_rate > target_hashrate:
-                    log_callback(f"{bitaxe_ip} -> Hashrate above target and healthy. No adjustment needed.", "success")
+                    new_frequency = max(frequency_cap, min_freq)
+                    new_voltage = min(max(get_tier_voltage_for_freq(new_frequency, scaling_table), min_volt), max_volt)
+                    log_callback(logstore.line(f"{bitaxe_ip} -> Over group power budget. Capping to {new_frequency} MHz / {new_voltage} mV",
+                                               "budget_cap", bitaxe_ip, voltage=new_voltage, frequency=new_frequency), "warning")
 
-                else:
-                    if new_voltage - voltage_step >= min_volt:
-                        new_voltage -= voltage_step
-                    else:
-                        new_voltage = min_volt
-                    if new_frequency - frequency_step >= min_freq:
-                        new_frequency -= frequency_step
-                    else:
-                        new_frequency = min_freq
+                elif backoff is not None:
+                    new_voltage, new_frequency, reason, message = backoff
                     stepping_down = True
-                    log_callback(f"{bitaxe_ip} -> Decreasing voltage and frequency due to inefficiency.", "warning")
+                    log_callback(logstore.line(f"{bitaxe_ip} -> {message}", reason, bitaxe_ip, voltage=new_voltage,
+                                               frequency=new_frequency, reject_rate=reject_rate,
+                                               effective_hashrate=effective_hashrate), "warning")
+
+                elif objective != efficiency.OBJECTIVE_MAX_HASHRATE and not exceeds_limits(
+                        sample.temp, sample.vr_temp, sample.power, max_temp, max_watts, max_vr_temp):
+                    search_tiers = [t for t in scaling_table if min_freq <= t["frequency_(mhz)"] <= max_freq
+                                    and (frequency_cap is None or t["frequency_(mhz)"] <= frequency_cap)]
+                    target_frequency = efficiency.choose_frequency(
+                        bitaxe_ip, objective, search_tiers, current_frequency,
+                        max_jth=settings.max_jth or None,
+                        min_samples=config.get("efficiency_min_samples", 3),
+                        stats_ttl=config.get("efficiency_stats_ttl", 1800), now=now)
+                    reason = "efficiency_hold"
+                    if target_frequency != current_frequency:
+                        reason = "efficiency_move"
+                        new_frequency = target_frequency
+                        new_voltage = min(max(get_tier_voltage_for_freq(new_frequency, scaling_table), min_volt), max_volt)
+                        stepping_down = new_frequency < current_frequency
+                        log_callback(logstore.line(f"{bitaxe_ip} -> Efficiency search ({objective}): moving to {new_frequency} MHz / {new_voltage} mV",
+                                                   "efficiency_move", bitaxe_ip, voltage=new_voltage, frequency=new_frequency), "info")
+
+                else:
+                    new_voltage, new_frequency, stepping_down, reason = decide_step(
+                        sample.temp, sample.vr_temp, sample.hashrate, sample.power, expected_hashrate, target_hashrate,
+                        current_voltage, current_frequency, min_freq, max_freq, min_volt, max_volt,
+                        max_temp, max_watts, max_vr_temp, temp_tolerance, voltage_step, frequency_step, tier_list)
+                    for message, level in describe_decision(reason, sample.temp, new_voltage, new_frequency, target_hashrate):
+                        log_callback(logstore.line(f"{bitaxe_ip} -> {message}", reason, bitaxe_ip, temp=sample.temp,
+                                                   voltage=new_voltage, frequency=new_frequency,
+                                                   target_hashrate=target_hashrate), level)
+
+                # Fan co-optimization: airflow first when hot, less fan (noise, watts) when cool
+                if fan_managed:
+                    new_fan = fan_control.decide_fan(objective, state.fan, sample.temp, max_temp, temp_tolerance, reason,
+                                                     min_fan, settings.max_fan, config.get("fan_step", 10))
+                    # Chip temperature is the only limit broken, by no more than temp_tolerance
+                    heat_only = (sample.temp is not None and max_temp < sample.temp <= max_temp + temp_tolerance
+                                 and not exceeds_limits(max_temp, sample.vr_temp, sample.power,
+                                                        max_temp, max_watts, max_vr_temp))
+                    if new_fan > state.fan and reason == "drop_tier" and heat_only:
+                        # There is fan headroom left: keep the tier
+                        new_voltage, new_frequency, stepping_down = current_voltage, current_frequency, False
+                        log_callback(logstore.line(f"{bitaxe_ip} -> Raising fan to {new_fan}% instead of dropping a tier.",
+                                                   "fan_instead_of_drop", bitaxe_ip, temp=sample.temp, fan=new_fan), "info")
+                    if new_fan != state.fan:
+                        result = api.set_fan_speed(bitaxe_ip, new_fan)
+                        log_callback(logstore.line(result, "fan", bitaxe_ip, temp=sample.temp, fan=new_fan),
+                                     "error" if " -> Error" in result else "info")
+                        state.fan = new_fan
+                        state.last_tune_time = now
+
+                if frequency_cap is not None and current_frequency < new_frequency and new_frequency > frequency_cap:
+                    log_callback(logstore.line(f"{bitaxe_ip} -> Holding at {current_frequency} MHz: group power budget allows {frequency_cap} MHz.",
+                                               "budget_hold", bitaxe_ip, frequency=current_frequency, cap=frequency_cap), "info")
+                    new_voltage, new_frequency = current_voltage, current_frequency
+
+                share_ceiling = shares.get_ceiling(bitaxe_ip, now)
+                if share_ceiling is not None and current_frequency < new_frequency and new_frequency >= share_ceiling:
+                    log_callback(logstore.line(f"{bitaxe_ip} -> Holding at {current_frequency} MHz: {share_ceiling} MHz and above gave no more accepted work.",
+                                               "share_hold", bitaxe_ip, frequency=current_frequency, cap=share_ceiling), "info")
+                    new_voltage, new_frequency = current_voltage, current_frequency
 
                 if new_voltage != current_voltage or new_frequency != current_frequency:
-                    applied_settings = set_system_settings(bitaxe_ip, new_voltage, new_frequency)
-                    log_callback(applied_settings, "info")
-                    current_voltage, current_frequency = new_voltage, new_frequency
-                    last_tune_time = now
+                    reconciler.set_desired(new_voltage, new_frequency, now)
+                    reconciler.reconcile(info, now)
+                    state.voltage, state.frequency = new_voltage, new_frequency
+                    state.last_tune_time = now
 
             if stepping_down:
-                time.sleep(interval * 3)
+                wait(interval * 3)
             else:
-                time.sleep(interval)
+                wait(interval)
 
         except Exception as e:
             log_callback(f"{bitaxe_ip} -> UNCAUGHT ERROR: {str(e)}", "error")
-            time.sleep(interval)
-
+            wait(interval)
+
+    thermal_watchdog.unwatch(bitaxe_ip)
+    stall.forget_miner(bitaxe_ip)
+    if state.fan is not None and moved is None:
+        # Handing the fan back to the miner is the one write allowed after a stop
+        log_callback(unfenced_api.set_fan_speed(bitaxe_ip, None), "info")
+    shares.forget_miner(bitaxe_ip)
+    power_budget.forget_miner(bitaxe_ip)
+    efficiency.forget_miner(bitaxe_ip)
+    calibration.flush_observations(bitaxe_ip)
+    release_miner(bitaxe_ip)
+    if moved is None:
+        release_stop_event(stop_event)
+    api.close()
     log_callback(f"{bitaxe_ip} -> Autotuning stopped.", "warning")
+    return moved
+
+def run_tuner(miner, log_callback, stop_event, api_for=None, clock=None):
+    """Thread target for one miner's tuner: tune_miner, restarted wherever rediscovery moves the miner.
+
+    api_for(ip) returns the MinerApi to use at an address, or None for the live one.
+    """
+    try:
+        while miner is not None and not stop_event.is_set():
+            threading.current_thread().name = f"tuner-{miner.ip}"
+            miner = tune_miner(miner, log_callback, stop_event=stop_event, clock=clock,
+                               api=api_for(miner.ip) if api_for else None)
+    finally:
+        release_stop_event(stop_event)
+
+def new_stop_event():
+    """A stop event for a tuner, registered so stop_autotuning() reaches it."""
+    stop_event = threading.Event()
+    with _stop_lock:
+        _stop_events.add(stop_event)
+    return stop_event
+
+def release_stop_event(stop_event):
+    with _stop_lock:
+        _stop_events.discard(stop_event)
+
+def hold_miner(bitaxe_ip):
+    """Mark a miner's voltage/frequency as owned by a running tuner."""
+    with _stop_lock:
+        _tuned[bitaxe_ip] = _tuned.get(bitaxe_ip, 0) + 1
+
+def release_miner(bitaxe_ip):
+    with _stop_lock:
+        if _tuned.get(bitaxe_ip, 0) <= 1:
+            _tuned.pop(bitaxe_ip, None)
+        else:
+            _tuned[bitaxe_ip] -= 1
+
+def is_tuned(bitaxe_ip):
+    """True while a tuner would rewrite manual setting changes on this miner."""
+    with _stop_lock:
+        return bitaxe_ip in _tuned
 
 def stop_autotuning():
     """Stops autotuning miners globally."""
-    global running
-    running = False
+    with _stop_lock:
+        for stop_event in _stop_events:
+            stop_event.set()
 
 def start_autotuning_all(log_callback):
     """Starts autotuning for all configured miners."""
@@ -252,21 +783,15 @@ def start_autotuning_all(log_callback):
     log_callback("Scanning network for new miners...", "info")
     detect_miners()
 
-    miners = get_miners()
+    miners = get_miner_configs()
     if not miners:
         log_callback("No miners configured. Please add miners in the GUI.", "error")
         return
 
     threads = []
-    for miner in miners:
-        thread = threading.Thread(target=monitor_and_adjust, args=(
-            miner["ip"], miner["type"], MONITOR_INTERVAL, log_callback,
-            miner.get("min_freq"), miner.get("max_freq"),
-            miner.get("min_volt"), miner.get("max_volt"),
-            miner.get("max_temp"), miner.get("max_watts"),
-            miner.get("start_freq"), miner.get("start_volt"),
-            miner.get("max_vr_temp")
-        ))
+    for miner in miners.values():
+        thread = threading.Thread(target=run_tuner, args=(miner, log_callback, new_stop_event()),
+                                  name=f"tuner-{miner.ip}")
 
         thread.start()
         threads.append(thread)
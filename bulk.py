@@ -0,0 +1,110 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from autotune import is_tuned, restart_bitaxe, set_fan_speed, set_system_settings
+
+OPERATIONS = ("set_settings", "set_fan", "restart")
+
+
+def select_miners(miners, selector):
+    """Return the miners matching every criterion in the selector.
+
+    Supported keys: group, model (matched against the miner's type), tag (matched
+    against the miner's tags list), ips (list of IPs), and all (true selects
+    every miner). An empty selector matches nothing.
+    """
+    if not selector:
+        return []
+    if selector.get("all"):
+        return list(miners)
+
+    selected = []
+    for miner in miners:
+        if "group" in selector and miner.get("group") != selector["group"]:
+            continue
+        if "model" in selector and (miner.get("type") or "").lower() != str(selector["model"]).lower():
+            continue
+        if "tag" in selector and selector["tag"] not in miner.get("tags", []):
+            continue
+        if "ips" in selector and miner["ip"] not in selector["ips"]:
+            continue
+        selected.append(miner)
+    return selected
+
+
+def validate_operation(operation):
+    """Return an error message for a malformed operation, or None if it is valid."""
+    op = operation.get("op")
+    if op not in OPERATIONS:
+        return f"Unknown operation '{op}'. Expected one of: {', '.join(OPERATIONS)}."
+    if op == "set_settings":
+        if not isinstance(operation.get("frequency"), int) or not isinstance(operation.get("core_voltage"), int):
+            return "set_settings requires integer 'frequency' (MHz) and 'core_voltage' (mV)."
+    if op == "set_fan":
+        fan_speed = operation.get("fan_speed")
+        if fan_speed is not None and (not isinstance(fan_speed, int) or not 0 <= fan_speed <= 100):
+            return "set_fan requires 'fan_speed' between 0 and 100, or null for auto fan."
+    return None
+
+
+def _check_limits(miner, operation):
+    """Reasons the operation falls outside the miner's configured AutoTuner limits."""
+    problems = []
+    if operation["op"] == "set_settings":
+        for value_key, low_key, high_key in (("frequency", "min_freq", "max_freq"),
+                                             ("core_voltage", "min_volt", "max_volt")):
+            value, low, high = operation[value_key], miner.get(low_key), miner.get(high_key)
+            if isinstance(low, (int, float)) and value < low or isinstance(high, (int, float)) and value > high:
+                problems.append(f"{value_key} {value} outside configured range {low}-{high}")
+    return problems
+
+
+def _apply(miner, operation):
+    ip = miner["ip"]
+    if operation["op"] == "set_settings":
+        return set_system_settings(ip, operation["core_voltage"], operation["frequency"])
+    if operation["op"] == "set_fan":
+        return set_fan_speed(ip, operation.get("fan_speed"))
+    return restart_bitaxe(ip)
+
+
+def run_bulk(miners, operation, dry_run=False, max_workers=8, force=False):
+    """Apply an operation to many miners concurrently, yielding one result per miner as it finishes.
+
+    Miners whose configured limits the operation would exceed are skipped unless
+    force is set. Settings and fan changes also skip miners with a running tuner,
+    which would put its own values straight back. With dry_run nothing is sent; each
+    result says what would happen.
+    The final item is a summary with succeeded, failed and skipped counts.
+    """
+    summary = {"selected": len(miners), "succeeded": 0, "failed": 0, "skipped": 0, "dry_run": dry_run}
+
+    to_apply = []
+    for miner in miners:
+        problems = _check_limits(miner, operation)
+        if operation["op"] != "restart" and is_tuned(miner["ip"]):
+            summary["skipped"] += 1
+            yield {"ip": miner["ip"], "status": "skipped",
+                   "message": "Autotuner is running on this miner and would undo the change. Stop it first."}
+        elif problems and not force:
+            summary["skipped"] += 1
+            yield {"ip": miner["ip"], "status": "skipped", "message": "; ".join(problems)}
+        elif dry_run:
+            summary["succeeded"] += 1
+            yield {"ip": miner["ip"], "status": "dry_run", "message": f"Would apply {operation}"}
+        else:
+            to_apply.append(miner)
+
+    if to_apply:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="bulk") as executor:
+            futures = {executor.submit(_apply, miner, operation): miner for miner in to_apply}
+            for future in as_completed(futures):
+                ip = futures[future]["ip"]
+                try:
+                    message = future.result()
+                except Exception as e:
+                    message = f"{ip} -> Error: {e}"
+                failed = " -> Error" in message
+                summary["failed" if failed else "succeeded"] += 1
+                yield {"ip": ip, "status": "failed" if failed else "ok", "message": message}
+
+    yield {"summary": summary}
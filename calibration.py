@@ -0,0 +1,162 @@
+import csv
+import os
+import threading
+import time
+
+import pandas as pd
+
+from config import load_config
+
+CALIBRATION_DIR = "calibration"
+OBSERVATION_FIELDS = ["timestamp", "frequency", "voltage", "hashrate", "expected_hashrate",
+                      "temp", "vr_temp", "shares_accepted", "shares_rejected"]
+FLUSH_EVERY = 20
+
+_lock = threading.Lock()
+_pending = {}
+
+
+def _safe_name(bitaxe_ip):
+    return bitaxe_ip.replace(":", "_").replace("/", "_")
+
+
+def observations_path(bitaxe_ip):
+    return os.path.join(CALIBRATION_DIR, f"{_safe_name(bitaxe_ip)}_observations.csv")
+
+
+def tiers_path(bitaxe_ip):
+    return os.path.join(CALIBRATION_DIR, f"{_safe_name(bitaxe_ip)}_tiers.csv")
+
+
+def record_observation(bitaxe_ip, frequency, voltage, info, expected_hashrate, now=None):
+    """Buffer one telemetry reading taken at a known frequency/voltage for the next fit.
+
+    now is the reading's time on the tuner's clock, so replayed runs are stamped with
+    simulated time; it defaults to the wall clock.
+    """
+    row = {
+        "timestamp": int(time.time() if now is None else now),
+        "frequency": frequency,
+        "voltage": voltage,
+        "hashrate": info.get("hashRate", 0),
+        "expected_hashrate": expected_hashrate,
+        "temp": info.get("temp", 0),
+        "vr_temp": info.get("vrTemp", 0),
+        "shares_accepted": info.get("sharesAccepted", 0),
+        "shares_rejected": info.get("sharesRejected", 0),
+    }
+    with _lock:
+        rows = _pending.setdefault(bitaxe_ip, [])
+        rows.append(row)
+        if len(rows) >= FLUSH_EVERY:
+            _flush(bitaxe_ip)
+
+
+def flush_observations(bitaxe_ip=None):
+    """Write buffered observations to disk for one miner, or all miners."""
+    with _lock:
+        for ip in ([bitaxe_ip] if bitaxe_ip else list(_pending)):
+            _flush(ip)
+
+
+def _flush(bitaxe_ip):
+    rows = _pending.pop(bitaxe_ip, [])
+    if not rows:
+        return
+    os.makedirs(CALIBRATION_DIR, exist_ok=True)
+    path = observations_path(bitaxe_ip)
+    write_header = not os.path.exists(path)
+    with open(path, "a", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=OBSERVATION_FIELDS)
+        if write_header:
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+def fit_tier_table(observations, base_table, max_temp, min_samples=10, hashrate_ratio=0.9,
+                   max_reject_rate=0.02, min_stable_fraction=0.95):
+    """Fit a frequency -> minimum stable voltage table from observations.
+
+    A reading is stable when hashrate reaches hashrate_ratio of expected, the chip is
+    under max_temp and the share reject rate since the previous reading is acceptable.
+    A frequency/voltage pair counts once it has min_samples readings of which at least
+    min_stable_fraction were stable. Frequencies without a qualifying pair use the
+    base table's voltage, clamped between the fitted voltages on either side.
+    """
+    base = pd.DataFrame(base_table)
+    if observations.empty or base.empty:
+        return base_table
+
+    obs = observations.sort_values("timestamp")
+    accepted = obs["shares_accepted"].diff().clip(lower=0).fillna(0)
+    rejected = obs["shares_rejected"].diff().clip(lower=0).fillna(0)
+    total = accepted + rejected
+    reject_rate = (rejected / total.where(total > 0)).fillna(0)
+
+    obs = obs.assign(stable=(obs["hashrate"] >= hashrate_ratio * obs["expected_hashrate"])
+                     & (obs["temp"] < max_temp)
+                     & (reject_rate <= max_reject_rate))
+
+    pairs = obs.groupby(["frequency", "voltage"]).agg(
+        samples=("stable", "size"),
+        stable_fraction=("stable", "mean"),
+        hashrate=("hashrate", "mean"),
+    ).reset_index()
+    pairs = pairs[(pairs["samples"] >= min_samples) & (pairs["stable_fraction"] >= min_stable_fraction)]
+    if pairs.empty:
+        return base_table
+
+    fitted = pairs.sort_values("voltage").groupby("frequency", as_index=False).first()
+    fitted = fitted.rename(columns={"frequency": "frequency_(mhz)", "voltage": "fitted_voltage",
+                                    "hashrate": "fitted_hashrate"})
+
+    merged = base.merge(fitted[["frequency_(mhz)", "fitted_voltage", "fitted_hashrate"]],
+                        on="frequency_(mhz)", how="left").sort_values("frequency_(mhz)")
+
+    # A voltage stable at some frequency is stable at every lower one
+    fitted_voltage = merged["fitted_voltage"][::-1].cummin()[::-1]
+    # Unfitted frequencies stay between their nearest fitted neighbours
+    clipped = merged["voltage"].clip(lower=fitted_voltage.ffill(), upper=fitted_voltage.bfill())
+    merged["voltage"] = fitted_voltage.fillna(clipped).astype(int)
+    merged["target_hashrate"] = merged["fitted_hashrate"].fillna(merged["target_hashrate"])
+    return merged[["frequency_(mhz)", "voltage", "target_hashrate"]].to_dict(orient="records")
+
+
+def calibrate_miner(bitaxe_ip, base_table, max_temp, config=None):
+    """Fit and persist a calibrated tier table for one miner. Returns True if one was written."""
+    config = config or load_config()
+    path = observations_path(bitaxe_ip)
+    if not os.path.exists(path) or not max_temp:
+        return False
+
+    observations = pd.read_csv(path)
+    fitted = fit_tier_table(
+        observations, base_table, max_temp,
+        min_samples=config.get("calibration_min_samples", 10),
+        hashrate_ratio=config.get("calibration_hashrate_ratio", 0.9),
+        max_reject_rate=config.get("calibration_max_reject_rate", 0.02),
+    )
+    if fitted is base_table:
+        return False
+
+    df = pd.DataFrame(fitted).rename(columns={"frequency_(mhz)": "Frequency (MHz)"})
+    df.to_csv(tiers_path(bitaxe_ip), index=False)
+    return True
+
+
+def run_calibration(base_table, log_callback=print):
+    """Batch job: flush pending observations and refit every configured miner's tier table."""
+    flush_observations()
+    config = load_config()
+    fitted = 0
+    for miner in config.get("miners", []):
+        if calibrate_miner(miner["ip"], base_table, miner.get("max_temp"), config):
+            fitted += 1
+            log_callback(f"{miner['ip']} -> Calibrated tier table written to {tiers_path(miner['ip'])}", "success")
+    return fitted
+
+
+if __name__ == "__main__":
+    from autotune import load_scaling_table
+    count = run_calibration(load_scaling_table(), lambda message, level="info": print(message))
+    print(f"Calibrated {count} miner(s).")
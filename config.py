@@ -2,11 +2,46 @@ import json
 import os
 import requests
 import ipaddress
+import threading
+import time
+
+from models import MinerConfig
 
 CONFIG_FILE = "config.json"
 
-def detect_miners(start_ip, end_ip):
-    """Scan a user-defined IP range and detect Bitaxe miners."""
+# Parsed miner entries, refreshed when config.json changes on disk
+_miner_configs_lock = threading.Lock()
+_miner_configs = {"key": None, "miners": {}}
+
+# IPs that did not answer a probe recently: ip -> time after which to probe again
+_unanswered_until = {}
+
+
+def miner_identity(miner_info):
+    """Stable device identity from /api/system/info: MAC address, falling back to hostname."""
+    return miner_info.get("macAddr") or miner_info.get("hostname") or None
+
+
+def _probe(ip_str, timeout=1):
+    """Return the miner's system info, or None if nothing answered at ip_str."""
+    try:
+        response = requests.get(f"http://{ip_str}/api/system/info", timeout=timeout)
+        if response.status_code == 200:
+            return response.json()
+    except (requests.exceptions.RequestException, ValueError):
+        pass
+    return None
+
+
+def detect_miners(start_ip, end_ip, max_probes_per_second=None, skip_recent_misses=False):
+    """Scan a user-defined IP range and detect Bitaxe miners.
+
+    Known miners are re-checked first at their configured IPs. The rest of the range
+    is swept afterwards, at most max_probes_per_second probes per second. Miners are
+    matched by the MAC/hostname they report, so a miner found at a new address has
+    its IP updated in place rather than being added again. With skip_recent_misses,
+    addresses that did not answer within discovery_negative_ttl seconds are skipped.
+    """
 
     # Convert IPs to IPv4 objects
     try:
@@ -18,41 +53,129 @@ def detect_miners(start_ip, end_ip):
 
     detected_miners = []
     config = load_config()
+    negative_ttl = config.get("discovery_negative_ttl", 600)
+    min_probe_gap = 1 / max_probes_per_second if max_probes_per_second else 0
+    identities = {}   # configured IP -> (mac, hostname) learned this scan
+    moves = {}        # old IP -> new IP
+    prefetched = {}   # IP -> system info already fetched in pass 1
+
+    # Pass 1: re-check known miners where we last saw them
+    by_identity = {}
+    verified_ips = set()
+    for miner in config["miners"]:
+        known_ids = {miner.get("mac"), miner.get("hostname")} - {None, ""}
+        miner_info = _probe(miner["ip"])
+        if miner_info:
+            identity = miner_identity(miner_info)
+            if not known_ids or identity in known_ids:
+                verified_ips.add(miner["ip"])
+                if not known_ids and identity:
+                    identities[miner["ip"]] = (miner_info.get("macAddr", ""), miner_info.get("hostname", ""))
+                    known_ids = {identity}
+            else:
+                prefetched[miner["ip"]] = miner_info
+        for key in known_ids:
+            by_identity[key] = miner
 
+    # Pass 2: sweep the remaining addresses in the range
     for ip in range(int(start_ip), int(end_ip) + 1):
         ip_str = str(ipaddress.IPv4Address(ip))
-        try:
-            response = requests.get(f"http://{ip_str}/api/system/info", timeout=1)
-            if response.status_code == 200:
-                miner_info = response.json()
-                model = miner_info.get("model", "Unknown")
-
-                # Prevent duplicate miner entries
-                if not any(m["ip"] == ip_str for m in config["miners"]):
-                    detected_miners.append({
-                        "nickname": f"Miner-{ip_str}",
-                        "ip": ip_str,
-                        "type": model,
-                        "min_freq": miner_info.get("min_freq", ""),
-                        "max_freq": miner_info.get("max_freq", ""),
-                        "min_volt": miner_info.get("min_volt", ""),
-                        "max_volt": miner_info.get("max_volt", ""),
-                        "max_temp": miner_info.get("max_temp", ""),
-                        "max_watts": miner_info.get("max_watts", ""),
-                        "max_vr_temp": miner_info.get("max_vr_temp", ""),  # <- ADD THIS
-                        "target_hashrate": miner_info.get("target_hashrate", "")
-                    })
-                    print(f"Detected miner: {model} at {ip_str}, added as {detected_miners[-1]['nickname']}")
-
-        except requests.exceptions.RequestException:
+        if ip_str in verified_ips:
             continue
+        if skip_recent_misses and _unanswered_until.get(ip_str, 0) > time.time():
+            continue
+
+        probe_started = time.time()
+        miner_info = prefetched.pop(ip_str, None) or _probe(ip_str)
+        if miner_info is None:
+            _unanswered_until[ip_str] = time.time() + negative_ttl
+        else:
+            _unanswered_until.pop(ip_str, None)
+            model = miner_info.get("model", "Unknown")
+            identity = miner_identity(miner_info)
+            known = by_identity.get(identity) if identity else None
+
+            if known is not None:
+                if known["ip"] != ip_str:
+                    print(f"Miner {known.get('nickname') or identity} moved from {known['ip']} to {ip_str}")
+                    moves[known["ip"]] = ip_str
+                    known["ip"] = ip_str
+            # Prevent duplicate miner entries
+            elif not any(m["ip"] == ip_str for m in config["miners"]):
+                detected_miners.append({
+                    "nickname": f"Miner-{ip_str}",
+                    "ip": ip_str,
+                    "mac": miner_info.get("macAddr", ""),
+                    "hostname": miner_info.get("hostname", ""),
+                    "type": model,
+                    "min_freq": miner_info.get("min_freq", ""),
+                    "max_freq": miner_info.get("max_freq", ""),
+                    "min_volt": miner_info.get("min_volt", ""),
+                    "max_volt": miner_info.get("max_volt", ""),
+                    "max_temp": miner_info.get("max_temp", ""),
+                    "max_watts": miner_info.get("max_watts", ""),
+                    "max_vr_temp": miner_info.get("max_vr_temp", ""),  # <- ADD THIS
+                    "target_hashrate": miner_info.get("target_hashrate", "")
+                })
+                if identity:
+                    by_identity[identity] = detected_miners[-1]
+                print(f"Detected miner: {model} at {ip_str}, added as {detected_miners[-1]['nickname']}")
+
+        # Rate cap so a background sweep stays low priority
+        remaining = min_probe_gap - (time.time() - probe_started)
+        if remaining > 0:
+            time.sleep(remaining)
 
-    if detected_miners:
-        config["miners"].extend(detected_miners)
+    if detected_miners or moves or identities:
+        # Re-read so edits made while the scan was running are kept
+        config = load_config()
+        for miner in config["miners"]:
+            if miner["ip"] in identities:
+                miner["mac"], miner["hostname"] = identities[miner["ip"]]
+            if miner["ip"] in moves:
+                miner["ip"] = moves[miner["ip"]]
+        config["miners"].extend(m for m in detected_miners
+                                if not any(existing["ip"] == m["ip"] for existing in config["miners"]))
         save_config(config)
 
     return detected_miners
 
+_rediscovery_started = False
+
+
+def start_rediscovery(log_callback):
+    """Start the background rediscovery thread (once per process).
+
+    Every rediscovery_interval seconds it re-runs detect_miners over the
+    rediscovery_start_ip..rediscovery_end_ip range at no more than
+    rediscovery_max_probes_per_second, skipping addresses that recently did not
+    answer. An interval of 0 (the default) leaves it idle.
+    """
+    global _rediscovery_started
+    if _rediscovery_started:
+        return
+    _rediscovery_started = True
+
+    def rediscovery_loop():
+        while True:
+            config = load_config()
+            interval = config.get("rediscovery_interval", 0)
+            start_ip, end_ip = config.get("rediscovery_start_ip"), config.get("rediscovery_end_ip")
+            if not interval or not start_ip or not end_ip:
+                time.sleep(60)
+                continue
+            try:
+                found = detect_miners(start_ip, end_ip,
+                                      max_probes_per_second=config.get("rediscovery_max_probes_per_second", 2),
+                                      skip_recent_misses=True)
+                if found:
+                    log_callback(f"Background rediscovery found {len(found)} new miners.", "success")
+            except Exception as e:
+                log_callback(f"Background rediscovery failed: {e}", "error")
+            time.sleep(interval)
+
+    threading.Thread(target=rediscovery_loop, name="rediscovery", daemon=True).start()
+
 def load_config():
     """Load configuration settings from config.json."""
     if not os.path.exists(CONFIG_FILE):
@@ -155,6 +278,55 @@ def get_miners():
     """Returns the list of configured miners."""
     return load_config().get("miners", [])
 
+def config_version():
+    """A stamp of config.json that changes whenever the file is written, or None if it is missing."""
+    try:
+        stat = os.stat(CONFIG_FILE)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def moved_miner(miner):
+    """Where rediscovery has moved a miner: its MinerConfig at the new IP, or None.
+
+    The miner is matched on its MAC address, or its hostname when the MAC is not
+    known. A miner whose IP is still configured for the same device has not moved.
+    """
+    field = "mac" if miner.mac else "hostname" if miner.hostname else None
+    if field is None:
+        return None
+    miners = get_miner_configs()
+    current = miners.get(miner.ip)
+    if current is not None and getattr(current, field) == getattr(miner, field):
+        return None
+    return next((m for m in miners.values() if m.ip != miner.ip and getattr(m, field) == getattr(miner, field)),
+                None)
+
+def get_miner_configs():
+    """Returns a MinerConfig for every configured miner, keyed by IP.
+
+    Entries are parsed only when config.json has changed since the last call, and
+    the same objects are handed to every caller, so treat them as read-only.
+    Invalid entries are reported and left out.
+    """
+    key = config_version()
+    with _miner_configs_lock:
+        if key is not None and key == _miner_configs["key"]:
+            return _miner_configs["miners"]
+
+    miners = {}
+    for entry in load_config().get("miners", []):
+        try:
+            miner = MinerConfig.from_dict(entry)
+        except ValueError as e:
+            print(f"Skipping miner in config.json: {e}")
+            continue
+        miners[miner.ip] = miner
+
+    with _miner_configs_lock:
+        _miner_configs["key"], _miner_configs["miners"] = key, miners
+    return miners
+
 def reset_config():
     """Resets configuration to default settings."""
     save_config(get_default_config())
@@ -0,0 +1,131 @@
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+MAX_PROFILE_SECONDS = 120
+
+_profile_lock = threading.Lock()
+_memory_lock = threading.Lock()
+_baseline = None
+# tracemalloc's own bookkeeping would otherwise show up as the top allocator
+_SNAPSHOT_FILTERS = (tracemalloc.Filter(False, tracemalloc.__file__),
+                     tracemalloc.Filter(False, "<frozen importlib._bootstrap>"))
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def profile(seconds, interval=0.01):
+    """Sample every thread's stack for seconds and return collapsed stacks for a flame graph.
+
+    Each output line is "thread;outer frame;...;inner frame count", the format read
+    by flamegraph.pl and speedscope. Only the calling thread does any work, and only
+    while a profile runs. Raises RuntimeError if a profile is already running.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise RuntimeError("A profile is already running.")
+    try:
+        me = threading.get_ident()
+        counts = Counter()
+        deadline = time.perf_counter() + min(seconds, MAX_PROFILE_SECONDS)
+        while time.perf_counter() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                counts[";".join(reversed(stack))] += 1
+            time.sleep(interval)
+        return "\n".join(f"{stack} {count}" for stack, count in counts.most_common()) + "\n"
+    finally:
+        _profile_lock.release()
+
+
+def start_memory_tracing(frames=10):
+    """Start tracemalloc and take the baseline for memory_snapshot. Returns False if it was already running."""
+    global _baseline
+    with _memory_lock:
+        if tracemalloc.is_tracing():
+            return False
+        tracemalloc.start(frames)
+        _baseline = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        return True
+
+
+def memory_snapshot(top=20):
+    """Diff the traced allocations against the previous snapshot, or the baseline.
+
+    Returns the traced totals and the top allocation sites by growth since the last
+    call, grouped by line. Never starts tracing itself: while tracemalloc is off it
+    only reports that.
+    """
+    global _baseline
+    with _memory_lock:
+        if not tracemalloc.is_tracing():
+            return {"tracing": False, "top": []}
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        stats = snapshot.compare_to(_baseline, "lineno") if _baseline is not None else snapshot.statistics("lineno")
+        _baseline = snapshot
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "tracing": True,
+            "current_bytes": current,
+            "peak_bytes": peak,
+            "top": [{"location": str(stat.traceback[0]),
+                     "size_bytes": stat.size,
+                     "size_diff_bytes": getattr(stat, "size_diff", None),
+                     "count": stat.count,
+                     "count_diff": getattr(stat, "count_diff", None)} for stat in stats[:top]],
+        }
+
+
+def stop_memory_tracing():
+    global _baseline
+    with _memory_lock:
+        tracemalloc.stop()
+        _baseline = None
+
+
+def _thread_cpu_seconds(native_id):
+    """User + system CPU seconds of one OS thread, from /proc (Linux only)."""
+    try:
+        with open(f"/proc/self/task/{native_id}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def thread_cpu(window=0):
+    """CPU seconds per Python thread, with the miner IP for tuner-<ip> threads.
+
+    With a window (seconds), CPU is also measured over that window and reported as a
+    percentage of one core. CPU times are only available on Linux; elsewhere they are None.
+    """
+    def sample():
+        return {thread.ident: (thread, _thread_cpu_seconds(thread.native_id)) for thread in threading.enumerate()}
+
+    before = sample()
+    if window > 0:
+        time.sleep(window)
+    after = sample() if window > 0 else before
+
+    threads = []
+    for ident, (thread, cpu) in after.items():
+        entry = {"name": thread.name, "ip": thread.name[len("tuner-"):] if thread.name.startswith("tuner-") else None,
+                 "daemon": thread.daemon, "cpu_seconds": cpu}
+        if window > 0:
+            start = before.get(ident, (None, None))[1]
+            entry["cpu_percent"] = round((cpu - start) / window * 100, 1) if cpu is not None and start is not None else None
+        threads.append(entry)
+    threads.sort(key=lambda t: t["cpu_seconds"] or 0, reverse=True)
+    return threads
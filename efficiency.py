@@ -0,0 +1,125 @@
+import threading
+import time
+
+OBJECTIVE_MAX_HASHRATE = "max_hashrate"
+OBJECTIVE_MIN_JTH = "min_jth"
+OBJECTIVE_JTH_CEILING = "max_hashrate_jth_ceiling"
+OBJECTIVES = (OBJECTIVE_MAX_HASHRATE, OBJECTIVE_MIN_JTH, OBJECTIVE_JTH_CEILING)
+
+# Smoothing factor for per-tier power/hashrate averages
+EMA_ALPHA = 0.3
+
+_lock = threading.Lock()
+_tier_stats = {}   # ip -> {frequency: {"power", "hashrate", "samples", "updated"}}
+_latest = {}       # ip -> {"objective", "power", "hashrate", "jth"}
+
+
+def joules_per_th(power, hashrate):
+    """Return efficiency in J/TH for a power (W) and hashrate (GH/s), or None if not hashing."""
+    if not hashrate or hashrate <= 0:
+        return None
+    return power / (hashrate / 1000)
+
+
+def record_sample(bitaxe_ip, objective, frequency, power, hashrate, update_tier=True, now=None):
+    """Record a reading for per-miner reporting and, optionally, the per-tier averages."""
+    now = time.time() if now is None else now
+    with _lock:
+        _latest[bitaxe_ip] = {
+            "objective": objective,
+            "frequency": frequency,
+            "power": power,
+            "hashrate": hashrate,
+            "jth": joules_per_th(power, hashrate),
+        }
+        if not update_tier:
+            return
+        stats = _tier_stats.setdefault(bitaxe_ip, {}).get(frequency)
+        if stats is None:
+            _tier_stats[bitaxe_ip][frequency] = {"power": power, "hashrate": hashrate, "samples": 1, "updated": now}
+        else:
+            stats["power"] += EMA_ALPHA * (power - stats["power"])
+            stats["hashrate"] += EMA_ALPHA * (hashrate - stats["hashrate"])
+            stats["samples"] += 1
+            stats["updated"] = now
+
+
+def _score(objective, stats, max_jth):
+    """Higher is better. Returns None when the tier violates the J/TH ceiling."""
+    jth = joules_per_th(stats["power"], stats["hashrate"])
+    if jth is None:
+        return None
+    if objective == OBJECTIVE_MIN_JTH:
+        return -jth
+    if max_jth and jth > max_jth:
+        return None
+    return stats["hashrate"]
+
+
+def choose_frequency(bitaxe_ip, objective, tiers, current_freq, max_jth=None, min_samples=3, stats_ttl=1800,
+                     now=None):
+    """Hill-climb the tier table toward the best measured point for the objective.
+
+    Each call looks only at the current tier and its two neighbours. A better measured
+    neighbour is moved to; if the current tier is the best measured, an unmeasured
+    neighbour is explored. Returns current_freq while the current tier is still being
+    measured, or once both neighbours are measured and worse.
+    """
+    freqs = [t["frequency_(mhz)"] for t in tiers]
+    if current_freq not in freqs:
+        return min(freqs, key=lambda f: abs(f - current_freq)) if freqs else current_freq
+
+    now = time.time() if now is None else now
+    with _lock:
+        measured = {freq: dict(s) for freq, s in _tier_stats.get(bitaxe_ip, {}).items()
+                    if s["samples"] >= min_samples and now - s["updated"] <= stats_ttl}
+
+    if current_freq not in measured:
+        return current_freq
+
+    idx = freqs.index(current_freq)
+    current_score = _score(objective, measured[current_freq], max_jth)
+
+    # Over the J/TH ceiling: back off one tier regardless of what is measured below
+    if current_score is None and objective == OBJECTIVE_JTH_CEILING:
+        return freqs[idx - 1] if idx > 0 else current_freq
+
+    neighbours = [freqs[i] for i in (idx + 1, idx - 1) if 0 <= i < len(freqs)]
+
+    best_freq, best_score = current_freq, current_score
+    for freq in neighbours:
+        if freq not in measured:
+            continue
+        score = _score(objective, measured[freq], max_jth)
+        if score is not None and (best_score is None or score > best_score):
+            best_freq, best_score = freq, score
+    if best_freq != current_freq:
+        return best_freq
+
+    # Current tier is the best measured so far: explore any unmeasured neighbour
+    for freq in neighbours:
+        if freq not in measured:
+            return freq
+    return current_freq
+
+
+def get_report():
+    """Return achieved efficiency per miner plus fleet-wide totals."""
+    with _lock:
+        miners = {ip: dict(entry) for ip, entry in _latest.items()}
+    total_power = sum(m["power"] for m in miners.values())
+    total_hashrate = sum(m["hashrate"] for m in miners.values())
+    return {
+        "miners": miners,
+        "fleet": {
+            "power": total_power,
+            "hashrate": total_hashrate,
+            "jth": joules_per_th(total_power, total_hashrate),
+        },
+    }
+
+
+def forget_miner(bitaxe_ip):
+    """Drop a miner from efficiency reporting."""
+    with _lock:
+        _latest.pop(bitaxe_ip, None)
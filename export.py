@@ -0,0 +1,206 @@
+import argparse
+import csv
+import io
+import math
+import sys
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: only needed for Parquet and Arrow exports
+    pa = None
+
+import logstore
+
+SAMPLE_EVENT = logstore.SAMPLE_EVENT
+FIELDS = ("temp", "vr_temp", "hashrate", "expected_hashrate", "effective_hashrate", "reject_rate", "power", "jth",
+          "fan", "voltage", "frequency")
+COLUMNS = ("ts", "ip", "samples") + FIELDS
+AGGREGATES = ("mean", "min", "max", "last")
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+CHUNK_ROWS = 5000
+
+
+def parse_options(args):
+    """Validate export query parameters. Raises ValueError with a message for the client."""
+    fmt = args.get("format", "csv").lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'. Use one of: {', '.join(FORMATS)}.")
+    if fmt != "csv" and pa is None:
+        raise ValueError("Parquet and Arrow exports need pyarrow (pip install pyarrow).")
+    columns = [c.strip() for c in args.get("columns", "").split(",") if c.strip()] or list(COLUMNS)
+    unknown = [c for c in columns if c not in COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}. Available: {', '.join(COLUMNS)}.")
+    bucket = float(args.get("bucket", 0) or 0)
+    if not math.isfinite(bucket) or bucket < 0:
+        raise ValueError("bucket must be a number of seconds, or 0 for raw samples.")
+    agg = args.get("agg", "mean").lower()
+    if agg not in AGGREGATES:
+        raise ValueError(f"Unknown agg '{agg}'. Use one of: {', '.join(AGGREGATES)}.")
+    ips = [ip.strip() for ip in args.get("ip", "").split(",") if ip.strip()]
+    return {"format": fmt, "columns": columns, "bucket": bucket, "agg": agg, "ips": ips or None}
+
+
+class _Bucket:
+    __slots__ = ("samples", "sums", "counts", "mins", "maxes", "lasts")
+
+    def __init__(self):
+        self.samples = 0
+        self.sums, self.counts, self.mins, self.maxes, self.lasts = {}, {}, {}, {}, {}
+
+    def add(self, fields):
+        self.samples += 1
+        for name in FIELDS:
+            value = fields.get(name)
+            if not isinstance(value, (int, float)):
+                continue
+            self.sums[name] = self.sums.get(name, 0) + value
+            self.counts[name] = self.counts.get(name, 0) + 1
+            self.mins[name] = min(self.mins.get(name, value), value)
+            self.maxes[name] = max(self.maxes.get(name, value), value)
+            self.lasts[name] = value
+
+    def result(self, agg):
+        if agg == "mean":
+            return {name: self.sums[name] / self.counts[name] for name in self.sums}
+        return {"min": self.mins, "max": self.maxes, "last": self.lasts}[agg]
+
+
+def _raw(records):
+    for record in records:
+        yield dict(record.get("fields", {}), ts=record["ts"], ip=record["ip"], samples=1)
+
+
+def _bucketed(records, bucket, agg):
+    """Aggregate records into bucket-second windows per miner, in (window, ip) order.
+
+    Records arrive oldest first, so a window is emitted as soon as a record from a
+    later window shows up, and only one open window per miner is ever held. A record
+    that arrives slightly out of order joins the current window.
+    """
+    current, open_buckets = None, {}
+    for record in records:
+        start = record["ts"] // bucket * bucket
+        if current is None or start > current:
+            for ip in sorted(open_buckets):
+                yield dict(open_buckets[ip].result(agg), ts=current, ip=ip, samples=open_buckets[ip].samples)
+            current, open_buckets = start, {}
+        open_buckets.setdefault(record["ip"], _Bucket()).add(record.get("fields", {}))
+    for ip in sorted(open_buckets):
+        yield dict(open_buckets[ip].result(agg), ts=current, ip=ip, samples=open_buckets[ip].samples)
+
+
+def rows(options, since=None, until=None):
+    """Tuner samples from the log store as tuples in the selected column order."""
+    records = logstore.scan(ips=options["ips"], events=(SAMPLE_EVENT,), since=since, until=until)
+    records = (record for record in records if record.get("ip"))
+    samples = _bucketed(records, options["bucket"], options["agg"]) if options["bucket"] else _raw(records)
+    columns = options["columns"]
+    for sample in samples:
+        yield tuple(sample.get(column) for column in columns)
+
+
+def _csv_chunks(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count >= CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+    yield buffer.getvalue()
+
+
+class _Sink:
+    """Write-only file object that pyarrow writes into; bytes are taken after each batch."""
+
+    closed = False
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def _columnar_chunks(rows, columns, fmt):
+    types = {"ts": pa.float64(), "ip": pa.string(), "samples": pa.int64()}
+    schema = pa.schema([(column, types.get(column, pa.float64())) for column in columns])
+    sink = _Sink()
+    writer = pq.ParquetWriter(sink, schema) if fmt == "parquet" else pa.ipc.new_stream(sink, schema)
+
+    def write(batch):
+        arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*batch), schema)]
+        writer.write_batch(pa.record_batch(arrays, schema=schema))
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= CHUNK_ROWS:
+            write(batch)
+            batch = []
+            yield sink.take()
+    if batch:
+        write(batch)
+    writer.close()
+    yield sink.take()
+
+
+def stream(options, since=None, until=None):
+    """The export as a sequence of byte or text chunks, holding at most CHUNK_ROWS rows at a time."""
+    samples = rows(options, since, until)
+    if options["format"] == "csv":
+        return _csv_chunks(samples, options["columns"])
+    return _columnar_chunks(samples, options["columns"], options["format"])
+
+
+if __name__ == "__main__":
+    import requests
+
+    parser = argparse.ArgumentParser(description="Export tuner history from a running headless app.")
+    parser.add_argument("--url", default="http://localhost:5000", help="Headless app address (default %(default)s)")
+    parser.add_argument("--format", choices=list(FORMATS), default="csv")
+    parser.add_argument("--columns", help=f"Comma-separated columns (default all: {','.join(COLUMNS)})")
+    parser.add_argument("--ip", help="Comma-separated miner IPs (default all)")
+    parser.add_argument("--since", help="Start time, Unix seconds or ISO 8601")
+    parser.add_argument("--until", help="End time, Unix seconds or ISO 8601")
+    parser.add_argument("--bucket", type=float, help="Aggregate into windows of this many seconds")
+    parser.add_argument("--agg", choices=AGGREGATES, help="Aggregate for --bucket (default mean)")
+    parser.add_argument("-o", "--output", help="Output file (default stdout)")
+    args = parser.parse_args()
+
+    params = {key: value for key, value in vars(args).items() if key not in ("url", "output") and value is not None}
+    with requests.get(f"{args.url.rstrip('/')}/api/history/export", params=params, stream=True, timeout=(10, 300)) as response:
+        if response.status_code != 200:
+            sys.exit(f"Export -> Error: {response.status_code} {response.text}")
+        out = open(args.output, "wb") if args.output else sys.stdout.buffer
+        try:
+            for chunk in response.iter_content(chunk_size=1 << 16):
+                out.write(chunk)
+        finally:
+            if args.output:
+                out.close()
@@ -0,0 +1,35 @@
+import efficiency
+
+# Tuner outcomes that spend thermal headroom on more hashrate
+RAISES = ("raise_voltage", "raise_frequency", "step_up_tier")
+
+
+def fan_watts(fan, max_watts):
+    """Estimated fan power (W) at a fan percentage. Fan power grows with the cube of speed."""
+    if not fan or not max_watts:
+        return 0.0
+    return max_watts * (min(fan, 100) / 100) ** 3
+
+
+def clamp(fan, min_fan, max_fan):
+    return max(min_fan, min(int(fan), max_fan))
+
+
+def decide_fan(objective, fan, temp, max_temp, temp_tolerance, reason, min_fan, max_fan, fan_step):
+    """The fan percentage to run at after a tuning step that ended with reason.
+
+    Near or over max_temp the fan goes up first, up to the miner's max_fan noise
+    ceiling, so heat is handled with airflow before frequency is given up. Well
+    below max_temp it comes down again: always for the efficiency objectives, where
+    fan power counts against J/TH, and for max_hashrate only while the tuner is not
+    using the headroom to climb.
+    """
+    if temp is None:
+        return max_fan
+    if temp >= max_temp - temp_tolerance:
+        return min(fan + fan_step, max_fan)
+    if temp < max_temp - 2 * temp_tolerance:
+        if objective == efficiency.OBJECTIVE_MAX_HASHRATE and reason in RAISES:
+            return fan
+        return max(fan - fan_step, min_fan)
+    return fan
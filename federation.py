@@ -0,0 +1,148 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+
+from efficiency import joules_per_th
+
+# Upstream responses keyed by URL: {"data", "fetched_at", "checked_at", "error"}
+_lock = threading.Lock()
+_cache = {}
+_inflight = {}
+_executor = None
+_executor_workers = None
+
+
+def _get_executor(max_workers):
+    """The shared request pool, rebuilt when federation_max_concurrency changes."""
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != max_workers:
+        if _executor is not None:
+            _executor.shutdown(wait=False)  # Requests already queued there still run
+        _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="federation")
+        _executor_workers = max_workers
+    return _executor
+
+
+def _prune(max_age):
+    """Evict entries no refresh has fetched for max_age seconds, e.g. removed sites or miners."""
+    now = time.time()
+    with _lock:
+        for url in [url for url, entry in _cache.items()
+                    if now - entry["checked_at"] > max_age and url not in _inflight]:
+            del _cache[url]
+
+
+def _fetch(url, timeout):
+    try:
+        response = requests.get(url, timeout=timeout)
+        response.raise_for_status()
+        data, error = response.json(), None
+    except (requests.exceptions.RequestException, ValueError) as e:
+        data, error = None, str(e)
+    with _lock:
+        _inflight.pop(url, None)
+        entry = _cache.setdefault(url, {"data": None, "fetched_at": 0, "checked_at": 0, "error": None})
+        entry["error"] = error
+        entry["checked_at"] = time.time()
+        if error is None:
+            entry["data"] = data
+            entry["fetched_at"] = time.time()
+
+
+def _request(url, ttl, timeout, budget):
+    """Return a future if url needs refreshing and the per-refresh budget allows it."""
+    with _lock:
+        entry = _cache.get(url)
+        if entry and time.time() - entry["fetched_at"] < ttl:
+            return None
+        if url in _inflight:
+            return _inflight[url]
+        if budget["remaining"] <= 0:
+            return None
+        budget["remaining"] -= 1
+        future = _get_executor(budget["workers"]).submit(_fetch, url, timeout)
+        _inflight[url] = future
+        return future
+
+
+def _cached(url, ttl):
+    """Cached data for url plus whether it is still fresh."""
+    with _lock:
+        entry = _cache.get(url)
+        if not entry or entry["data"] is None:
+            return None, False, entry["error"] if entry else None
+        return entry["data"], time.time() - entry["fetched_at"] < ttl, entry["error"]
+
+
+def get_fleet(config):
+    """Fan out to every configured site and merge the results into one fleet view.
+
+    Each refresh sends at most federation_max_requests upstream requests, with
+    federation_max_concurrency running at once. It waits no longer than
+    federation_deadline seconds in total. Sites that are slow or down are served
+    from their last cached response and marked stale, or marked down if nothing
+    has been cached yet. Requests still running finish in the background and fill
+    the cache for the next refresh. Entries not fetched for federation_cache_max_age
+    seconds are evicted.
+    """
+    sites = config.get("federation_sites", [])
+    ttl = config.get("federation_cache_ttl", 10)
+    _prune(max(config.get("federation_cache_max_age", 300), ttl))
+    timeout = config.get("federation_timeout", 3)
+    deadline = time.time() + config.get("federation_deadline", 2)
+    budget = {"remaining": config.get("federation_max_requests", 64),
+              "workers": config.get("federation_max_concurrency", 8)}
+
+    def wait_for(futures):
+        futures = [f for f in futures if f is not None]
+        if futures:
+            wait(futures, timeout=max(0, deadline - time.time()))
+
+    wait_for([_request(f"{site['url'].rstrip('/')}/api/miners", ttl, timeout, budget) for site in sites])
+
+    site_miners = {}
+    info_futures = []
+    for site in sites:
+        base = site["url"].rstrip("/")
+        miners, _, _ = _cached(f"{base}/api/miners", ttl)
+        site_miners[site["name"]] = miners or []
+        for miner in miners or []:
+            info_futures.append(_request(f"{base}/api/miner-info/{miner['ip']}", ttl, timeout, budget))
+    wait_for(info_futures)
+
+    fleet, rollups = [], {}
+    for site in sites:
+        base = site["url"].rstrip("/")
+        miners_data, miners_fresh, miners_error = _cached(f"{base}/api/miners", ttl)
+        rollup = {"status": "ok" if miners_fresh else ("stale" if miners_data else "down"),
+                  "error": miners_error, "miners": 0, "online": 0, "hashrate": 0, "power": 0, "max_temp": None}
+        for miner in site_miners[site["name"]]:
+            info, info_fresh, _ = _cached(f"{base}/api/miner-info/{miner['ip']}", ttl)
+            row = {"site": site["name"], "nickname": miner.get("nickname"), "ip": miner["ip"],
+                   "type": miner.get("type"), "online": info is not None, "stale": info is not None and not info_fresh}
+            if info:
+                for field in ("frequency", "coreVoltage", "temp", "vrTemp", "hashRate", "power"):
+                    row[field] = info.get(field)
+                row["jth"] = joules_per_th(info.get("power") or 0, info.get("hashRate"))
+                rollup["online"] += 1
+                rollup["hashrate"] += info.get("hashRate") or 0
+                rollup["power"] += info.get("power") or 0
+                temp = info.get("temp")
+                if temp is not None and (rollup["max_temp"] is None or temp > rollup["max_temp"]):
+                    rollup["max_temp"] = temp
+            rollup["miners"] += 1
+            fleet.append(row)
+        rollup["jth"] = joules_per_th(rollup["power"], rollup["hashrate"])
+        rollups[site["name"]] = rollup
+
+    total_hashrate = sum(r["hashrate"] for r in rollups.values())
+    total_power = sum(r["power"] for r in rollups.values())
+    return {
+        "miners": fleet,
+        "sites": rollups,
+        "totals": {"miners": len(fleet), "online": sum(r["online"] for r in rollups.values()),
+                   "hashrate": total_hashrate, "power": total_power,
+                   "jth": joules_per_th(total_power, total_hashrate)},
+    }
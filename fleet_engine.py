@@ -0,0 +1,483 @@
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import autotune
+import efficiency
+import logstore
+import power_budget
+import stall
+import thermal_watchdog
+from autotune import (SettingsReconciler, decide_step, describe_decision, get_system_info,
+                      load_scaling_table, run_stall_action)
+from config import load_config, moved_miner
+from models import MinerConfig
+
+# Reason codes, indexed by the engine's reason column; decide_step returns the same strings
+REASONS = ("budget_cap", "drop_tier", "at_min_tier", "raise_voltage", "raise_frequency", "at_max",
+           "below_target", "step_up_tier", "healthy", "decrease", "budget_hold")
+_R = {name: i for i, name in enumerate(REASONS)}
+
+
+# Tier tables are stored back to back, keyed by table_id * KEY_STRIDE + frequency, so one
+# searchsorted call looks up every miner's tier regardless of which table it uses
+KEY_STRIDE = 1e6
+
+
+class _TierTables:
+    """Deduplicated tier tables flattened into sorted NumPy arrays."""
+
+    def __init__(self, tables):
+        ids, rows = {}, []
+        self.table_id = np.zeros(len(tables), dtype=int)
+        for miner_row, table in enumerate(tables):
+            tiers = tuple((t["frequency_(mhz)"], t["voltage"], t.get("target_hashrate", 0))
+                          for t in sorted(table, key=lambda x: x["frequency_(mhz)"]))
+            if tiers not in ids:
+                ids[tiers] = len(rows)
+                rows.append(tiers)
+            self.table_id[miner_row] = ids[tiers]
+
+        self.start = np.cumsum([0] + [len(t) for t in rows])[:-1].astype(int)
+        self.length = np.array([len(t) for t in rows], dtype=int)
+        flat = [tier for tiers in rows for tier in tiers]
+        tids = [tid for tid, tiers in enumerate(rows) for _ in tiers]
+        # A trailing sentinel keeps out-of-range indexes valid; results there are masked off
+        self.freq = np.array([t[0] for t in flat] + [np.inf], dtype=float)
+        self.volt = np.array([t[1] for t in flat] + [np.nan], dtype=float)
+        self.target = np.array([t[2] for t in flat] + [np.nan], dtype=float)
+        self.keys = np.array([tid * KEY_STRIDE + t[0] for tid, t in zip(tids, flat)] + [np.inf], dtype=float)
+
+    def below(self, tid, freq):
+        """Index within each table of the highest tier at or below freq (-1 when there is none)."""
+        pos = np.searchsorted(self.keys, tid * KEY_STRIDE + freq, side="right") - 1
+        return np.maximum(pos - self.start[tid], -1)
+
+    def exact(self, tid, freq):
+        """Index within each table of the first tier at exactly freq (-1 when there is none)."""
+        key = tid * KEY_STRIDE + freq
+        pos = np.searchsorted(self.keys, key, side="left")
+        found = (pos - self.start[tid] < self.length[tid]) & (self.keys[pos] == key)
+        return np.where(found, pos - self.start[tid], -1)
+
+    def at(self, column, tid, idx):
+        """column values at per-table index idx (clipped into the table)."""
+        idx = np.clip(idx, 0, np.maximum(self.length[tid] - 1, 0))
+        return np.where(self.length[tid] > 0, column[self.start[tid] + idx], np.nan)
+
+
+class FleetDecisionEngine:
+    """Evaluates the AutoTuner's threshold rules for a whole fleet in one batched pass.
+
+    Limits, current settings, the latest telemetry and each miner's tier table are
+    held as NumPy columns, one row per miner. step() applies the same rules as
+    autotune.decide_step, plus the group power budget cap, to every miner with a new
+    reading and returns one decision per evaluated miner. check_against_scalar()
+    verifies the two agree.
+    """
+
+    def __init__(self, miners, tier_tables, enforce_tiers, temp_tolerance=2, voltage_step=10, frequency_step=5):
+        self.ips = [m.ip for m in miners]
+        self.index = {ip: row for row, ip in enumerate(self.ips)}
+        n = len(miners)
+
+        def column(key, default=np.nan):
+            return np.array([getattr(m, key) if getattr(m, key) is not None else default for m in miners], dtype=float)
+
+        self.min_freq, self.max_freq = column("min_freq"), column("max_freq")
+        self.min_volt, self.max_volt = column("min_volt"), column("max_volt")
+        self.max_temp, self.max_watts, self.max_vr_temp = column("max_temp"), column("max_watts"), column("max_vr_temp")
+        self.frequency = np.where(np.isnan(column("start_freq")), self.min_freq, column("start_freq"))
+        self.voltage = np.where(np.isnan(column("start_volt")), self.min_volt, column("start_volt"))
+
+        self.temp_tolerance = temp_tolerance
+        self.voltage_step = voltage_step
+        self.frequency_step = frequency_step
+
+        # Latest telemetry; NaN temp stands for a reading without a temperature
+        self.temp = np.full(n, np.nan)
+        self.vr_temp = np.zeros(n)
+        self.hashrate = np.zeros(n)
+        self.power = np.zeros(n)
+        self.cores = np.zeros(n)
+        self.fresh = np.zeros(n, dtype=bool)
+        self.frequency_cap = np.full(n, np.nan)
+        self.last_tune = np.zeros(n)
+        self.hold_ticks = np.zeros(n, dtype=int)
+
+        # Scaling tables are used for the budget cap; the rules only see them when tiers are enforced
+        self.tables = _TierTables(tier_tables)
+        self.enforce_tiers = enforce_tiers
+
+    def update(self, bitaxe_ip, info):
+        """Store a miner's /api/system/info reading for the next step."""
+        row = self.index[bitaxe_ip]
+        temp = info.get("temp", 0)
+        self.temp[row] = np.nan if temp is None else temp
+        self.vr_temp[row] = info.get("vrTemp", 0)
+        self.hashrate[row] = info.get("hashRate", 0)
+        self.power[row] = info.get("power", 0)
+        self.cores[row] = info.get("smallCoreCount", 0) * info.get("asicCount", 0)
+        self.fresh[row] = True
+
+    def set_frequency_cap(self, bitaxe_ip, cap):
+        self.frequency_cap[self.index[bitaxe_ip]] = np.nan if cap is None else cap
+
+    def rename(self, old_ip, new_ip):
+        """Keep a miner's row, and its tuning state, under the new IP rediscovery found it at."""
+        row = self.index.pop(old_ip)
+        self.ips[row] = new_ip
+        self.index[new_ip] = row
+
+    def due(self):
+        """IPs to poll this tick. Miners that just stepped down sit out two ticks, like the per-miner tuner."""
+        return [ip for ip, hold in zip(self.ips, self.hold_ticks) if hold <= 0]
+
+    def expected_hashrate(self):
+        return np.trunc(self.frequency * (self.cores / 1000))
+
+    def _tier_value(self, column, tid, freq):
+        """Vectorized get_tier_voltage_for_freq for any table column."""
+        idx = self.tables.below(tid, freq)
+        return self.tables.at(column, tid, np.maximum(idx, 0)), idx
+
+    def target_hashrate(self, rows):
+        """Vectorized get_target_hashrate_for_freq over the enforced tier tables."""
+        tid = self.tables.table_id[rows]
+        if not self.enforce_tiers:
+            return np.zeros(len(rows))
+        value, idx = self._tier_value(self.tables.target, tid, self.frequency[rows])
+        return np.where(idx >= 0, value, value * 1000)
+
+    def evaluate(self, rows):
+        """The rules for the given rows. Returns (new_voltage, new_frequency, stepping_down, reason) arrays."""
+        cur_v, cur_f = self.voltage[rows], self.frequency[rows]
+        min_f, max_f, min_v, max_v = self.min_freq[rows], self.max_freq[rows], self.min_volt[rows], self.max_volt[rows]
+        temp, vr_temp, hashrate, power = self.temp[rows], self.vr_temp[rows], self.hashrate[rows], self.power[rows]
+        expected, target = self.expected_hashrate()[rows], self.target_hashrate(rows)
+        max_temp, max_watts, cap = self.max_temp[rows], self.max_watts[rows], self.frequency_cap[rows]
+        tables, tid = self.tables, self.tables.table_id[rows]
+        tier_count = tables.length[tid] if self.enforce_tiers else np.zeros(len(rows), dtype=int)
+
+        new_v, new_f = cur_v.copy(), cur_f.copy()
+        stepping_down = np.zeros(len(rows), dtype=bool)
+        reason = np.zeros(len(rows), dtype=int)
+        pending = np.ones(len(rows), dtype=bool)
+
+        def decide(mask, r, voltage=None, frequency=None, down=False):
+            nonlocal pending
+            mask = mask & pending
+            if voltage is not None:
+                new_v[mask] = voltage[mask]
+            if frequency is not None:
+                new_f[mask] = frequency[mask]
+            stepping_down[mask] = down
+            reason[mask] = _R[r]
+            pending = pending & ~mask
+
+        # Group power budget
+        over_cap = ~np.isnan(cap) & (cur_f > cap)
+        cap_f = np.maximum(np.nan_to_num(cap, nan=0), min_f)
+        cap_v, _ = self._tier_value(tables.volt, tid, cap_f)
+        decide(over_cap, "budget_cap", np.minimum(np.maximum(cap_v, min_v), max_v), cap_f, True)
+
+        # Tier position of the current frequency in the enforced table (first exact match)
+        idx = np.where(tier_count > 0, tables.exact(tid, cur_f), -1)
+        has_idx = idx >= 0
+        lower_f, upper_f = tables.at(tables.freq, tid, idx - 1), tables.at(tables.freq, tid, idx + 1)
+        lower_v, _ = self._tier_value(tables.volt, tid, lower_f)
+        upper_v, _ = self._tier_value(tables.volt, tid, upper_f)
+
+        # Over a limit: drop a tier or hold at the bottom
+        with np.errstate(invalid="ignore"):
+            over = np.isnan(temp) | (power > max_watts) | (temp > max_temp) | (vr_temp > self.max_vr_temp[rows])
+        decide(over & (idx > 0), "drop_tier", lower_v, lower_f, True)
+        decide(over, "at_min_tier", down=True)
+
+        # Cool, under power and under the expected hashrate: raise voltage or frequency
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vp = (cur_v - min_v) / (max_v - min_v)
+            fp = (cur_f - min_f) / (max_f - min_f)
+        optimize = (temp < (max_temp - self.temp_tolerance)) & (power < max_watts) & (hashrate < expected)
+        raise_v = ((fp >= 0.25) & (vp <= 0.25)) | ((fp >= 0.5) & (vp <= 0.5)) | ((fp >= 0.75) & (vp <= 0.75))
+        raise_f = ((fp < 0.25) & (vp <= 0.25)) | ((fp < 0.5) & (vp <= 0.5)) | ((fp < 0.75) & (vp <= 0.75))
+        decide(optimize & raise_v, "raise_voltage", voltage=cur_v + self.voltage_step)
+        decide(optimize & raise_f, "raise_frequency", frequency=cur_f + self.frequency_step)
+        decide(optimize, "at_max")
+
+        # Above expected but below the tier target: step up a tier
+        below_target = (hashrate > expected) & (hashrate < target)
+        decide(below_target & has_idx & (idx + 1 < tier_count), "step_up_tier", upper_v, upper_f)
+        decide(below_target, "below_target")
+        decide((hashrate > expected) & (hashrate > target), "healthy")
+
+        # Everything else: step both down, not below the minimums
+        dec_v = np.where(cur_v - self.voltage_step >= min_v, cur_v - self.voltage_step, min_v)
+        dec_f = np.where(cur_f - self.frequency_step >= min_f, cur_f - self.frequency_step, min_f)
+        decide(pending.copy(), "decrease", dec_v, dec_f, True)
+
+        # Never raise frequency past the budget cap
+        blocked = ~np.isnan(cap) & (cur_f < new_f) & (new_f > cap)
+        new_v[blocked], new_f[blocked] = cur_v[blocked], cur_f[blocked]
+        reason[blocked] = _R["budget_hold"]
+        return new_v, new_f, stepping_down, reason
+
+    def step(self, now, refresh_interval):
+        """Evaluate every miner with a fresh reading whose refresh interval has passed.
+
+        Updates the current settings and returns one decision dict per evaluated
+        miner; those with "write" set need the new settings applied.
+        """
+        self.hold_ticks = np.maximum(self.hold_ticks - 1, 0)
+        rows = np.flatnonzero(self.fresh & (now - self.last_tune >= refresh_interval))
+        self.fresh[:] = False
+        if rows.size == 0:
+            return []
+
+        targets = self.target_hashrate(rows)
+        new_v, new_f, stepping_down, reason = self.evaluate(rows)
+        write = (new_v != self.voltage[rows]) | (new_f != self.frequency[rows])
+        self.voltage[rows[write]], self.frequency[rows[write]] = new_v[write], new_f[write]
+        self.last_tune[rows[write]] = now
+        self.hold_ticks[rows[stepping_down]] = 2
+
+        return [{"ip": self.ips[row], "voltage": int(v), "frequency": int(f), "stepping_down": down,
+                 "reason": REASONS[r], "target_hashrate": target, "write": w}
+                for row, v, f, down, r, target, w in zip(rows.tolist(), new_v.tolist(), new_f.tolist(),
+                                                         stepping_down.tolist(), reason.tolist(),
+                                                         targets.tolist(), write.tolist())]
+
+
+class FleetTuner:
+    """Tunes many miners from one thread using FleetDecisionEngine.
+
+    Each tick it polls every due miner concurrently, feeds the readings and group
+    budget caps to the engine, and hands the resulting writes to a per-miner
+    SettingsReconciler. Efficiency objectives, fan control, share-aware back-off
+    and calibration need the per-miner tuner, so those miners should be tuned with
+    tune_miner instead.
+    """
+
+    def __init__(self, miners, log_callback, stop_event=None):
+        self.miners = {m.ip: m for m in miners}
+        self.log_callback = log_callback
+        self.stop_event = stop_event or autotune.new_stop_event()
+
+    def run(self):
+        for ip, miner in list(self.miners.items()):
+            if miner.missing_fields():
+                self.log_callback(f"{ip} -> Missing AutoTuner settings. Skipping tuning.", "error")
+                del self.miners[ip]
+        config = load_config()
+        tables = {ip: load_scaling_table(ip) for ip in self.miners}
+        engine = FleetDecisionEngine(list(self.miners.values()), list(tables.values()),
+                                     config.get("enforce_safe_pairing", False),
+                                     config.get("temp_tolerance", 2), config.get("voltage_step", 10),
+                                     config.get("frequency_step", 5))
+        api = autotune.FencedApi(autotune.MinerApi(), self.stop_event)
+        reconcilers = {}
+
+        def track(ip):
+            row = engine.index[ip]
+            reconcilers[ip] = SettingsReconciler(ip, self.log_callback,
+                                                 coalesce_seconds=config.get("settings_coalesce_seconds", 0),
+                                                 retry_base=config.get("settings_retry_base", 5),
+                                                 retry_max=config.get("settings_retry_max", 300),
+                                                 api=api)
+            reconcilers[ip].set_desired(int(engine.voltage[row]), int(engine.frequency[row]), time.time())
+            thermal_watchdog.watch(self.miners[ip], tables[ip], api.set_system_settings, self.log_callback)
+            autotune.hold_miner(ip)
+
+        def untrack(ip):
+            thermal_watchdog.unwatch(ip)
+            autotune.release_miner(ip)
+            stall.forget_miner(ip)
+            power_budget.forget_miner(ip)
+            efficiency.forget_miner(ip)
+
+        for ip in self.miners:
+            track(ip)
+        last_config_refresh = time.time()
+        interval = config.get("monitor_interval", 5)
+        self.log_callback(f"Fleet tuner started for {len(self.miners)} miners.", "success")
+
+        with ThreadPoolExecutor(max_workers=config.get("fleet_poll_concurrency", 32),
+                                thread_name_prefix="fleet-poll") as executor:
+            while not self.stop_event.is_set():
+                started = time.time()
+                try:
+                    if started - last_config_refresh > 5:
+                        config = load_config()
+                        last_config_refresh = started
+                        engine.temp_tolerance = config.get("temp_tolerance", 2)
+                        engine.voltage_step = config.get("voltage_step", 10)
+                        engine.frequency_step = config.get("frequency_step", 5)
+                        for ip, miner in list(self.miners.items()):
+                            moved = moved_miner(miner)
+                            if moved is None or moved.ip in self.miners:
+                                continue
+                            # Same row and settings; only the address and the per-IP trackers change
+                            self.log_callback(f"{ip} -> Miner moved to {moved.ip}. Tuning it there.", "warning")
+                            untrack(ip)
+                            del self.miners[ip], reconcilers[ip]
+                            self.miners[moved.ip] = moved
+                            tables[moved.ip] = tables.pop(ip)
+                            engine.rename(ip, moved.ip)
+                            track(moved.ip)
+                    interval = config.get("monitor_interval", 5)
+
+                    due = engine.due()
+                    infos = dict(zip(due, executor.map(get_system_info, due)))
+                    now = time.time()
+                    for ip, info in infos.items():
+                        if not isinstance(info, dict):
+                            continue  # Reachability changes are logged once by the health tracker
+                        row = engine.index[ip]
+                        emergency = thermal_watchdog.take_emergency(ip)
+                        if emergency is not None:
+                            engine.voltage[row], engine.frequency[row] = emergency
+                            engine.last_tune[row] = now
+                            reconcilers[ip].set_desired(*emergency, now)
+                        reconcilers[ip].reconcile(info, now)
+                        miner = self.miners[ip]
+                        power_budget.report_reading(ip, config, miner.group, tables[ip],
+                                                    int(engine.frequency[row]), int(engine.voltage[row]),
+                                                    info.get("power", 0), info.get("hashRate", 0),
+                                                    miner.min_freq, miner.max_freq, now=now)
+                        engine.set_frequency_cap(ip, power_budget.get_frequency_cap(ip))
+                        efficiency.record_sample(ip, efficiency.OBJECTIVE_MAX_HASHRATE, int(engine.frequency[row]),
+                                                 info.get("power", 0), info.get("hashRate", 0),
+                                                 update_tier=False, now=now)
+                        # Stored for history export only; a log line per miner per poll would flood the UI
+                        logstore.record(logstore.line(
+                            f"{ip} -> Temp: {info.get('temp')}°C | Hashrate: {info.get('hashRate')} GH/s | Power: {info.get('power')}W",
+                            "sample", ip, temp=info.get("temp"), vr_temp=info.get("vrTemp"), hashrate=info.get("hashRate"),
+                            power=info.get("power"), jth=efficiency.joules_per_th(info.get("power", 0), info.get("hashRate", 0)),
+                            voltage=int(engine.voltage[row]), frequency=int(engine.frequency[row])), "info", now)
+
+                        verdict = stall.observe(ip, info, now, config)
+                        if verdict is not None and verdict["action"] is not None:
+                            voltage, frequency = int(engine.voltage[row]), int(engine.frequency[row])
+                            bounce = frequency - engine.frequency_step
+                            run_stall_action(ip, verdict, voltage, frequency,
+                                             bounce if bounce >= miner.min_freq else frequency + engine.frequency_step,
+                                             self.log_callback, api)
+                        if verdict is not None and verdict["stalled"]:
+                            continue  # Not fed to the engine, so no tuning decision is made on a stalled reading
+                        engine.update(ip, info)
+
+                    for decision in engine.step(now, config.get("refresh_interval", 60)):
+                        ip = decision["ip"]
+                        for message, level in describe_decision(decision["reason"], infos[ip].get("temp"), decision["voltage"],
+                                                                decision["frequency"], decision["target_hashrate"]):
+                            self.log_callback(logstore.line(f"{ip} -> {message}", decision["reason"], ip,
+                                                            temp=infos[ip].get("temp"), voltage=decision["voltage"],
+                                                            frequency=decision["frequency"],
+                                                            target_hashrate=decision["target_hashrate"]), level)
+                        if decision["write"]:
+                            reconcilers[ip].set_desired(decision["voltage"], decision["frequency"], now)
+                            reconcilers[ip].reconcile(infos[ip], now)
+                except Exception as e:
+                    self.log_callback(f"Fleet tuner -> UNCAUGHT ERROR: {str(e)}", "error")
+                self.stop_event.wait(max(0, interval - (time.time() - started)))
+
+        for ip in self.miners:
+            untrack(ip)
+        autotune.release_stop_event(self.stop_event)
+        self.log_callback("Fleet tuner stopped.", "warning")
+
+
+def _scalar_decision(engine, row, tier_list, scaling_table):
+    """Run one engine row through the per-miner tuner's rules: the budget cap, then decide_step."""
+    cur_f, cur_v = int(engine.frequency[row]), int(engine.voltage[row])
+    min_f, max_f = int(engine.min_freq[row]), int(engine.max_freq[row])
+    min_v, max_v = int(engine.min_volt[row]), int(engine.max_volt[row])
+    cap = None if np.isnan(engine.frequency_cap[row]) else int(engine.frequency_cap[row])
+    if cap is not None and cur_f > cap:
+        new_f = max(cap, min_f)
+        new_v = min(max(autotune.get_tier_voltage_for_freq(new_f, scaling_table), min_v), max_v)
+        return new_v, new_f, True, "budget_cap"
+
+    expected = int(cur_f * (int(engine.cores[row]) / 1000))
+    target = autotune.get_target_hashrate_for_freq(cur_f, tier_list)
+    temp = None if np.isnan(engine.temp[row]) else float(engine.temp[row])
+    max_vr_temp = None if np.isnan(engine.max_vr_temp[row]) else float(engine.max_vr_temp[row])
+    new_v, new_f, stepping_down, reason = decide_step(
+        temp, float(engine.vr_temp[row]), float(engine.hashrate[row]), float(engine.power[row]),
+        expected, target, cur_v, cur_f, min_f, max_f, min_v, max_v, float(engine.max_temp[row]),
+        float(engine.max_watts[row]), max_vr_temp, engine.temp_tolerance, engine.voltage_step,
+        engine.frequency_step, tier_list)
+    if cap is not None and cur_f < new_f and new_f > cap:
+        return cur_v, cur_f, stepping_down, "budget_hold"
+    return new_v, new_f, stepping_down, reason
+
+
+def check_against_scalar(miners=5000, seed=0, enforce_tiers=True):
+    """Differential check: random fleets through the engine and through the per-miner rules must agree.
+
+    Returns a list of mismatches (empty when the two agree) and the time each side took.
+    """
+    rng = random.Random(seed)
+    base_table = load_scaling_table()
+    fleet, tables, infos, caps = [], [], [], []
+    for i in range(miners):
+        table = [dict(t) for t in base_table if rng.random() > 0.2] or [dict(base_table[0])]
+        tier_freqs = [t["frequency_(mhz)"] for t in table]
+        min_freq, max_freq = rng.choice([(400, 600), (450, 700), (500, 650)])
+        min_volt, max_volt = rng.choice([(1100, 1250), (1050, 1200), (1150, 1300)])
+        start_freq = rng.choice(tier_freqs + [rng.randrange(min_freq, max_freq + 1, 5)])
+        fleet.append(MinerConfig(f"10.{i // 65536}.{i // 256 % 256}.{i % 256}",
+                                 min_freq=min_freq, max_freq=max_freq, min_volt=min_volt, max_volt=max_volt,
+                                 max_temp=rng.choice([60, 65, 70]), max_watts=rng.choice([20, 25, 40]),
+                                 max_vr_temp=rng.choice([70, 80, 90, None]), start_freq=start_freq,
+                                 start_volt=rng.randrange(min_volt, max_volt + 1, 10)))
+        tables.append(table)
+        # Some miners are held by a group power budget: below, at or above their current frequency
+        caps.append(rng.choice([start_freq, start_freq - 5, rng.choice(tier_freqs)]) if rng.random() < 0.3 else None)
+        infos.append({"temp": None if rng.random() < 0.02 else round(rng.uniform(40, 75), 1),
+                      "vrTemp": round(rng.uniform(40, 95), 1), "hashRate": rng.uniform(0, 1500),
+                      "power": rng.uniform(5, 45), "smallCoreCount": rng.choice([672, 894, 2040]),
+                      "asicCount": rng.choice([1, 2, 4])})
+
+    engine = FleetDecisionEngine(fleet, tables, enforce_tiers)
+    for miner, info, cap in zip(fleet, infos, caps):
+        engine.update(miner.ip, info)
+        engine.set_frequency_cap(miner.ip, cap)
+
+    scalar_start = time.perf_counter()
+    expected = [_scalar_decision(engine, row, tables[row] if enforce_tiers else [], tables[row])
+                for row in range(miners)]
+    scalar_seconds = time.perf_counter() - scalar_start
+
+    batch_start = time.perf_counter()
+    decisions = engine.step(now=1e9, refresh_interval=0)
+    batch_seconds = time.perf_counter() - batch_start
+
+    mismatches = []
+    for row, (decision, (voltage, frequency, stepping_down, reason)) in enumerate(zip(decisions, expected)):
+        got = (decision["voltage"], decision["frequency"], decision["stepping_down"], decision["reason"])
+        if got != (voltage, frequency, stepping_down, reason):
+            mismatches.append({"miner": fleet[row].to_dict(), "info": infos[row], "engine": got,
+                               "scalar": (voltage, frequency, stepping_down, reason)})
+    return mismatches, scalar_seconds, batch_seconds
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the batched fleet engine against the per-miner rules.")
+    parser.add_argument("--miners", type=int, default=5000)
+    parser.add_argument("--seeds", type=int, default=5)
+    args = parser.parse_args()
+
+    failed = False
+    for seed in range(args.seeds):
+        for enforce in (True, False):
+            mismatches, scalar_seconds, batch_seconds = check_against_scalar(args.miners, seed, enforce)
+            print(f"seed {seed}, enforce_tiers={enforce}: {len(mismatches)} mismatches | "
+                  f"per-miner {scalar_seconds * 1000:.1f} ms, batched {batch_seconds * 1000:.1f} ms")
+            for mismatch in mismatches[:3]:
+                print(f"  {mismatch}")
+            failed = failed or bool(mismatches)
+    raise SystemExit(1 if failed else 0)
@@ -2,8 +2,14 @@ import tkinter as tk
 from tkinter import scrolledtext, ttk, messagebox
 import threading
 from datetime import datetime
-from config import get_miner_defaults, add_miner, remove_miner, get_miners, update_miner, load_config, save_config, detect_miners
-from autotune import monitor_and_adjust, stop_autotuning, get_system_info, restart_bitaxe
+from config import add_miner, remove_miner, get_miners, get_miner_configs, update_miner, load_config, save_config, detect_miners
+from autotune import run_tuner, new_stop_event, stop_autotuning, get_system_info, restart_bitaxe
+import alerts
+import health
+import logstore
+import telemetry
+from replay import recording_api
+from table_model import COLUMNS, MinerTableModel
 import os
 import sys
 import time
@@ -54,16 +60,22 @@ class BitaxeAutotuningApp:
         style.configure("Treeview", rowheight=25)
         style.map("Treeview", background=[("selected", "gold")])
 
+        # Filter box for the miner table
+        filter_frame = tk.Frame(self.root, bg="black")
+        filter_frame.pack(fill=tk.X, padx=5)
+        tk.Label(filter_frame, text="Filter:", bg="black", fg="gold", font=("Arial", 10)).pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", lambda *args: self.filter_table())
+        tk.Entry(filter_frame, textvariable=self.filter_var, width=30).pack(side=tk.LEFT, padx=5)
+
         # Miner Configuration Table
-        self.tree = ttk.Treeview(self.root, columns=(
-            "Nickname", "Type", "IP", "Applied Freq", "Current Voltage mVA", "Current Temp",
-            "VR Temp", "Current Hash Rate", "Current Watts"
-        ), show="headings", height=5, style="Treeview")
+        self.tree = ttk.Treeview(self.root, columns=[heading for heading, _, _ in COLUMNS],
+                                 show="headings", height=5, style="Treeview")
 
-        # Add Column Headings
-        for col in self.tree["columns"]:
-            self.tree.heading(col, text=col, anchor="center")
-            self.tree.column(col, width=120, anchor="center")
+        # Add Column Headings; clicking one sorts by it
+        for heading, key, _ in COLUMNS:
+            self.tree.heading(heading, text=heading, anchor="center", command=lambda key=key: self.sort_table(key))
+            self.tree.column(heading, width=120, anchor="center")
 
         self.tree.pack(pady=5, fill=tk.BOTH, expand=True)
 
@@ -146,11 +158,28 @@ class BitaxeAutotuningApp:
         self.log_output = scrolledtext.ScrolledText(self.root, width=100, height=15, bg="white")
         self.log_output.pack(pady=5, fill=tk.BOTH, expand=True)
 
+        # The Treeview only mirrors self.table; render_table pushes the differences
+        self.table = MinerTableModel()
         self.tree_items_by_ip = {}  # map IP to Treeview row ID
+        self.shown_values = {}  # map IP to the values the Treeview row currently shows
+        self.shown_order = []
+
+        # Miner reachability changes are logged once by the shared health tracker
+        logstore.configure(load_config())
+        health.set_log_callback(self.log_message)
+        alerts.start(self.log_message)
 
         # Load miners from config.json on startup
         self.load_miners_from_config()
 
+        # Live readings come from the tuners (or the telemetry poller while they are stopped)
+        self.subscriber, current = telemetry.subscribe()
+        for ip, fields in current.items():
+            self.table.update(ip, fields)
+        telemetry.start_poller(get_system_info, lambda: [m["ip"] for m in get_miners()],
+                               lambda: load_config().get("monitor_interval", 5))
+        self.update_miner_display()
+
     def open_miner_webpage(self):
         """Opens the selected miner's IP address in the default web browser."""
         selected_item = self.tree.selection()
@@ -209,23 +238,71 @@ class BitaxeAutotuningApp:
                 self.root.after(100, self.load_miners_from_config)  # Update UI safely
                 self.scan_button.config(state=tk.NORMAL)  # Re-enable button
 
-            threading.Thread(target=scan_task, daemon=True).start()
+            threading.Thread(target=scan_task, name="network-scan", daemon=True).start()
 
         tk.Button(scan_window, text="Start Scan", font=("Arial", 10), command=start_scan, bg="gold").pack(pady=10)
 
     def load_miners_from_config(self):
         """Loads miners from config.json into the UI."""
-        self.tree.delete(*self.tree.get_children())  # Clear existing entries
         miners = get_miners()
-
-        for miner in miners:
-            values = (
-            miner.get("nickname", f"Miner-{miner['ip']}"), miner["type"], miner["ip"], "-", "-", "-", "-", "-", "-")
-            item_id = self.tree.insert("", "end", values=values)
-            self.tree_items_by_ip[miner["ip"]] = item_id
+        self.table.set_miners(miners)
+        self.render_table()
 
         self.log_message(f"Loaded {len(miners)} miners.", "success")
 
+    def render_table(self):
+        """Bring the Treeview in line with the model, touching only rows and cells that changed."""
+        columns = self.tree["columns"]
+        for ip in [ip for ip in self.tree_items_by_ip if ip not in self.table]:
+            self.tree.delete(self.tree_items_by_ip.pop(ip))
+            self.shown_values.pop(ip, None)
+
+        inserted = False
+        for ip in self.table.take_dirty():
+            values = self.table.values(ip)
+            item = self.tree_items_by_ip.get(ip)
+            if item is None:
+                self.tree_items_by_ip[ip] = self.tree.insert("", "end", values=values)
+                inserted = True
+            else:
+                for column, old, new in zip(columns, self.shown_values[ip], values):
+                    if old != new:
+                        self.tree.set(item, column, new)
+            self.shown_values[ip] = values
+
+        view = self.table.view()
+        if not inserted and view == self.shown_order:
+            return
+        # Detach filtered-out rows, then move only the rows that are out of place
+        wanted = [self.tree_items_by_ip[ip] for ip in view]
+        wanted_set = set(wanted)
+        current = []
+        for item in self.tree.get_children():
+            if item in wanted_set:
+                current.append(item)
+            else:
+                self.tree.detach(item)
+        for index, item in enumerate(wanted):
+            if index >= len(current) or current[index] != item:
+                self.tree.move(item, "", index)
+                if item in current:
+                    current.remove(item)
+                current.insert(index, item)
+        self.shown_order = list(view)
+
+    def sort_table(self, key):
+        """Sort the miner table by a column; clicking the same column again reverses it."""
+        self.table.sort_by(key)
+        for heading, column_key, _ in COLUMNS:
+            arrow = (" ▼" if self.table.descending else " ▲") if column_key == self.table.sort_key else ""
+            self.tree.heading(heading, text=heading + arrow)
+        self.render_table()
+
+    def filter_table(self):
+        """Show only miners whose nickname, type, IP or ASIC model contains the filter text."""
+        self.table.set_filter(self.filter_var.get())
+        self.render_table()
+
     def add_miner(self):
         """Opens a window to manually add a miner."""
         add_window = tk.Toplevel(self.root)
@@ -256,9 +333,9 @@ class BitaxeAutotuningApp:
                 messagebox.showerror("Error", "IP Address is required.")
                 return
 
-            item_id = self.tree.insert("", "end", values=(nickname, "Unknown", ip, "-", "-", "-", "-", "-", "-"))
-            self.tree_items_by_ip[ip] = item_id  # ✅ Track the new item
             add_miner("Unknown", ip, nickname)
+            self.table.set_miners(get_miners())
+            self.render_table()
             messagebox.showinfo("Success", f"Miner {nickname} added successfully.")
             add_window.destroy()
 
@@ -284,18 +361,14 @@ class BitaxeAutotuningApp:
             values = self.tree.item(item, "values")
             ip = values[2]
 
-            # Remove from treeview
-            self.tree.delete(item)
-
-            # ✅ Remove from IP-to-row map
-            if ip in self.tree_items_by_ip:
-                del self.tree_items_by_ip[ip]
-
             # Remove from config
             miners = [m for m in miners if m["ip"] != ip]
+            telemetry.forget(ip)
 
         config["miners"] = miners
         save_config(config)
+        self.table.set_miners(miners)
+        self.render_table()
         self.log_message("Miner(s) removed successfully.", "success")
 
     def refresh_selected_miner(self):
@@ -317,24 +390,8 @@ class BitaxeAutotuningApp:
             self.log_message(f"Error fetching miner data from {ip}: {miner_data}", "error")
             return
 
-        # Extract real-time values
-        new_frequency = miner_data.get("frequency", "-")
-        new_voltage = miner_data.get("coreVoltage", "-")
-        new_temp = f"{miner_data.get('temp', '-')}°C"
-        new_vr_temp = f"{miner_data.get('vrTemp', '-')}°C"
-        new_hashrate = f"{float(miner_data.get('hashRate', 0)):.2f} GH/s"
-        new_power = f"{float(miner_data.get('power', 0)):.2f} W"
-
-        # Update all 9 values in-place
-        updated_values = list(values)
-        updated_values[3] = new_frequency  # Applied Freq
-        updated_values[4] = new_voltage  # Voltage
-        updated_values[5] = new_temp  # Temp
-        updated_values[6] = new_vr_temp  # VR Temp
-        updated_values[7] = new_hashrate  # Hash Rate
-        updated_values[8] = new_power  # Power
-
-        self.tree.item(selected_item, values=updated_values)
+        self.table.update(ip, miner_data)
+        self.render_table()
 
         self.log_message(f"Refreshed data for miner at {ip}.", "success")
 
@@ -521,7 +578,7 @@ class BitaxeAutotuningApp:
         flatline_var = tk.BooleanVar(value=config.get("flatline_detection_enabled", True))
         flatline_checkbox = tk.Checkbutton(
             self.global_settings_window,
-            text="Enable Flatline Hashrate Detection",
+            text="Enable Stall Detection",
             variable=flatline_var,
             font=("Arial", 10),
             bg="white",
@@ -534,7 +591,7 @@ class BitaxeAutotuningApp:
 
         tk.Label(
             self.global_settings_window,
-            text="Flatline Repeat Count (e.g. 5):",
+            text="Stall Hashrate Samples (e.g. 5):",
             font=("Arial", 10),
             bg="white",
             fg="black"
@@ -700,35 +757,17 @@ class BitaxeAutotuningApp:
 
         updated_miners = []
 
-        # Get current values from the UI and update config.json
-        for item in self.tree.get_children():
-            values = self.tree.item(item, "values")
-            nickname = values[0]
-            miner_type = values[1]
-            ip = values[2]
+        # Get current values from the table model (including rows hidden by the filter) and update config.json
+        existing_by_ip = {m["ip"]: m for m in existing_miners}
+        for ip in self.table.ips():
+            row = self.table.row(ip)
+            nickname = row["nickname"]
+            miner_type = row["type"]
 
-            # Retrieve tuning settings from stored config
-            miner_defaults = get_miner_defaults(ip)
-
-            # Preserve 'enabled' flag from existing config
-            matching_existing = next((m for m in existing_miners if m["ip"] == ip), {})
-            enabled = matching_existing.get("enabled", False)
-
-            updated_miner = {
-                "nickname": nickname,
-                "type": miner_type,
-                "ip": ip,
-                "min_freq": miner_defaults.get("min_freq", ""),
-                "max_freq": miner_defaults.get("max_freq", ""),
-                "start_freq": miner_defaults.get("start_freq", ""),
-                "min_volt": miner_defaults.get("min_volt", ""),
-                "max_volt": miner_defaults.get("max_volt", ""),
-                "start_volt": miner_defaults.get("start_volt", ""),
-                "max_temp": miner_defaults.get("max_temp", ""),
-                "max_watts": miner_defaults.get("max_watts", ""),
-                "max_vr_temp": miner_defaults.get("max_vr_temp", ""),
-                "enabled": enabled
-            }
+            # Keep the stored tuning settings (and the 'enabled' flag) for this miner
+            updated_miner = dict(existing_by_ip.get(ip, {}))
+            updated_miner.setdefault("enabled", False)
+            updated_miner.update({"nickname": nickname, "type": miner_type, "ip": ip})
 
             updated_miners.append(updated_miner)
 
@@ -754,22 +793,14 @@ class BitaxeAutotuningApp:
 
         self.start_button.config(text="Autotuner Running", state=tk.DISABLED, bg="light green")
 
-        config = load_config()  # Reload latest settings including updated monitor_interval
-        interval = config.get("monitor_interval", 5)  # Refresh it here just once
+        config = load_config()  # Reload latest settings
 
         self.log_message("Checking AutoTuner settings before starting...", "info")
 
-        missing_settings = []
-        required_fields = ["min_freq", "max_freq", "min_volt", "max_volt", "max_temp", "max_watts"]
+        miners = [m for m in get_miner_configs().values() if m.enabled]  # Skip miners that are disabled
 
         # Validate that each miner has all required AutoTuner settings
-        for miner in config.get("miners", []):
-            if not miner.get("enabled", False):  # Skip miners that are disabled
-                continue
-
-            for field in required_fields:
-                if field not in miner or miner[field] == "" or miner[field] is None:
-                    missing_settings.append((miner["ip"], field))
+        missing_settings = [(miner.ip, field) for miner in miners for field in miner.missing_fields()]
 
         # If missing settings are found, alert the user and prevent startup
         if missing_settings:
@@ -784,44 +815,25 @@ class BitaxeAutotuningApp:
 
         self.log_message("Starting autotuning for selected miners...", "success")
 
-        active_miners = [m for m in config.get("miners", []) if m.get("enabled", False)]
-
-        if not active_miners:
+        if not miners:
             self.log_message("No miners are enabled for AutoTuning. Please enable at least one miner.", "error")
             messagebox.showwarning("No Miners Enabled",
                                    "No miners are enabled for AutoTuning. Please enable at least one miner in settings.")
             self.running = False
             return
 
-        for miner in active_miners:
-            ip, bitaxe_type = miner["ip"], miner["type"]
-
-            min_freq = miner.get("min_freq", 0)
-            max_freq = miner.get("max_freq", 0)
-            min_volt = miner.get("min_volt", 0)
-            max_volt = miner.get("max_volt", 0)
-            max_temp = miner.get("max_temp", 0)
-            max_watts = miner.get("max_watts", 0)
-            max_vr_temp = miner.get("max_vr_temp", 0)
-            interval = config.get("monitor_interval", 10)  # Global setting
-
-            # Pass settings dynamically to `monitor_and_adjust`
-            start_freq = miner.get("start_freq", "")
-            start_volt = miner.get("start_volt", "")
-
+        for miner in miners:
+            # Each tuner reads its settings from the shared, already-validated MinerConfig
             thread = threading.Thread(
-                target=monitor_and_adjust,
-                args=(ip, bitaxe_type, interval, self.log_message,
-                      min_freq, max_freq, min_volt, max_volt,
-                      max_temp, max_watts, start_freq, start_volt, max_vr_temp)
+                target=run_tuner,
+                args=(miner, self.log_message, new_stop_event()),
+                kwargs={"api_for": lambda ip: recording_api(ip, load_config())},
+                name=f"tuner-{miner.ip}"
             )
 
             thread.start()
             self.threads.append(thread)
 
-        # Ensure UI updates based on monitor interval
-        self.update_miner_display(interval)
-
         # Start a new thread that watches the time and resets all miners at the configured time
         threading.Thread(target=self.daily_reset_watcher, daemon=True).start()
 
@@ -841,45 +853,22 @@ class BitaxeAutotuningApp:
             self.tree.selection_set(selected_item)  # Select miner
             self.tree_menu.post(event.x_root, event.y_root)  # Show right-click menu
 
-    def update_miner_display(self, interval):
-        """Refresh miner status in the UI at the global monitor interval."""
-        if not self.running:
-            return
-
-        for ip, item in self.tree_items_by_ip.items():
+    def update_miner_display(self):
+        """Apply queued live readings to the table, then check again after gui_redraw_interval seconds.
 
-            miner_data = get_system_info(ip)
-            if isinstance(miner_data, str):
-                self.log_message(f"Error fetching miner data from {ip}: {miner_data}", "error")
-                continue
+        Readings that arrive in between are merged per miner, so a busy fleet costs one
+        batch of cell updates per interval. That keeps remote X11 sessions responsive.
+        """
+        for ip, changes in self.subscriber.drain(0).items():
+            self.table.update(ip, changes)
+        self.render_table()
 
-            # Extract real-time values
-            new_frequency = miner_data.get("frequency", "-")
-            new_voltage = miner_data.get("coreVoltage", "-")
-            new_temp = f"{miner_data.get('temp', '-')}°C"
-            new_vr_temp = f"{miner_data.get('vrTemp', '-')}°C"
-            new_hashrate = f"{float(miner_data.get('hashRate', 0)):.2f} GH/s"
-            new_power = f"{float(miner_data.get('power', 0)):.2f} W"
-
-            # Update UI
-            values = self.tree.item(item, "values")
-            updated_values = list(values)
-            updated_values[3] = new_frequency  # Applied Frequency
-            updated_values[4] = new_voltage  # Current Voltage
-            updated_values[5] = new_temp  # Current Temp
-            updated_values[6] = new_vr_temp
-            updated_values[7] = new_hashrate  # Current Hashrate
-            updated_values[8] = new_power  # Current Power Usage
-
-            self.tree.item(item, values=updated_values)
-
-        # schedule the next update based on monitor interval
-        config = load_config()
-        interval = config.get("monitor_interval", 5)
-        self.root.after(interval * 1000, self.update_miner_display, interval)
+        interval = load_config().get("gui_redraw_interval", 1)
+        self.root.after(int(interval * 1000), self.update_miner_display)
 
     def log_message(self, message, level="info"):
         """Logs messages to the UI, ensuring updates run on the main thread."""
+        logstore.record(message, level)
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         message = f"[{timestamp}] {message}"
     
@@ -1,22 +1,46 @@
+import json
+import mimetypes
 import os
 import sys
 import threading
 import webbrowser
 from datetime import datetime
 
-from flask import Flask, jsonify, render_template, request
+from flask import (Flask, Response, jsonify, render_template, request,
+                   send_file, stream_with_context)
 
-from autotune import (detect_miners, get_system_info, monitor_and_adjust,
-                      restart_bitaxe)
+import alerts
+import diagnostics
+import export
+import health
+import logstore
+import static_assets
+import telemetry
+from autotune import (detect_miners, get_system_info, load_scaling_table,
+                      restart_bitaxe, run_tuner)
+from autotune import new_stop_event
 from autotune import stop_autotuning as stop_autotune_logic
-from config import (add_miner, get_miners, load_config, remove_miner,
-                    save_config)
+from bulk import run_bulk, select_miners, validate_operation
+from calibration import run_calibration
+from config import (add_miner, get_miner_configs, get_miners, load_config,
+                    remove_miner, save_config, start_rediscovery)
+from efficiency import OBJECTIVE_MAX_HASHRATE
+from efficiency import get_report as get_efficiency_report
+from federation import get_fleet
+from fleet_engine import FleetTuner
+from paging import QUERY_KEYS, miner_rows, parse_query, query_rows
+from power_budget import get_group_status
+from replay import recording_api
+from sharding import ShardNode
 
 # --- Globals ---
-app = Flask(__name__)
+app = Flask(__name__, static_folder=None)  # Built assets are served by static_file() below
+app.jinja_env.globals['asset_url'] = static_assets.asset_url
 log_messages = []
 autotune_threads = []
 autotune_running = False
+shard_node = None
+stopping_shard_node = None  # A stopped shard node still waiting for its tuners to exit
 
 # --- Logging ---
 def log_message(message, level="info"):
@@ -24,23 +48,96 @@ def log_message(message, level="info"):
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     formatted_message = f"[{timestamp}] [{level.upper()}] {message}"
     print(formatted_message)  # Also print to console
+    logstore.record(message, level)
     log_messages.append(formatted_message)
     # Limit log size
     if len(log_messages) > 200:
         log_messages = log_messages[-200:]
 
+def init():
+    """Start the headless app's background services. Called by its entry points, not on import."""
+    logstore.configure(load_config())
+    health.set_log_callback(log_message)
+    alerts.start(log_message)
+    start_rediscovery(log_message)
+    telemetry.start_poller(get_system_info, lambda: list(get_miner_configs()),
+                           lambda: load_config().get("dashboard_poll_interval", 5))
+
+def create_app():
+    """WSGI app factory for gunicorn (`gunicorn "headless:create_app()"`)."""
+    init()
+    return app
+
 # --- API Routes ---
 @app.route('/')
 def index():
     return render_template('index.html')
 
+@app.route('/static/<path:filename>')
+def static_file(filename):
+    # Built names change with their content, so browsers may cache them forever
+    path, encoding = static_assets.resolve(filename, request.headers.get('Accept-Encoding', ''))
+    if path is None:
+        return jsonify({"message": "Not found."}), 404
+    response = send_file(path, mimetype=mimetypes.guess_type(filename)[0], conditional=True, etag=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
 @app.route('/api/logs', methods=['GET'])
 def get_logs():
     return jsonify(log_messages)
 
+def _parse_time(value):
+    """Epoch seconds or an ISO 8601 timestamp (local time if no offset is given)."""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+@app.route('/api/logs/query', methods=['GET'])
+def query_logs():
+    try:
+        since = _parse_time(request.args['since']) if request.args.get('since') else None
+        until = _parse_time(request.args['until']) if request.args.get('until') else None
+        limit = min(max(int(request.args.get('limit', 500)), 1), 10000)
+    except ValueError as e:
+        return jsonify({"message": f"Invalid query: {e}"}), 400
+    levels = [level.strip().lower() for level in request.args.get('level', '').split(',') if level.strip()]
+    records = logstore.query(ip=request.args.get('ip') or None, levels=levels or None,
+                             event=request.args.get('event') or None, since=since, until=until, limit=limit)
+    return jsonify({"records": records})
+
+@app.route('/api/alerts', methods=['GET'])
+def get_alerts():
+    return jsonify({"active": alerts.active(), "stats": alerts.stats()})
+
+@app.route('/api/history/export', methods=['GET'])
+def export_history():
+    try:
+        since = _parse_time(request.args['since']) if request.args.get('since') else None
+        until = _parse_time(request.args['until']) if request.args.get('until') else None
+        options = export.parse_options(request.args)
+    except ValueError as e:
+        return jsonify({"message": f"Invalid export: {e}"}), 400
+    media_type, extension = export.FORMATS[options['format']]
+    return Response(stream_with_context(export.stream(options, since, until)), mimetype=media_type,
+                    headers={'Content-Disposition': f'attachment; filename="bitaxe-history.{extension}"'})
+
 @app.route('/api/miners', methods=['GET'])
 def get_all_miners():
-    return jsonify(get_miners())
+    # Without query parameters this stays the plain config list that federation peers read
+    if not any(key in request.args for key in QUERY_KEYS):
+        return jsonify(get_miners())
+    try:
+        query = parse_query(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    rows = miner_rows(get_miner_configs().values(), telemetry.snapshot())
+    page, next_cursor, total = query_rows(rows, query)
+    return jsonify({"miners": page, "next_cursor": next_cursor, "total": total})
 
 @app.route('/api/miners', methods=['POST'])
 def add_new_miner():
@@ -56,6 +153,7 @@ def add_new_miner():
 @app.route('/api/miners/<string:ip>', methods=['DELETE'])
 def delete_miner_by_ip(ip):
     remove_miner(ip)
+    telemetry.forget(ip)
     log_message(f"Removed miner {ip}", "success")
     return jsonify({"message": "Miner removed."})
 
@@ -66,14 +164,15 @@ def save_miner_settings():
     
     existing_miners_map = {m['ip']: m for m in config.get('miners', [])}
     
-    updated_miners_list = []
+    # The dashboard only holds the rows it has paged in, so miners missing from the
+    # request are kept as they are; removal goes through DELETE /api/miners/<ip>.
+    updated_miners_list = list(config.get('miners', []))
     for miner_data in data:
         ip = miner_data.get('ip')
         if ip in existing_miners_map:
             existing_miner = existing_miners_map[ip]
             existing_miner['nickname'] = miner_data.get('nickname', existing_miner['nickname'])
             existing_miner['type'] = miner_data.get('type', existing_miner['type'])
-            updated_miners_list.append(existing_miner)
         else:
             updated_miners_list.append({
                 "nickname": miner_data.get('nickname'),
@@ -86,11 +185,31 @@ def save_miner_settings():
     log_message("Saved miner settings to config.json", "success")
     return jsonify({"message": "Settings saved."})
     
+@app.route('/api/stream', methods=['GET'])
+def stream_miner_updates():
+    """Server-sent events: a snapshot of every miner on connect, then only the fields that change."""
+    subscriber, current = telemetry.subscribe()
+
+    def events():
+        try:
+            yield f"event: snapshot\ndata: {json.dumps(current)}\n\n"
+            while True:
+                changes = subscriber.drain(timeout=15)
+                if changes:
+                    yield f"event: delta\ndata: {json.dumps(changes)}\n\n"
+                else:
+                    yield ": keepalive\n\n"
+        finally:
+            telemetry.unsubscribe(subscriber)
+
+    return Response(stream_with_context(events()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.route('/api/miner-info/<string:ip>', methods=['GET'])
 def get_miner_info(ip):
     info = get_system_info(ip)
     if isinstance(info, str):
-        return jsonify({"message": info}), 500
+        return jsonify({"message": info}), 503 if health.is_open(ip) else 500
     return jsonify(info)
 
 @app.route('/api/scan', methods=['POST'])
@@ -104,7 +223,7 @@ def scan_network():
         found_ips = detect_miners(start_ip, end_ip)
         log_message(f"Scan complete. Found {len(found_ips)} new miners.", "success")
 
-    threading.Thread(target=scan_task, daemon=True).start()
+    threading.Thread(target=scan_task, name="network-scan", daemon=True).start()
     return jsonify({"message": "Scan started in background."})
 
 @app.route('/api/settings', methods=['GET'])
@@ -118,51 +237,68 @@ def update_settings():
     log_message("Global and Autotuner settings updated.", "success")
     return jsonify({"message": "Settings updated."})
 
+def start_miner_tuner(miner, stop_event=None):
+    """Start a tuning thread for one MinerConfig. Returns the thread."""
+    stop_event = stop_event or new_stop_event()
+    thread = threading.Thread(
+        target=run_tuner,
+        args=(miner, log_message, stop_event),
+        kwargs={"api_for": lambda ip: recording_api(ip, load_config())},
+        name=f"tuner-{miner.ip}"
+    )
+    thread.daemon = True
+    thread.start()
+    return thread
+
 @app.route('/api/autotune/start', methods=['POST'])
 def start_autotuning():
-    global autotune_threads, autotune_running
+    global autotune_threads, autotune_running, shard_node
     if autotune_running:
         return jsonify({"message": "Autotuner is already running."}), 400
 
     config = load_config()
-    active_miners = [m for m in config.get("miners", []) if m.get("enabled")]
+    active_miners = [m for m in get_miner_configs().values() if m.enabled]
     if not active_miners:
         log_message("Start command received, but no miners are enabled for autotuning.", "warning")
         return jsonify({"message": "No miners enabled for autotuning."}), 404
 
-    log_message("Starting autotuning for enabled miners...", "success")
+    if config.get("sharding_enabled") and stopping_shard_node is not None and stopping_shard_node.is_alive():
+        return jsonify({"message": "The previous shard node is still stopping. Try again shortly."}), 400
+
     autotune_running = True
     autotune_threads.clear()
 
-    for miner in active_miners:
-        thread = threading.Thread(
-            target=monitor_and_adjust,
-            args=(
-                miner['ip'],
-                miner.get('type', 'Unknown'),
-                config.get('monitor_interval', 10),
-                log_message,
-                miner.get("min_freq"),
-                miner.get("max_freq"),
-                miner.get("min_volt"),
-                miner.get("max_volt"),
-                miner.get("max_temp"),
-                miner.get("max_watts"),
-                miner.get("start_freq"),
-                miner.get("start_volt"),
-                miner.get("max_vr_temp")
-            )
-        )
-        thread.daemon = True
+    if config.get("sharding_enabled"):
+        shard_node = ShardNode(start_miner_tuner, log_message)
+        log_message(f"Starting autotuning as shard node {shard_node.node_id}...", "success")
+        shard_node.start()
+        return jsonify({"message": "Autotuning started."})
+
+    log_message("Starting autotuning for enabled miners...", "success")
+    if config.get("fleet_engine_enabled") and config.get("share_tuning_enabled", True):
+        # The fleet tuner has no share back-off or share ceilings
+        log_message("Share-aware tuning is on, so every miner gets its own tuner. "
+                    "Set share_tuning_enabled to false to use the fleet tuner.", "warning")
+    elif config.get("fleet_engine_enabled"):
+        # Efficiency objectives and fan control need the per-miner tuner; everything else shares one batched tuner
+        fleet_miners = [m for m in active_miners
+                        if (m.objective or OBJECTIVE_MAX_HASHRATE) == OBJECTIVE_MAX_HASHRATE and m.max_fan is None]
+        active_miners = [m for m in active_miners if m not in fleet_miners]
+        thread = threading.Thread(target=FleetTuner(fleet_miners, log_message).run, name="fleet-tuner", daemon=True)
         thread.start()
         autotune_threads.append(thread)
+    for miner in active_miners:
+        autotune_threads.append(start_miner_tuner(miner))
 
     return jsonify({"message": "Autotuning started."})
 
 @app.route('/api/autotune/stop', methods=['POST'])
 def stop_autotuning():
-    global autotune_running
+    global autotune_running, shard_node, stopping_shard_node
     log_message("Stopping autotuning...", "warning")
+    if shard_node:
+        shard_node.stop()  # Returns at once; the node releases its leases as its tuners exit
+        stopping_shard_node, shard_node = shard_node, None
     stop_autotune_logic()
     autotune_running = False
     autotune_threads.clear()
@@ -181,3 +317,133 @@ def open_web_ui(ip):
     log_message(f"Opening web UI for miner at {url}", "info")
     webbrowser.open(url)
     return jsonify({"message": f"Attempted to open {url} in browser."})
+
+@app.route('/api/power-budgets', methods=['GET'])
+def get_power_budgets():
+    return jsonify(get_group_status())
+
+@app.route('/api/efficiency', methods=['GET'])
+def get_efficiency():
+    return jsonify(get_efficiency_report())
+
+@app.route('/api/calibration/run', methods=['POST'])
+def run_calibration_api():
+    log_message("Calibration fit started.", "info")
+
+    def calibration_task():
+        fitted = run_calibration(load_scaling_table(), log_message)
+        log_message(f"Calibration complete. Fitted {fitted} tier table(s).", "success")
+
+    threading.Thread(target=calibration_task, name="calibration", daemon=True).start()
+    return jsonify({"message": "Calibration started in background."})
+
+def _diagnostics_disabled():
+    if load_config().get("diagnostics_enabled", False):
+        return None
+    return jsonify({"message": "Diagnostics are disabled. Set diagnostics_enabled to true in config.json."}), 404
+
+@app.route('/api/diagnostics/profile', methods=['GET'])
+def profile_diagnostics():
+    disabled = _diagnostics_disabled()
+    if disabled:
+        return disabled
+    try:
+        seconds = float(request.args.get('seconds', 10))
+        interval = max(float(request.args.get('interval', 0.01)), 0.001)
+    except ValueError:
+        return jsonify({"message": "seconds and interval must be numbers."}), 400
+    try:
+        stacks = diagnostics.profile(seconds, interval)
+    except RuntimeError as e:
+        return jsonify({"message": str(e)}), 409
+    return Response(stacks, mimetype='text/plain')
+
+@app.route('/api/diagnostics/memory', methods=['GET', 'POST', 'DELETE'])
+def memory_diagnostics():
+    disabled = _diagnostics_disabled()
+    if disabled:
+        return disabled
+    if request.method == 'DELETE':
+        diagnostics.stop_memory_tracing()
+        return jsonify({"message": "Memory tracing stopped."})
+    if request.method == 'POST':
+        try:
+            frames = min(max(int(request.args.get('frames', 10)), 1), 100)
+        except ValueError:
+            return jsonify({"message": "frames must be an integer."}), 400
+        if not diagnostics.start_memory_tracing(frames):
+            return jsonify({"message": "Memory tracing is already running."}), 409
+        return jsonify({"message": "Memory tracing started."})
+    try:
+        top = int(request.args.get('top', 20))
+    except ValueError:
+        return jsonify({"message": "top must be an integer."}), 400
+    return jsonify(diagnostics.memory_snapshot(top))
+
+@app.route('/api/diagnostics/threads', methods=['GET'])
+def thread_diagnostics():
+    disabled = _diagnostics_disabled()
+    if disabled:
+        return disabled
+    try:
+        window = min(max(float(request.args.get('window', 0)), 0), 60)
+    except ValueError:
+        return jsonify({"message": "window must be a number."}), 400
+    return jsonify(diagnostics.thread_cpu(window))
+
+@app.route('/api/health', methods=['GET'])
+def get_miner_health():
+    return jsonify(health.get_health())
+
+@app.route('/api/shards', methods=['GET'])
+def get_shard_status():
+    if not shard_node:
+        return jsonify({"message": "Sharding is not active."}), 404
+    return jsonify(shard_node.status())
+
+@app.route('/fleet')
+def fleet_overview():
+    return render_template('fleet.html')
+
+@app.route('/api/fleet', methods=['GET'])
+def get_fleet_view():
+    if not any(key in request.args for key in QUERY_KEYS):
+        return jsonify(get_fleet(load_config()))
+    try:
+        query = parse_query(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    fleet = get_fleet(load_config())
+    fleet["miners"], fleet["next_cursor"], fleet["total"] = query_rows(fleet["miners"], query)
+    return jsonify(fleet)
+
+@app.route('/api/bulk', methods=['POST'])
+def bulk_apply():
+    data = request.json or {}
+    operation = data.get('operation', {})
+    error = validate_operation(operation)
+    if error:
+        return jsonify({"message": error}), 400
+
+    miners = select_miners(get_miners(), data.get('selector', {}))
+    if not miners:
+        return jsonify({"message": "Selector matched no miners."}), 404
+
+    dry_run = bool(data.get('dry_run'))
+    try:
+        max_workers = min(int(data.get('max_workers', 8)), load_config().get('bulk_max_workers', 16))
+    except (TypeError, ValueError):
+        return jsonify({"message": "max_workers must be an integer."}), 400
+    log_message(f"Bulk {operation['op']} on {len(miners)} miners{' (dry run)' if dry_run else ''}.", "info")
+
+    def generate():
+        for result in run_bulk(miners, operation, dry_run=dry_run, max_workers=max_workers,
+                               force=bool(data.get('force'))):
+            if "summary" in result:
+                summary = result["summary"]
+                log_message(f"Bulk {operation['op']} finished: {summary['succeeded']} ok, "
+                            f"{summary['failed']} failed, {summary['skipped']} skipped.",
+                            "warning" if summary['failed'] else "success")
+            yield json.dumps(result) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
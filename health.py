@@ -0,0 +1,132 @@
+import threading
+import time
+
+from config import load_config
+
+HEALTHY = "healthy"
+DEGRADED = "degraded"
+OPEN = "open"
+
+_lock = threading.Lock()
+_miners = {}
+_log_callback = None
+_settings_cache = {"loaded_at": 0, "values": None}
+
+
+def set_log_callback(callback):
+    """Route health state-change messages to the GUI or headless log."""
+    global _log_callback
+    _log_callback = callback
+
+
+def _log(message, level):
+    if _log_callback:
+        _log_callback(message, level)
+    else:
+        print(message)
+
+
+def _settings():
+    """Circuit settings from config.json, re-read at most every 5 seconds."""
+    if time.time() - _settings_cache["loaded_at"] > 5:
+        config = load_config()
+        _settings_cache["values"] = (config.get("circuit_failure_threshold", 3),
+                                     config.get("circuit_backoff_base", 10),
+                                     config.get("circuit_backoff_max", 300),
+                                     config.get("circuit_probe_timeout", 2))
+        _settings_cache["loaded_at"] = time.time()
+    return _settings_cache["values"]
+
+
+def _entry(bitaxe_ip):
+    return _miners.setdefault(bitaxe_ip, {
+        "state": HEALTHY,
+        "failures": 0,
+        "backoff": 0,
+        "retry_at": 0,
+        "probing": False,
+        "last_error": None,
+        "changed_at": time.time(),
+    })
+
+
+def _transition(entry, state, message, level):
+    """Move to a new state. Returns the (message, level) to log, or None if unchanged."""
+    if entry["state"] == state:
+        return None
+    entry["state"] = state
+    entry["changed_at"] = time.time()
+    return message, level
+
+
+def before_request(bitaxe_ip, timeout):
+    """Decide whether a request to the miner may go out, and with what timeout.
+
+    Returns None while the circuit is open and its retry time has not come yet, so
+    callers can fail fast. Once it is due, a single caller gets through as a probe
+    with the short probe timeout.
+    """
+    _, _, _, probe_timeout = _settings()
+    with _lock:
+        entry = _entry(bitaxe_ip)
+        if entry["state"] != OPEN:
+            return timeout
+        if entry["probing"] or time.time() < entry["retry_at"]:
+            return None
+        entry["probing"] = True
+        return min(timeout, probe_timeout)
+
+
+def record_success(bitaxe_ip):
+    with _lock:
+        entry = _entry(bitaxe_ip)
+        entry["failures"] = 0
+        entry["backoff"] = 0
+        entry["probing"] = False
+        entry["last_error"] = None
+        change = _transition(entry, HEALTHY, f"{bitaxe_ip} -> Miner is reachable again.", "success")
+    if change:
+        _log(*change)
+
+
+def record_failure(bitaxe_ip, error):
+    threshold, backoff_base, backoff_max, _ = _settings()
+    with _lock:
+        entry = _entry(bitaxe_ip)
+        entry["failures"] += 1
+        entry["probing"] = False
+        entry["last_error"] = str(error)
+
+        if entry["state"] == OPEN or entry["failures"] >= threshold:
+            entry["backoff"] = min(entry["backoff"] * 2, backoff_max) if entry["backoff"] else backoff_base
+            entry["retry_at"] = time.time() + entry["backoff"]
+            change = _transition(entry, OPEN,
+                        f"{bitaxe_ip} -> Miner unreachable after {entry['failures']} attempts. "
+                        f"Pausing requests and retrying with backoff. Last error: {error}", "error")
+        else:
+            change = _transition(entry, DEGRADED, f"{bitaxe_ip} -> Miner request failed: {error}", "warning")
+    if change:
+        _log(*change)
+
+
+def abandon_probe(bitaxe_ip):
+    """Release a request that ended without an outcome, e.g. one cancelled mid-flight.
+
+    If it was the probe, the next due request probes instead of the circuit staying
+    half-open for good.
+    """
+    with _lock:
+        if bitaxe_ip in _miners:
+            _miners[bitaxe_ip]["probing"] = False
+
+
+def is_open(bitaxe_ip):
+    with _lock:
+        return bitaxe_ip in _miners and _miners[bitaxe_ip]["state"] == OPEN
+
+
+def get_health():
+    """Return a snapshot of every tracked miner's health state."""
+    with _lock:
+        return {ip: {key: entry[key] for key in ("state", "failures", "retry_at", "last_error", "changed_at")}
+                for ip, entry in _miners.items()}
@@ -0,0 +1,324 @@
+import gzip
+import heapq
+import json
+import os
+import queue
+import re
+import threading
+import time
+
+LOGS_DIR = "logs"
+INDEX_FILE = "index.json"
+ACTIVE_FILE = "active.jsonl"
+SAMPLES_DIR = "samples"   # Telemetry samples, kept in their own segments under the log directory
+SAMPLE_EVENT = "sample"
+LEVELS = ("info", "success", "warning", "error")
+
+_IP_PREFIX = re.compile(r"^(\S+) -> ")
+
+_store = None
+_sample_store = None
+_store_lock = threading.Lock()
+
+
+class LogLine(str):
+    """A log message that also carries structured data for the log store.
+
+    It is an ordinary string to every log callback, so callbacks that only display
+    text need no changes.
+    """
+
+    def __new__(cls, message, event, bitaxe_ip=None, **fields):
+        line = super().__new__(cls, message)
+        line.event = event
+        line.ip = bitaxe_ip
+        line.fields = fields
+        return line
+
+
+def line(message, event, bitaxe_ip=None, **fields):
+    """Tag a log message with an event type, the miner IP and numeric fields."""
+    return LogLine(message, event, bitaxe_ip, **fields)
+
+
+def _to_record(message, level, ts):
+    record = {"ts": round(ts, 3), "level": level.lower(), "ip": getattr(message, "ip", None),
+              "event": getattr(message, "event", "log"), "message": str(message)}
+    if record["ip"] is None:
+        match = _IP_PREFIX.match(record["message"])
+        record["ip"] = match.group(1) if match else None
+    fields = getattr(message, "fields", None)
+    if fields:
+        record["fields"] = fields
+    return record
+
+
+class LogStore:
+    """Append-only JSONL log files with a small index, written by one background thread.
+
+    Records go to active.jsonl. When it reaches segment_bytes it is gzipped into a
+    numbered segment and its time range, miner IPs, levels and events are added to
+    index.json. Queries use the index to skip segments that cannot match, so they
+    only read the files that cover the requested miners and time range. Only the
+    newest max_segments segments are kept.
+    """
+
+    def __init__(self, directory=LOGS_DIR, segment_bytes=5_000_000, max_segments=50, queue_size=10000):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()  # Guards the index and the active file
+        self._index = self._load_index()
+        self._file = None
+        self._active = None
+
+        # A previous run's active file becomes a segment so its records stay indexed
+        active_path = os.path.join(directory, ACTIVE_FILE)
+        if os.path.exists(active_path) and os.path.getsize(active_path) > 0:
+            self._active = self._empty_meta()
+            for record in _read_lines(active_path):
+                self._note(record, 0)
+            if self._active["records"]:
+                self._rotate()
+        self._open_active()
+        threading.Thread(target=self._run, name="log-writer", daemon=True).start()
+
+    @staticmethod
+    def _empty_meta():
+        return {"start": None, "end": None, "records": 0, "bytes": 0, "ips": set(), "levels": set(), "events": set()}
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def _save_index(self):
+        path = os.path.join(self.directory, INDEX_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump(self._index, f)
+        os.replace(path + ".tmp", path)
+
+    def _open_active(self):
+        self._file = open(os.path.join(self.directory, ACTIVE_FILE), "w", encoding="utf-8")
+        self._active = self._empty_meta()
+
+    def _note(self, record, size):
+        meta = self._active
+        if meta["start"] is None:
+            meta["start"] = record["ts"]
+        meta["end"] = record["ts"]
+        meta["records"] += 1
+        meta["bytes"] += size
+        if record.get("ip"):
+            meta["ips"].add(record["ip"])
+        meta["levels"].add(record["level"])
+        meta["events"].add(record["event"])
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        meta = self._active
+        sequence = self._index[-1]["sequence"] + 1 if self._index else 1
+        name = f"segment-{sequence:06d}.jsonl.gz"
+        active_path = os.path.join(self.directory, ACTIVE_FILE)
+        with open(active_path, "rb") as src, gzip.open(os.path.join(self.directory, name), "wb") as dst:
+            dst.writelines(src)
+        self._index.append({"file": name, "sequence": sequence, "start": meta["start"], "end": meta["end"],
+                            "records": meta["records"], "ips": sorted(meta["ips"]),
+                            "levels": sorted(meta["levels"]), "events": sorted(meta["events"])})
+        for old in self._index[:-self.max_segments]:
+            try:
+                os.remove(os.path.join(self.directory, old["file"]))
+            except OSError:
+                pass
+        del self._index[:-self.max_segments]
+        self._save_index()
+        os.remove(active_path)
+
+    def append(self, record):
+        """Queue a record for writing. Never blocks; records are dropped if the writer falls far behind."""
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 500:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with self._lock:
+                    for record in batch:
+                        text = json.dumps(record, separators=(",", ":")) + "\n"
+                        self._file.write(text)
+                        self._note(record, len(text))
+                    self._file.flush()
+                    if self._active["bytes"] >= self.segment_bytes:
+                        self._rotate()
+                        self._open_active()
+            except OSError as e:
+                print(f"Log store -> Error writing {self.directory}: {e}")
+
+    @staticmethod
+    def _could_match(meta, ip, levels, event, since, until):
+        if meta["start"] is None:
+            return False
+        if since is not None and meta["end"] < since or until is not None and meta["start"] > until:
+            return False
+        if ip is not None and ip not in meta["ips"]:
+            return False
+        if levels and not set(levels) & set(meta["levels"]):
+            return False
+        return event is None or event in meta["events"]
+
+    def query(self, ip=None, levels=None, event=None, since=None, until=None, limit=1000):
+        """The newest matching records, oldest first, at most limit of them."""
+        def matches(record):
+            return ((ip is None or record.get("ip") == ip)
+                    and (not levels or record.get("level") in levels)
+                    and (event is None or record.get("event") == event)
+                    and (since is None or record["ts"] >= since)
+                    and (until is None or record["ts"] <= until))
+
+        with self._lock:
+            sources = [os.path.join(self.directory, meta["file"]) for meta in self._index
+                       if self._could_match(meta, ip, levels, event, since, until)]
+            active = [record for record in _read_lines(os.path.join(self.directory, ACTIVE_FILE))
+                      if matches(record)] if self._could_match(self._active, ip, levels, event, since, until) else []
+
+        # Newest segments first, stopping once enough records are found
+        found = active[-limit:]
+        for path in reversed(sources):
+            if len(found) >= limit:
+                break
+            try:
+                older = [record for record in _read_lines(path) if matches(record)]
+            except OSError:
+                continue  # Pruned since the index was read
+            found = older[-(limit - len(found)):] + found
+        return found
+
+    def scan(self, ips=None, events=None, since=None, until=None):
+        """Yield matching records oldest first, reading one segment at a time.
+
+        Unlike query, memory use does not grow with the time range: only the line
+        being parsed and a copy of the active file are held. The lock is only taken
+        to list the segments and copy the active file, so writers are never held up
+        while the records are consumed.
+        """
+        ips = set(ips) if ips else None
+        events = set(events) if events else None
+
+        def could_match(meta):
+            return (meta["start"] is not None
+                    and (since is None or meta["end"] >= since) and (until is None or meta["start"] <= until)
+                    and (ips is None or not ips.isdisjoint(meta["ips"]))
+                    and (events is None or not events.isdisjoint(meta["events"])))
+
+        def matches(record):
+            return ((ips is None or record.get("ip") in ips)
+                    and (events is None or record.get("event") in events)
+                    and (since is None or record["ts"] >= since)
+                    and (until is None or record["ts"] <= until))
+
+        with self._lock:
+            sources = [os.path.join(self.directory, meta["file"]) for meta in self._index if could_match(meta)]
+            active = b""
+            if could_match(self._active):
+                with open(os.path.join(self.directory, ACTIVE_FILE), "rb") as f:
+                    active = f.read()
+
+        for path in sources:
+            try:
+                for record in _iter_lines(path):
+                    if matches(record):
+                        yield record
+            except OSError:
+                continue  # Pruned since the index was read
+        for record in _parse_lines(active.decode("utf-8").splitlines()):
+            if matches(record):
+                yield record
+
+    def stats(self):
+        with self._lock:
+            return {"segments": len(self._index), "active_records": self._active["records"],
+                    "queued": self._queue.qsize(), "dropped": self.dropped}
+
+
+def _parse_lines(lines):
+    for text in lines:
+        try:
+            yield json.loads(text)
+        except ValueError:
+            continue  # Partial line from a crash
+
+
+def _iter_lines(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        yield from _parse_lines(f)
+
+
+def _read_lines(path):
+    return list(_iter_lines(path))
+
+
+def configure(config):
+    """Start the log store once per process when log_store_enabled is set (the default).
+
+    Telemetry samples outnumber every other event by far, so they go to a second
+    store under samples/ with its own retention (sample_segment_bytes,
+    sample_max_segments). Other log lines are not pushed out by a large fleet's samples.
+    """
+    global _store, _sample_store
+    with _store_lock:
+        if _store is None and config.get("log_store_enabled", True):
+            directory = config.get("log_store_dir", LOGS_DIR)
+            _store = LogStore(directory,
+                              segment_bytes=config.get("log_segment_bytes", 5_000_000),
+                              max_segments=config.get("log_max_segments", 50))
+            _sample_store = LogStore(os.path.join(directory, SAMPLES_DIR),
+                                     segment_bytes=config.get("sample_segment_bytes", 20_000_000),
+                                     max_segments=config.get("sample_max_segments", 500))
+        return _store
+
+
+def record(message, level="info", ts=None):
+    """Store a log message. A LogLine keeps its event and fields; plain strings are stored as event "log"."""
+    store = _sample_store if getattr(message, "event", None) == SAMPLE_EVENT else _store
+    if store is not None:
+        store.append(_to_record(message, level, time.time() if ts is None else ts))
+
+
+def _stores(events):
+    """The configured stores that can hold records of these events (None for any)."""
+    stores = [_store]
+    if events is None or SAMPLE_EVENT in events:
+        stores.append(_sample_store)
+    return [store for store in stores if store is not None]
+
+
+def query(**filters):
+    """Run LogStore.query on the configured stores; empty when the store is disabled."""
+    event = filters.get("event")
+    found = []
+    for store in _stores(None if event is None else (event,)):
+        found.extend(store.query(**filters))
+    found.sort(key=lambda record: record["ts"])
+    return found[-filters.get("limit", 1000):]
+
+
+def scan(**filters):
+    """Run LogStore.scan on the configured stores, merged oldest first; empty when the store is disabled."""
+    return heapq.merge(*(store.scan(**filters) for store in _stores(filters.get("events"))),
+                       key=lambda record: record["ts"])
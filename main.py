@@ -1,5 +1,5 @@
 from gui import BitaxeAutotuningApp
-from headless import app
+from headless import app, init
 import sys
 
 
@@ -8,7 +8,13 @@ if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1].lower() == 'headless':
         # Run the Flask web server when specified
         print("Starting Flask web server in headless mode...")
+        init()
         app.run(host='0.0.0.0', port=5000)
+    elif len(sys.argv) > 1 and sys.argv[1].lower() == 'headless-async':
+        # Serve the same routes from an ASGI server; miner-bound requests don't hold a worker thread
+        import uvicorn
+        print("Starting ASGI web server in async headless mode...")
+        uvicorn.run("asgi:app", host='0.0.0.0', port=5000)
     else:
         # Run the desktop autotuning app by default
         try:
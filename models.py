@@ -0,0 +1,111 @@
+NUMERIC_FIELDS = ("min_freq", "max_freq", "start_freq", "min_volt", "max_volt", "start_volt",
+                  "max_temp", "max_watts", "max_vr_temp", "max_jth", "min_fan", "max_fan")
+REQUIRED_FIELDS = ("min_freq", "max_freq", "min_volt", "max_volt", "max_temp", "max_watts")
+
+
+def _number(value):
+    """Parse a numeric setting. "" and None mean unset; whole numbers come back as int."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        raise ValueError(value)
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+
+class MinerConfig:
+    """One miner's settings from config.json, parsed and validated once.
+
+    Shared by the tuner, the GUI and the Flask routes. Unset numeric fields are None.
+    """
+
+    __slots__ = ("ip", "nickname", "type", "enabled", "group", "objective", "mac", "hostname", "tags",
+                 "min_freq", "max_freq", "start_freq", "min_volt", "max_volt", "start_volt",
+                 "max_temp", "max_watts", "max_vr_temp", "max_jth", "min_fan", "max_fan")
+
+    def __init__(self, ip, nickname="", type="Unknown", enabled=False, group=None, objective=None,
+                 mac="", hostname="", tags=(), **settings):
+        self.ip = ip
+        self.nickname = nickname
+        self.type = type
+        self.enabled = enabled
+        self.group = group
+        self.objective = objective
+        self.mac = mac
+        self.hostname = hostname
+        self.tags = tuple(tags)
+        for field in NUMERIC_FIELDS:
+            setattr(self, field, settings.get(field))
+
+    @classmethod
+    def from_dict(cls, miner):
+        """Parse a config.json miner entry. Raises ValueError naming the first bad field."""
+        ip = miner.get("ip")
+        if not ip:
+            raise ValueError("miner entry without an IP address")
+        settings = {}
+        for field in NUMERIC_FIELDS:
+            try:
+                settings[field] = _number(miner.get(field))
+            except (TypeError, ValueError):
+                raise ValueError(f"{ip} -> Invalid {field}: {miner.get(field)!r}")
+        for field in ("min_fan", "max_fan"):
+            if settings[field] is not None and not 0 <= settings[field] <= 100:
+                raise ValueError(f"{ip} -> Invalid {field}: {miner.get(field)!r} (percent, 0-100)")
+        return cls(ip, nickname=miner.get("nickname") or "", type=miner.get("type") or "Unknown",
+                   enabled=bool(miner.get("enabled", False)), group=miner.get("group") or None,
+                   objective=miner.get("objective") or None, mac=miner.get("mac") or "",
+                   hostname=miner.get("hostname") or "", tags=miner.get("tags") or (), **settings)
+
+    def missing_fields(self):
+        """Required AutoTuner settings that are not set."""
+        return [field for field in REQUIRED_FIELDS if getattr(self, field) is None]
+
+    def get(self, key, default=None):
+        """Dict-style access, for code shared with plain config.json entries."""
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def to_dict(self):
+        miner = {slot: getattr(self, slot) for slot in self.__slots__}
+        miner["tags"] = list(self.tags)
+        return miner
+
+    def __repr__(self):
+        return f"MinerConfig({self.ip!r})"
+
+
+class MinerState:
+    """What the tuner currently wants applied to a miner and when it last changed it."""
+
+    __slots__ = ("voltage", "frequency", "fan", "last_tune_time", "last_config_refresh")
+
+    def __init__(self, voltage, frequency):
+        self.voltage = voltage
+        self.frequency = frequency
+        self.fan = None  # Fan percentage the tuner holds, or None while the miner's auto fan is in charge
+        self.last_tune_time = 0
+        self.last_config_refresh = 0
+
+
+class Sample:
+    """The /api/system/info fields the tuner reads, pulled out of the response once per poll."""
+
+    __slots__ = ("temp", "vr_temp", "hashrate", "power", "frequency", "core_voltage",
+                 "small_core_count", "asic_count")
+
+    def __init__(self, temp, vr_temp, hashrate, power, frequency, core_voltage, small_core_count, asic_count):
+        self.temp = temp
+        self.vr_temp = vr_temp
+        self.hashrate = hashrate
+        self.power = power
+        self.frequency = frequency
+        self.core_voltage = core_voltage
+        self.small_core_count = small_core_count
+        self.asic_count = asic_count
+
+    @classmethod
+    def from_info(cls, info):
+        return cls(info.get("temp", 0), info.get("vrTemp", 0), info.get("hashRate", 0), info.get("power", 0),
+                   info.get("frequency"), info.get("coreVoltage"),
+                   info.get("smallCoreCount", 0), info.get("asicCount", 0))
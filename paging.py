@@ -0,0 +1,141 @@
+import base64
+import json
+
+from efficiency import joules_per_th
+
+# Sort names accepted by the list endpoints, mapped to row fields
+SORT_FIELDS = {
+    "nickname": "nickname", "ip": "ip", "type": "type", "group": "group",
+    "frequency": "frequency", "voltage": "coreVoltage", "temp": "temp", "vrtemp": "vrTemp",
+    "hashrate": "hashRate", "power": "power", "efficiency": "jth",
+}
+STATUSES = ("online", "offline", "unknown")
+MAX_LIMIT = 1000
+QUERY_KEYS = ("limit", "cursor", "sort", "status", "group", "model")
+
+LIVE_FIELDS = ("frequency", "coreVoltage", "temp", "vrTemp", "hashRate", "power", "ASICModel")
+
+
+def miner_rows(miners, live):
+    """One row per configured miner: its config fields plus the latest telemetry from live."""
+    rows = []
+    for miner in miners:
+        reading = live.get(miner.ip, {})
+        row = {"ip": miner.ip, "nickname": miner.nickname, "type": miner.type, "group": miner.group,
+               "enabled": miner.enabled, "online": reading.get("online")}
+        for field in LIVE_FIELDS:
+            row[field] = reading.get(field)
+        row["jth"] = joules_per_th(row["power"] or 0, row["hashRate"]) if row["online"] else None
+        rows.append(row)
+    return rows
+
+
+def status(row):
+    online = row.get("online")
+    return "unknown" if online is None else ("online" if online else "offline")
+
+
+def _sort_value(row, field):
+    value = row.get(field)
+    if isinstance(value, str):
+        return value.lower()
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None if value is None else str(value).lower()
+    return value
+
+
+def encode_cursor(value, ip):
+    return base64.urlsafe_b64encode(json.dumps([value, ip]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        value, ip = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor.")
+    return value, ip
+
+
+def parse_query(args):
+    """Validate list query parameters from a request. Raises ValueError with a message for the client."""
+    sort = args.get("sort") or "ip"
+    descending = sort.startswith("-")
+    name = sort.lstrip("-").lower()
+    if name not in SORT_FIELDS:
+        raise ValueError(f"Unknown sort '{name}'. Expected one of: {', '.join(SORT_FIELDS)}.")
+    state = (args.get("status") or "").lower() or None
+    if state is not None and state not in STATUSES:
+        raise ValueError(f"Unknown status '{state}'. Expected one of: {', '.join(STATUSES)}.")
+    limit = args.get("limit")
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError("limit must be an integer.")
+        if not 1 <= limit <= MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {MAX_LIMIT}.")
+    cursor = args.get("cursor")
+    return {
+        "field": SORT_FIELDS[name], "descending": descending, "status": state,
+        "group": args.get("group") or None, "model": (args.get("model") or "").lower() or None,
+        "limit": limit, "after": decode_cursor(cursor) if cursor else None,
+    }
+
+
+def _matches(row, query):
+    if query["status"] and status(row) != query["status"]:
+        return False
+    if query["group"] and row.get("group") != query["group"] and row.get("site") != query["group"]:
+        return False
+    if query["model"]:
+        models = {(row.get("type") or "").lower(), (row.get("ASICModel") or "").lower()}
+        if query["model"] not in models:
+            return False
+    return True
+
+
+def _after(value, ip, cursor, descending):
+    """Whether a row sorting at (value, ip) comes after the cursor. Rows without a value sort last."""
+    cursor_value, cursor_ip = cursor
+    if value is None or cursor_value is None:
+        if cursor_value is None:
+            return value is None and ip > cursor_ip
+        return True
+    if value == cursor_value:
+        return ip > cursor_ip
+    return value < cursor_value if descending else value > cursor_value
+
+
+def query_rows(rows, query):
+    """Filter, sort and page rows. Returns (page, next_cursor, total matching rows).
+
+    Paging is keyset-based: the cursor holds the sort value and IP of the last row
+    returned, so miners added, removed or re-sorted between requests do not shift
+    later pages. Ties sort by IP; rows with no value for the sort field come last
+    in either direction.
+    """
+    field, descending = query["field"], query["descending"]
+    keyed = [(_sort_value(row, field), row) for row in rows if _matches(row, query)]
+    total = len(keyed)
+
+    present = [item for item in keyed if item[0] is not None]
+    missing = [item for item in keyed if item[0] is None]
+    # Stable sorts: order by IP first so equal values stay in ascending IP order
+    present.sort(key=lambda item: item[1]["ip"])
+    present.sort(key=lambda item: item[0], reverse=descending)
+    missing.sort(key=lambda item: item[1]["ip"])
+    ordered = present + missing
+
+    if query["after"] is not None:
+        try:
+            ordered = [item for item in ordered if _after(item[0], item[1]["ip"], query["after"], descending)]
+        except TypeError:
+            raise ValueError("Invalid cursor.")
+
+    limit = query["limit"] or len(ordered)
+    page = ordered[:limit]
+    next_cursor = None
+    if len(ordered) > limit:
+        value, row = page[-1]
+        next_cursor = encode_cursor(value, row["ip"])
+    return [row for _, row in page], next_cursor, total
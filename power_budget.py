@@ -0,0 +1,182 @@
+import threading
+import time
+
+from config import load_config
+
+# Latest readings reported by each tuner thread, keyed by miner IP
+_lock = threading.Lock()
+_readings = {}
+_allocations = {}
+_last_rebalance = {}
+
+
+def estimate_power(freq, volt, ref_freq, ref_volt, ref_power):
+    """Estimate power draw at freq/volt by scaling an observed reading (P ~ f * V^2)."""
+    if not ref_freq or not ref_volt or not ref_power:
+        return 0
+    return ref_power * (freq / ref_freq) * (volt / ref_volt) ** 2
+
+
+def estimate_hashrate(freq, ref_freq, ref_hashrate, tier):
+    """Estimate hashrate at freq from the observed hashrate, falling back to the tier target."""
+    if ref_freq and ref_hashrate:
+        return ref_hashrate * (freq / ref_freq)
+    return tier.get("target_hashrate", 0)
+
+
+def _candidate_tiers(reading):
+    """Tiers from the scaling table that fall inside the miner's AutoTuner frequency range."""
+    return [t for t in reading["tiers"]
+            if reading["min_freq"] <= t["frequency_(mhz)"] <= reading["max_freq"]]
+
+
+def _tier_index(tiers, freq):
+    """Index of the highest tier at or below freq."""
+    idx = 0
+    for i, tier in enumerate(tiers):
+        if tier["frequency_(mhz)"] <= freq:
+            idx = i
+    return idx
+
+
+def _predict(reading, tier):
+    """Predicted (power, hashrate) of a miner if moved to the given tier."""
+    freq, volt = tier["frequency_(mhz)"], tier["voltage"]
+    power = estimate_power(freq, volt, reading["frequency"], reading["voltage"], reading["power"])
+    hashrate = estimate_hashrate(freq, reading["frequency"], reading["hashrate"], tier)
+    return power, hashrate
+
+
+def report_reading(bitaxe_ip, config, group, tier_list, frequency, voltage, power, hashrate, min_freq, max_freq,
+                   now=None):
+    """Record a miner's latest reading and rebalance its group's budget if one is due."""
+    budget = config.get("power_budgets", {}).get(group) if group else None
+    if not budget or not tier_list:
+        forget_miner(bitaxe_ip)
+        return
+
+    now = time.time() if now is None else now
+    with _lock:
+        _readings[bitaxe_ip] = {
+            "group": group,
+            "tiers": tier_list,
+            "frequency": frequency,
+            "voltage": voltage,
+            "power": power,
+            "hashrate": hashrate,
+            "min_freq": min_freq,
+            "max_freq": max_freq,
+            "timestamp": now,
+        }
+
+        rebalance_interval = config.get("power_budget_rebalance_interval", 30)
+        if now - _last_rebalance.get(group, 0) >= rebalance_interval:
+            _rebalance(group, budget, config.get("power_budget_max_moves", 2), rebalance_interval * 3, now)
+            _last_rebalance[group] = now
+
+
+def _rebalance(group, budget, max_moves, stale_after, now):
+    """Incrementally move group members between tiers to maximize hashrate under the budget.
+
+    Starts from the previous allocation and makes at most max_moves single-tier steps,
+    so each call is a cheap correction rather than a full re-solve. Miners whose readings
+    have gone stale keep their last observed power as a fixed load.
+    """
+    members = {}
+    fixed_load = 0
+    for ip, reading in _readings.items():
+        if reading["group"] != group:
+            continue
+        tiers = _candidate_tiers(reading)
+        if now - reading["timestamp"] > stale_after or not tiers:
+            fixed_load += reading["power"]
+            continue
+        start_freq = _allocations.get(ip, reading["frequency"])
+        members[ip] = (reading, tiers, _tier_index(tiers, start_freq))
+
+    if not members:
+        return
+
+    allocation = {ip: idx for ip, (_, _, idx) in members.items()}
+
+    def total_power():
+        return fixed_load + sum(_predict(members[ip][0], members[ip][1][idx])[0]
+                                for ip, idx in allocation.items())
+
+    moves = 0
+    # Shed load where it costs the least hashrate per watt saved
+    while moves < max_moves and total_power() > budget:
+        best_ip, best_ratio = None, None
+        for ip, idx in allocation.items():
+            if idx == 0:
+                continue
+            reading, tiers, _ = members[ip]
+            power_now, hash_now = _predict(reading, tiers[idx])
+            power_down, hash_down = _predict(reading, tiers[idx - 1])
+            saved = power_now - power_down
+            if saved <= 0:
+                continue
+            ratio = (hash_now - hash_down) / saved
+            if best_ratio is None or ratio < best_ratio:
+                best_ip, best_ratio = ip, ratio
+        if best_ip is None:
+            break
+        allocation[best_ip] -= 1
+        moves += 1
+
+    # Spend headroom where it buys the most hashrate per extra watt
+    while moves < max_moves:
+        headroom = budget - total_power()
+        best_ip, best_ratio = None, None
+        for ip, idx in allocation.items():
+            reading, tiers, _ = members[ip]
+            if idx + 1 >= len(tiers):
+                continue
+            power_now, hash_now = _predict(reading, tiers[idx])
+            power_up, hash_up = _predict(reading, tiers[idx + 1])
+            extra = power_up - power_now
+            if extra > headroom:
+                continue
+            ratio = (hash_up - hash_now) / extra if extra > 0 else float("inf")
+            if best_ratio is None or ratio > best_ratio:
+                best_ip, best_ratio = ip, ratio
+        if best_ip is None:
+            break
+        allocation[best_ip] += 1
+        moves += 1
+
+    for ip, idx in allocation.items():
+        _allocations[ip] = members[ip][1][idx]["frequency_(mhz)"]
+
+
+def get_frequency_cap(bitaxe_ip):
+    """Return the frequency (MHz) allocated to a miner by its group budget, or None if uncapped."""
+    with _lock:
+        return _allocations.get(bitaxe_ip)
+
+
+def get_group_status():
+    """Return per-group budget usage for display: budget, observed power, and allocations."""
+    config = load_config()
+    budgets = config.get("power_budgets", {})
+    status = {}
+    with _lock:
+        for ip, reading in _readings.items():
+            group = reading["group"]
+            entry = status.setdefault(group, {"budget": budgets.get(group), "power": 0, "allocations": {}})
+            entry["power"] += reading["power"]
+            entry["allocations"][ip] = _allocations.get(ip)
+    return status
+
+
+def forget_miner(bitaxe_ip):
+    """Drop a miner from budget accounting (e.g. when its tuner stops).
+
+    Its group rebalances on the next reading from any remaining member, so the
+    power it freed is handed out without waiting for the rebalance interval.
+    """
+    with _lock:
+        reading = _readings.pop(bitaxe_ip, None)
+        _allocations.pop(bitaxe_ip, None)
+        if reading is not None:
+            _last_rebalance.pop(reading["group"], None)
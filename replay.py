@@ -0,0 +1,359 @@
+import argparse
+import gzip
+import json
+import os
+import threading
+import time
+
+from autotune import MinerApi, tune_miner
+from models import MinerConfig
+
+RECORDINGS_DIR = "recordings"
+FORMAT_VERSION = 1
+FLUSH_EVERY = 20
+
+
+class RecordingApi(MinerApi):
+    """Talks to the live miner and records everything the tuner sees and does.
+
+    A recording is a gzipped JSONL file. The first line is a header holding the
+    config snapshot the tuner started with. Every later line carries t, seconds since
+    the start, and one of these kinds:
+
+    - info: the /api/system/info fields that changed since the previous reading
+    - error: a failed /api/system/info request
+    - set: a settings write, with voltage, frequency and the result message
+    - fan: a fan speed write, with fan_speed (None for auto fan) and the result message
+    - restart: a restart request and its result message
+    """
+
+    def __init__(self, bitaxe_ip, config, directory=RECORDINGS_DIR, clock=None):
+        os.makedirs(directory, exist_ok=True)
+        self.bitaxe_ip = bitaxe_ip
+        self._time = clock.time if clock is not None else time.time
+        self.started = self._time()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+        self.path = os.path.join(directory, f"{bitaxe_ip.replace(':', '_')}-{stamp}.jsonl.gz")
+        self._file = gzip.open(self.path, "wt", encoding="utf-8")
+        self._pending = 0
+        self._last_info = {}
+        self._write({"kind": "header", "version": FORMAT_VERSION, "ip": bitaxe_ip,
+                     "started": self.started, "config": config})
+
+    def _write(self, record):
+        if self._file is None:
+            return
+        if record["kind"] != "header":
+            record["t"] = round(self._time() - self.started, 3)
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._pending += 1
+        if self._pending >= FLUSH_EVERY:
+            self._file.flush()
+            self._pending = 0
+
+    def get_system_info(self, bitaxe_ip):
+        info = super().get_system_info(bitaxe_ip)
+        if isinstance(info, dict):
+            delta = {k: v for k, v in info.items() if k not in self._last_info or self._last_info[k] != v}
+            record = {"kind": "info", "delta": delta}
+            removed = [k for k in self._last_info if k not in info]
+            if removed:
+                record["removed"] = removed
+            self._last_info = dict(info)
+            self._write(record)
+        else:
+            self._write({"kind": "error", "message": str(info)})
+        return info
+
+    def set_system_settings(self, bitaxe_ip, core_voltage, frequency):
+        result = super().set_system_settings(bitaxe_ip, core_voltage, frequency)
+        self._write({"kind": "set", "voltage": core_voltage, "frequency": frequency, "result": result})
+        return result
+
+    def set_fan_speed(self, bitaxe_ip, fan_speed):
+        result = super().set_fan_speed(bitaxe_ip, fan_speed)
+        self._write({"kind": "fan", "fan_speed": fan_speed, "result": result})
+        return result
+
+    def restart_bitaxe(self, bitaxe_ip):
+        result = super().restart_bitaxe(bitaxe_ip)
+        self._write({"kind": "restart", "result": result})
+        return result
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def recording_api(bitaxe_ip, config):
+    """A RecordingApi for the miner when record_telemetry is enabled, otherwise None (live API)."""
+    if not config.get("record_telemetry", False):
+        return None
+    return RecordingApi(bitaxe_ip, config, config.get("recordings_dir", RECORDINGS_DIR))
+
+
+def load_recording(path):
+    """Read a recording. Returns (header, samples, decisions).
+
+    samples is a list of (t, info) with info rebuilt from the recorded deltas, or the
+    error message for failed requests. decisions lists the recorded set/fan/restart records.
+    """
+    header, samples, decisions = None, [], []
+    info = {}
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break  # Truncated tail from a recording that was not closed cleanly
+            kind = record.get("kind")
+            if kind == "header":
+                header = record
+            elif kind == "info":
+                for key in record.get("removed", []):
+                    info.pop(key, None)
+                info.update(record["delta"])
+                samples.append((record["t"], dict(info)))
+            elif kind == "error":
+                samples.append((record["t"], record["message"]))
+            elif kind in ("set", "fan", "restart"):
+                decisions.append(record)
+    if header is None:
+        raise ValueError(f"{path} is not a telemetry recording (missing header)")
+    return header, samples, decisions
+
+
+class SimulatedClock:
+    """Clock for replays: sleeping advances simulated time instantly."""
+
+    def __init__(self, start=0):
+        self.now = start
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds, stop_event=None):
+        self.now += seconds
+
+
+class ReplayApi(MinerApi):
+    """Serves recorded telemetry to the tuner and captures its decisions instead of sending them.
+
+    Each poll returns the latest recorded reading at or before the simulated time,
+    skipping readings the tuner would have slept through. If the tuner is ahead of the
+    recording it jumps forward to the next reading, so gaps such as offline periods
+    are kept. The telemetry is open-loop: temperatures, power and hashrate are what
+    the miner reported under the recorded policy. Only the reported frequency,
+    voltage and fan speed follow the replayed policy's writes, and only where the
+    recorded miner followed the recorded ones: readings that disagreed with the last
+    successful recorded write (drift, or a miner that does not report them) are
+    served as recorded. A replayed write fails when a recorded write during the same
+    poll failed. When the recording runs out, stop_event is set.
+    """
+
+    def __init__(self, header, samples, clock, stop_event, config_overrides=None, recorded=()):
+        self.config = dict(header["config"])
+        self.config.update(config_overrides or {})
+        # Never let a replay write calibration data for the real miner
+        self.config["calibration_enabled"] = False
+        self.started = header["started"]
+        self.samples = samples
+        self.clock = clock
+        self.stop_event = stop_event
+        self.applied = None
+        self.applied_fan = None
+        self.decisions = []
+        self._index = 0
+        self._current = None   # Index of the sample the tuner last read
+        self._followed, self._failed = self._miner_behaviour(samples, recorded)
+        self.miners = {}
+        for entry in self.config.get("miners", []):
+            try:
+                self.miners[entry["ip"]] = MinerConfig.from_dict(entry)
+            except (KeyError, ValueError):
+                continue
+
+    @staticmethod
+    def _miner_behaviour(samples, recorded):
+        """Per sample: the settings the recorded miner was last told to use, and a failed write during its poll."""
+        writes = sorted((d for d in recorded if d["kind"] == "set"), key=lambda d: d["t"])
+        followed, failed = [], []
+        last_ok, w = None, 0
+        for i, (t, _) in enumerate(samples):
+            while w < len(writes) and writes[w]["t"] < t:
+                if " -> Error" not in writes[w].get("result", ""):
+                    last_ok = (writes[w]["voltage"], writes[w]["frequency"])
+                w += 1
+            followed.append(last_ok)
+            next_t = samples[i + 1][0] if i + 1 < len(samples) else float("inf")
+            errors = [d["result"] for d in writes[w:] if d["t"] < next_t and " -> Error" in d.get("result", "")]
+            failed.append(errors[0] if errors else None)
+        return followed, failed
+
+    def _reported_settings(self, info, idx):
+        """Reported voltage/frequency, following the replayed writes wherever the recorded miner followed its own."""
+        if self.applied is None:
+            return info
+        recorded_settings = (info.get("coreVoltage"), info.get("frequency"))
+        if None in recorded_settings:
+            return info
+        last_ok = self._followed[idx]
+        if last_ok is not None and any(abs(a - b) >= 1 for a, b in zip(recorded_settings, last_ok)):
+            return info
+        return dict(info, coreVoltage=self.applied[0], frequency=self.applied[1])
+
+    def get_system_info(self, bitaxe_ip):
+        if self._index >= len(self.samples):
+            self.stop_event.set()
+            return f"Error fetching system info from {bitaxe_ip}: end of recording"
+
+        elapsed = self.clock.time() - self.started
+        idx = self._index
+        while idx + 1 < len(self.samples) and self.samples[idx + 1][0] <= elapsed:
+            idx += 1
+        t, info = self.samples[idx]
+        if t > elapsed:
+            self.clock.now = self.started + t
+        self._index = idx + 1
+        self._current = idx
+
+        if isinstance(info, dict):
+            info = self._reported_settings(info, idx)
+        if isinstance(info, dict) and self.applied_fan is not None:
+            info = dict(info, autofanspeed=0, fanspeed=self.applied_fan)
+        return info
+
+    def _decision(self, record):
+        record["t"] = round(self.clock.time() - self.started, 3)
+        self.decisions.append(record)
+
+    def set_system_settings(self, bitaxe_ip, core_voltage, frequency):
+        failure = self._failed[self._current] if self._current is not None else None
+        if failure is not None:
+            self._decision({"kind": "set", "voltage": core_voltage, "frequency": frequency, "result": failure})
+            return failure
+        self.applied = (core_voltage, frequency)
+        self._decision({"kind": "set", "voltage": core_voltage, "frequency": frequency})
+        return f"{bitaxe_ip} -> Applied settings: Voltage = {core_voltage}mV, Frequency = {frequency}MHz"
+
+    def set_fan_speed(self, bitaxe_ip, fan_speed):
+        self.applied_fan = fan_speed
+        self._decision({"kind": "fan", "fan_speed": fan_speed})
+        if fan_speed is None:
+            return f"{bitaxe_ip} -> Applied settings: Fan = auto"
+        return f"{bitaxe_ip} -> Applied settings: Fan = {fan_speed}%"
+
+    def restart_bitaxe(self, bitaxe_ip):
+        self._decision({"kind": "restart"})
+        return f"{bitaxe_ip} -> Restart initiated."
+
+    def load_config(self):
+        return self.config
+
+    def load_miner(self, bitaxe_ip):
+        return self.miners.get(bitaxe_ip)
+
+    def find_moved(self, miner):
+        return None  # The recorded miner stays at the address it was recorded at
+
+
+def summarize(decisions, duration):
+    """Writes, restarts, final settings and time spent at each frequency for a decision list."""
+    writes = [d for d in decisions if d["kind"] == "set"]
+    time_at_frequency = {}
+    for current, following in zip(writes, writes[1:] + [{"t": duration}]):
+        span = max(0, following["t"] - current["t"])
+        time_at_frequency[current["frequency"]] = round(time_at_frequency.get(current["frequency"], 0) + span, 3)
+    return {
+        "writes": len(writes),
+        "restarts": sum(1 for d in decisions if d["kind"] == "restart"),
+        "final": {"voltage": writes[-1]["voltage"], "frequency": writes[-1]["frequency"]} if writes else None,
+        "time_at_frequency": time_at_frequency,
+    }
+
+
+def first_divergence(recorded, replayed):
+    """Index and both decisions at the first point the replayed settings differ from the recorded ones."""
+    def key(d):
+        return (d["kind"], d.get("voltage"), d.get("frequency"), d.get("fan_speed"))
+    for i, (a, b) in enumerate(zip(recorded, replayed)):
+        if key(a) != key(b):
+            return {"index": i, "recorded": a, "replayed": b}
+    if len(recorded) != len(replayed):
+        i = min(len(recorded), len(replayed))
+        return {"index": i, "recorded": recorded[i] if i < len(recorded) else None,
+                "replayed": replayed[i] if i < len(replayed) else None}
+    return None
+
+
+def replay(path, config_overrides=None, log_callback=None, tuner=tune_miner):
+    """Run a recording through the tuner on a simulated clock.
+
+    tuner may be any function with tune_miner's signature, so alternative
+    policies can be compared on the same telemetry. config_overrides is merged into
+    the recorded config snapshot; per-miner AutoTuner limits come from its miners
+    list. Returns the replayed decisions with a summary and a comparison against the
+    decisions that were recorded live.
+    """
+    header, samples, recorded = load_recording(path)
+    bitaxe_ip = header["ip"]
+    clock = SimulatedClock(header["started"])
+    stop_event = threading.Event()
+    api = ReplayApi(header, samples, clock, stop_event, config_overrides, recorded)
+    miner = api.load_miner(bitaxe_ip) or MinerConfig(bitaxe_ip)
+
+    logs = []
+
+    def log(message, level="info"):
+        logs.append((round(clock.time() - header["started"], 3), level, message))
+        if log_callback:
+            log_callback(message, level)
+
+    wall_start = time.perf_counter()
+    tuner(miner, log, stop_event=stop_event, clock=clock, api=api)
+    wall_seconds = time.perf_counter() - wall_start
+
+    duration = samples[-1][0] if samples else 0
+    return {
+        "ip": bitaxe_ip,
+        "samples": len(samples),
+        "simulated_seconds": duration,
+        "wall_seconds": round(wall_seconds, 3),
+        "speedup": round(duration / wall_seconds) if wall_seconds > 0 else None,
+        "decisions": api.decisions,
+        "logs": logs,
+        "summary": summarize(api.decisions, duration),
+        "recorded_summary": summarize(recorded, duration),
+        "divergence": first_divergence(recorded, api.decisions),
+    }
+
+
+def _parse_override(text):
+    key, _, value = text.partition("=")
+    try:
+        return key, json.loads(value)
+    except ValueError:
+        return key, value
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded Bitaxe telemetry through the AutoTuner.")
+    parser.add_argument("recording", help="Path to a .jsonl.gz recording")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="Override a config.json setting for the replay (value parsed as JSON when possible)")
+    parser.add_argument("--verbose", action="store_true", help="Print the tuner's log messages")
+    args = parser.parse_args()
+
+    result = replay(args.recording, dict(_parse_override(o) for o in args.set))
+    if args.verbose:
+        for t, level, message in result["logs"]:
+            print(f"[{t:>10.1f}s] {level.upper():7} {message}")
+    print(f"Replayed {result['samples']} samples ({result['simulated_seconds']:.0f}s) "
+          f"in {result['wall_seconds']}s, {result['speedup']}x real time")
+    print(f"Replayed: {json.dumps(result['summary'])}")
+    print(f"Recorded: {json.dumps(result['recorded_summary'])}")
+    divergence = result["divergence"]
+    print("Decisions match the recording." if divergence is None else f"First divergence: {json.dumps(divergence)}")
@@ -0,0 +1,214 @@
+import bisect
+from contextlib import closing
+import hashlib
+import socket
+import sqlite3
+import threading
+import time
+
+import autotune
+from config import get_miner_configs, load_config
+
+# Longer than the 10 s miner request timeout, so a stopped tuner finishes any request in flight
+TUNER_EXIT_TIMEOUT = 15
+
+
+class SQLiteLeaseStore:
+    """Shared coordination store for tuner nodes, backed by a SQLite file.
+
+    Holds node heartbeats and per-miner leases. Any store offering the same
+    methods (heartbeat, live_nodes, acquire, release, leases) can replace it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with closing(self._connect()) as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS nodes (node_id TEXT PRIMARY KEY, heartbeat REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS leases (miner TEXT PRIMARY KEY, owner TEXT, expires REAL)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout = 10000")
+        return conn
+
+    def heartbeat(self, node_id, now):
+        with closing(self._connect()) as conn:
+            conn.execute("INSERT OR REPLACE INTO nodes (node_id, heartbeat) VALUES (?, ?)", (node_id, now))
+
+    def live_nodes(self, node_ttl, now):
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT node_id FROM nodes WHERE heartbeat >= ?", (now - node_ttl,)).fetchall()
+        return sorted(row[0] for row in rows)
+
+    def acquire(self, miner, node_id, lease_ttl, now):
+        """Take or renew the lease on a miner. Returns True if node_id holds it afterwards."""
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT owner, expires FROM leases WHERE miner = ?", (miner,)).fetchone()
+            if row is None or row[0] == node_id or row[1] < now:
+                conn.execute("INSERT OR REPLACE INTO leases (miner, owner, expires) VALUES (?, ?, ?)",
+                             (miner, node_id, now + lease_ttl))
+                conn.execute("COMMIT")
+                return True
+            conn.execute("ROLLBACK")
+            return False
+
+    def release(self, miner, node_id):
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM leases WHERE miner = ? AND owner = ?", (miner, node_id))
+
+    def leases(self):
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT miner, owner, expires FROM leases").fetchall()
+        return {miner: {"owner": owner, "expires": expires} for miner, owner, expires in rows}
+
+
+class HashRing:
+    """Consistent hash ring mapping miner keys to node IDs."""
+
+    def __init__(self, nodes, replicas=64):
+        self._ring = sorted((self._hash(f"{node}#{i}"), node) for node in nodes for i in range(replicas))
+        self._keys = [h for h, _ in self._ring]
+
+    @staticmethod
+    def _hash(value):
+        return int(hashlib.md5(value.encode()).hexdigest()[:16], 16)
+
+    def owner(self, key):
+        if not self._ring:
+            return None
+        idx = bisect.bisect(self._keys, self._hash(key)) % len(self._ring)
+        return self._ring[idx][1]
+
+
+def miner_key(miner):
+    """Stable identity used for shard placement: MAC address when known, otherwise IP."""
+    return miner.mac or miner.ip
+
+
+class ShardNode:
+    """Runs tuners only for the miners this node owns.
+
+    Each cycle the node heartbeats, builds a hash ring over the live nodes and, for
+    every enabled miner it owns, takes or renews a lease before tuning it. Tuners for
+    miners it no longer owns, or whose lease it could not renew in time, are stopped
+    and their leases released. A dead node's heartbeat and leases expire, so its
+    miners move to the surviving nodes.
+
+    A stopped tuner sends no further writes (see autotune.FencedApi), and its lease
+    is only released early once its thread has exited. Tuners are only started and
+    stopped from the node's own thread, so a sync never races the shutdown.
+    """
+
+    def __init__(self, start_tuner, log_callback, node_id=None, store=None):
+        config = load_config()
+        self.node_id = node_id or config.get("shard_node_id") or socket.gethostname()
+        self.store = store or SQLiteLeaseStore(config.get("shard_store", "shards.sqlite"))
+        self.start_tuner = start_tuner
+        self.log_callback = log_callback
+        self.tuners = {}          # miner key -> (stop_event, thread)
+        self.lease_expires = {}   # miner key -> local view of our lease expiry
+        self._lock = threading.Lock()  # Guards tuners and lease_expires
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"shard-{self.node_id}", daemon=True)
+        self._thread.start()
+        self.log_callback(f"Shard node {self.node_id} started.", "success")
+
+    def stop(self):
+        """Stop the node without waiting: tuners are told to stop now, and the node's
+        thread waits for them and releases their leases once its current sync is done."""
+        self._stop.set()
+        with self._lock:
+            stop_events = [stop_event for stop_event, _ in self.tuners.values()]
+        for stop_event in stop_events:
+            stop_event.set()
+        if self._thread is None:
+            self._stop_tuners(list(self.tuners))
+
+    def is_alive(self):
+        """True until the node's thread has stopped every tuner it ran."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def join(self, timeout=None):
+        """Wait for the node's thread, and with it every tuner it ran, to finish."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            config = load_config()
+            try:
+                self.sync(config)
+            except Exception as e:
+                self.log_callback(f"Shard node {self.node_id} -> sync failed: {e}", "error")
+                # Without the store we cannot prove ownership; stop tuners whose lease may have lapsed
+                self._expire_tuners(time.time(), config.get("shard_lease_ttl", 30))
+            self._stop.wait(config.get("shard_heartbeat_interval", 10))
+        with self._lock:
+            keys = list(self.tuners)
+        self._stop_tuners(keys)
+        self.log_callback(f"Shard node {self.node_id} stopped.", "warning")
+
+    def sync(self, config):
+        """One coordination cycle: heartbeat, compute ownership, start/stop tuners."""
+        now = time.time()
+        lease_ttl = config.get("shard_lease_ttl", 30)
+        node_ttl = config.get("shard_node_ttl", lease_ttl)
+
+        self.store.heartbeat(self.node_id, now)
+        ring = HashRing(self.store.live_nodes(node_ttl, now) or [self.node_id])
+
+        miners = {miner_key(m): m for m in get_miner_configs().values() if m.enabled}
+        for key, miner in miners.items():
+            if ring.owner(key) != self.node_id or self._stop.is_set():
+                continue
+            if self.store.acquire(key, self.node_id, lease_ttl, now):
+                with self._lock:
+                    self.lease_expires[key] = now + lease_ttl
+                    if key in self.tuners and self.tuners[key][1].is_alive():
+                        continue
+                    stop_event = autotune.new_stop_event()
+                    self.tuners[key] = (stop_event, self.start_tuner(miner, stop_event))
+                self.log_callback(f"{miner.ip} -> Owned by shard node {self.node_id}. Tuning.", "info")
+
+        with self._lock:
+            keys = [key for key in self.tuners if key not in miners or ring.owner(key) != self.node_id]
+        self._stop_tuners(keys)
+        self._expire_tuners(now, lease_ttl)
+
+    def _expire_tuners(self, now, lease_ttl):
+        # Stop a little before the lease runs out so two nodes never tune the same miner
+        margin = min(5, lease_ttl / 3)
+        with self._lock:
+            keys = [key for key in self.tuners if now >= self.lease_expires.get(key, 0) - margin]
+        self._stop_tuners(keys)
+
+    def _stop_tuners(self, keys):
+        """Stop tuners, wait for their threads to exit and release the leases of those that did."""
+        with self._lock:
+            stopped = [(key,) + self.tuners.pop(key) for key in keys if key in self.tuners]
+            for key, _, _ in stopped:
+                self.lease_expires.pop(key, None)
+        for _, stop_event, _ in stopped:
+            stop_event.set()
+        deadline = time.monotonic() + TUNER_EXIT_TIMEOUT
+        for key, _, thread in stopped:
+            thread.join(timeout=max(0, deadline - time.monotonic()))
+            if thread.is_alive():
+                # Its writes are already fenced; the lease is left to expire rather than handed over
+                self.log_callback(f"{key} -> Tuner still exiting; shard node {self.node_id} lets its lease expire.",
+                                  "warning")
+                continue
+            try:
+                self.store.release(key, self.node_id)
+            except sqlite3.Error:
+                pass
+            self.log_callback(f"{key} -> Released by shard node {self.node_id}.", "info")
+
+    def status(self):
+        with self._lock:
+            tuning = sorted(self.tuners)
+        return {"node_id": self.node_id, "tuning": tuning, "leases": self.store.leases()}
@@ -0,0 +1,161 @@
+import math
+import threading
+import time
+from collections import deque
+
+# GH of work per unit of share difficulty
+GH_PER_DIFFICULTY = 2 ** 32 / 1e9
+
+_lock = threading.Lock()
+_miners = {}   # ip -> _Tracker
+
+
+class _Tracker:
+    __slots__ = ("accepted", "rejected", "ts", "frequency", "window", "sums", "by_freq", "ceiling", "ceiling_until")
+
+    def __init__(self):
+        self.accepted = self.rejected = self.ts = self.frequency = None
+        self.window = deque()   # (ts, accepted, rejected, seconds, GH hashed by reported rate, GH of accepted work)
+        self.sums = [0, 0, 0.0, 0.0, 0.0]
+        self.by_freq = {}       # frequency -> {"accepted", "rejected", "seconds", "hashed", "work", "updated"}
+        self.ceiling = None     # Frequencies at or above this produced no extra accepted work
+        self.ceiling_until = 0
+
+
+def _effective(accepted, rejected, seconds, hashed, work):
+    """Effective hashrate in GH/s.
+
+    Measured from the difficulty of accepted shares when the miner reports its pool
+    difficulty, otherwise the reported hashrate scaled by the acceptance ratio.
+    """
+    if not seconds:
+        return None
+    if work:
+        return work / seconds
+    total = accepted + rejected
+    return hashed / seconds * accepted / total if total else None
+
+
+def record(bitaxe_ip, info, frequency, window_seconds=600, stats_ttl=1800, now=None):
+    """Add the share counters from one /api/system/info reading taken at frequency.
+
+    Counters are cumulative since boot, so deltas are taken between readings. The
+    rolling window restarts when the frequency changes or the miner reboots (the
+    counters go down), so it only ever covers the current setting.
+    """
+    accepted, rejected = info.get("sharesAccepted"), info.get("sharesRejected")
+    if not isinstance(accepted, int) or not isinstance(rejected, int):
+        return
+    now = time.time() if now is None else now
+    with _lock:
+        tracker = _miners.setdefault(bitaxe_ip, _Tracker())
+        restarted = (tracker.ts is None or accepted < tracker.accepted or rejected < tracker.rejected
+                     or now <= tracker.ts)
+        if restarted or frequency != tracker.frequency:
+            tracker.window.clear()
+            tracker.sums = [0, 0, 0.0, 0.0, 0.0]
+            tracker.accepted, tracker.rejected, tracker.ts, tracker.frequency = accepted, rejected, now, frequency
+            return
+
+        seconds = now - tracker.ts
+        d_accepted, d_rejected = accepted - tracker.accepted, rejected - tracker.rejected
+        hashed = (info.get("hashRate") or 0) * seconds
+        difficulty = info.get("poolDifficulty")
+        work = d_accepted * difficulty * GH_PER_DIFFICULTY if isinstance(difficulty, (int, float)) else 0
+        entry = (now, d_accepted, d_rejected, seconds, hashed, work)
+        tracker.window.append(entry)
+        for i, value in enumerate(entry[1:]):
+            tracker.sums[i] += value
+        while tracker.window and now - tracker.window[0][0] > window_seconds:
+            for i, value in enumerate(tracker.window.popleft()[1:]):
+                tracker.sums[i] -= value
+        tracker.accepted, tracker.rejected, tracker.ts = accepted, rejected, now
+
+        stats = tracker.by_freq.get(frequency)
+        if stats is None or now - stats["updated"] > stats_ttl:
+            stats = tracker.by_freq[frequency] = {"accepted": 0, "rejected": 0, "seconds": 0.0, "hashed": 0.0,
+                                                  "work": 0.0, "updated": now}
+        stats["accepted"] += d_accepted
+        stats["rejected"] += d_rejected
+        stats["seconds"] += seconds
+        stats["hashed"] += hashed
+        stats["work"] += work
+        stats["updated"] = now
+
+
+def window(bitaxe_ip):
+    """Shares, reject rate and effective hashrate over the rolling window at the current frequency."""
+    with _lock:
+        tracker = _miners.get(bitaxe_ip)
+        if tracker is None:
+            return None
+        accepted, rejected, seconds, hashed, work = tracker.sums
+    total = accepted + rejected
+    return {"accepted": accepted, "rejected": rejected, "seconds": seconds,
+            "reject_rate": rejected / total if total else None,
+            "effective_hashrate": _effective(accepted, rejected, seconds, hashed, work)}
+
+
+def assess(bitaxe_ip, frequency, max_reject_rate=0.02, min_shares=20, stats_ttl=1800, z=2.0, now=None):
+    """Whether accepted work says the tuner should back off from frequency.
+
+    Returns None, ("reject_rate", rate) when the window's reject rate is over
+    max_reject_rate, or ("effective", lower_frequency, lower_effective, effective)
+    when frequency clearly falls short of the gain it should give over the nearest
+    measured lower frequency. Both need min_shares shares at each frequency involved.
+
+    Share counts are Poisson, so an effective hashrate from n shares is only good to
+    about 1/sqrt(n). The ratio of the two measurements is compared with the ratio of
+    the frequencies, and the tuner backs off only when even its upper bound, z
+    standard errors up, stays below it.
+    """
+    now = time.time() if now is None else now
+    with _lock:
+        tracker = _miners.get(bitaxe_ip)
+        if tracker is None or tracker.frequency != frequency:
+            return None
+        accepted, rejected = tracker.sums[0], tracker.sums[1]
+        if accepted + rejected >= min_shares and rejected / (accepted + rejected) > max_reject_rate:
+            return "reject_rate", rejected / (accepted + rejected)
+
+        def measured(freq):
+            stats = tracker.by_freq.get(freq)
+            if stats is None or stats["accepted"] + stats["rejected"] < min_shares or now - stats["updated"] > stats_ttl:
+                return None
+            return _effective(stats["accepted"], stats["rejected"], stats["seconds"], stats["hashed"], stats["work"])
+
+        current = measured(frequency)
+        lower = [freq for freq in tracker.by_freq if freq < frequency and measured(freq) is not None]
+        if current is None or not lower:
+            return None
+        below = max(lower)
+        below_effective = measured(below)
+        if not below_effective:
+            return None
+        error = math.sqrt(1 / max(tracker.by_freq[frequency]["accepted"], 1)
+                          + 1 / max(tracker.by_freq[below]["accepted"], 1))
+        if current / below_effective * math.exp(z * error) < frequency / below:
+            return "effective", below, below_effective, current
+    return None
+
+
+def set_ceiling(bitaxe_ip, frequency, until):
+    """Keep the tuner below frequency until the given time."""
+    with _lock:
+        tracker = _miners.setdefault(bitaxe_ip, _Tracker())
+        tracker.ceiling, tracker.ceiling_until = frequency, until
+
+
+def get_ceiling(bitaxe_ip, now=None):
+    """The frequency the tuner must stay below, or None."""
+    now = time.time() if now is None else now
+    with _lock:
+        tracker = _miners.get(bitaxe_ip)
+        if tracker is None or tracker.ceiling is None or now >= tracker.ceiling_until:
+            return None
+        return tracker.ceiling
+
+
+def forget_miner(bitaxe_ip):
+    with _lock:
+        _miners.pop(bitaxe_ip, None)
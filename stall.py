@@ -0,0 +1,188 @@
+import math
+import threading
+import time
+from collections import deque
+
+# Work (GH) behind one share of difficulty 1
+GH_PER_DIFFICULTY = 2 ** 32 / 1e9
+
+# How strongly each signal alone says the miner is stalled; combined with a noisy-OR.
+# Against the default stall_confidence of 0.75, a frozen uptime alone (0.9) or a flat
+# hashrate with a silent pool (0.8) is a stall; a flat hashrate (0.6) or a quiet pool (0.5) alone is not
+WEIGHTS = {"hashrate": 0.6, "shares": 0.5, "uptime": 0.9}
+
+# Escalation levels, in order
+REAPPLY, SOFT_RESET, RESTART = "reapply", "soft_reset", "restart"
+LEVELS = (None, REAPPLY, SOFT_RESET, RESTART)
+
+_lock = threading.Lock()
+_miners = {}                 # ip -> _Tracker
+_fleet_restarts = deque()    # Times of restarts across all miners
+
+
+class _Tracker:
+    __slots__ = ("hashrates", "accepted", "last_share", "uptime", "uptime_ts", "level", "last_action",
+                 "grace_until", "restarts")
+
+    def __init__(self):
+        self.hashrates = deque()
+        self.accepted = self.uptime = self.uptime_ts = None
+        self.last_share = None
+        self.level = 0
+        self.last_action = 0
+        self.grace_until = 0
+        self.restarts = deque()
+
+
+def _expected_hashrate(info):
+    frequency = info.get("frequency") or 0
+    return frequency * (info.get("smallCoreCount", 0) * info.get("asicCount", 0)) / 1000
+
+
+def _evidence(tracker, info, samples, now, config):
+    """Per-signal stall evidence between 0 and 1, with the current reading already in the history.
+
+    The uptime check compares against the previous reading, so it runs before tracker.uptime moves on.
+    """
+    evidence = {"hashrate": 0.0, "shares": 0.0, "uptime": 0.0}
+
+    # Hashrate: frozen at one value, or far below what the chip should do at this frequency
+    hashrates = tracker.hashrates
+    if len(hashrates) >= samples:
+        low, high = min(hashrates), max(hashrates)
+        mean = sum(hashrates) / len(hashrates)
+        expected = _expected_hashrate(info)
+        if high <= 0 or (high - low) <= config.get("stall_min_variation", 0.0001) * mean:
+            evidence["hashrate"] = 1.0
+        elif expected and mean < config.get("stall_low_hashrate_ratio", 0.1) * expected:
+            evidence["hashrate"] = 1.0
+
+    # Shares: how unlikely the silence since the last accepted share is at the chip's nominal rate
+    if tracker.last_share is not None:
+        silent = now - tracker.last_share
+        difficulty = info.get("poolDifficulty")
+        if isinstance(difficulty, (int, float)) and difficulty > 0:
+            expected_shares = _expected_hashrate(info) * silent / (difficulty * GH_PER_DIFFICULTY)
+            evidence["shares"] = 1 - math.exp(-expected_shares)
+        else:
+            evidence["shares"] = min(1.0, silent / config.get("stall_share_timeout", 600))
+
+    # Uptime: the API answering with a clock that no longer moves means stale firmware state
+    uptime = info.get("uptimeSeconds")
+    if (isinstance(uptime, (int, float)) and tracker.uptime is not None and uptime == tracker.uptime
+            and now - tracker.uptime_ts >= config.get("stall_uptime_frozen", 30)):
+        evidence["uptime"] = 1.0
+    return evidence
+
+
+def confidence(evidence):
+    """Combine per-signal evidence into one stall confidence between 0 and 1."""
+    miss = 1.0
+    for signal, value in evidence.items():
+        miss *= 1 - WEIGHTS[signal] * value
+    return 1 - miss
+
+
+def _restart_allowed(tracker, now, config):
+    for restarts in (tracker.restarts, _fleet_restarts):
+        while restarts and now - restarts[0] > 3600:
+            restarts.popleft()
+    return (len(tracker.restarts) < config.get("stall_max_restarts_per_hour", 2)
+            and len(_fleet_restarts) < config.get("stall_fleet_restarts_per_hour", 10))
+
+
+def observe(bitaxe_ip, info, now=None, config=None):
+    """Feed one /api/system/info reading to the stall detector. Never blocks.
+
+    Returns None while the detector is disabled or the miner has just booted. Otherwise
+    returns a dict with the stall "confidence", whether the miner counts as "stalled"
+    (always during the grace period after a restart), the per-signal "evidence" and the "action" to take
+    now: None, "reapply", "soft_reset", "restart", "restart_deferred" (rate limit
+    reached) or "recovered". Each stalled episode escalates one level at most every
+    stall_escalation_seconds.
+    """
+    config = config or {}
+    if not config.get("flatline_detection_enabled", True):
+        return None
+    now = time.time() if now is None else now
+    samples = config.get("flatline_hashrate_repeat_count", 5)
+    threshold = config.get("stall_confidence", 0.75)
+
+    with _lock:
+        tracker = _miners.setdefault(bitaxe_ip, _Tracker())
+
+        # A reboot (ours or the miner's own) starts over; counters and history from before no longer apply
+        uptime = info.get("uptimeSeconds")
+        accepted = info.get("sharesAccepted")
+        rebooted = ((isinstance(uptime, (int, float)) and tracker.uptime is not None and uptime < tracker.uptime)
+                    or (isinstance(accepted, int) and tracker.accepted is not None and accepted < tracker.accepted))
+        if rebooted:
+            tracker.hashrates.clear()
+            tracker.accepted = tracker.last_share = tracker.uptime = None
+            if tracker.level < LEVELS.index(RESTART):
+                tracker.level = 0  # Our own restart keeps its level, so recovery is reported
+
+        tracker.hashrates.append(info.get("hashRate", 0) or 0)
+        while len(tracker.hashrates) > samples:
+            tracker.hashrates.popleft()
+        if isinstance(accepted, int):
+            if tracker.accepted is None or accepted > tracker.accepted:
+                tracker.last_share = now
+            tracker.accepted = accepted
+        evidence = _evidence(tracker, info, samples, now, config)
+        if isinstance(uptime, (int, float)) and uptime != tracker.uptime:
+            tracker.uptime, tracker.uptime_ts = uptime, now
+
+        score = confidence(evidence)
+        if now < tracker.grace_until:
+            # Still coming back from our restart: no verdict yet, but no tuning on boot readings either
+            return {"confidence": round(score, 3), "stalled": True, "evidence": evidence, "action": None}
+        if isinstance(uptime, (int, float)) and uptime < config.get("stall_boot_grace", 120):
+            return None
+
+        stalled = score >= threshold
+        action = None
+        if not stalled:
+            if tracker.level:
+                action = "recovered"
+                tracker.level = 0
+        elif tracker.level == 0 or now - tracker.last_action >= config.get("stall_escalation_seconds", 120):
+            tracker.last_action = now
+            if LEVELS[min(tracker.level + 1, len(LEVELS) - 1)] != RESTART:
+                tracker.level += 1
+                action = LEVELS[tracker.level]
+            elif _restart_allowed(tracker, now, config):
+                action, tracker.level = RESTART, LEVELS.index(RESTART)
+                tracker.restarts.append(now)
+                _fleet_restarts.append(now)
+                tracker.hashrates.clear()
+                tracker.grace_until = now + config.get("stall_restart_grace", 180)
+            else:
+                action = "restart_deferred"
+    return {"confidence": round(score, 3), "stalled": stalled, "evidence": evidence, "action": action}
+
+
+def describe(bitaxe_ip, verdict):
+    """Log message and level for a verdict's action."""
+    evidence = ", ".join(f"{signal} {value:.2f}" for signal, value in verdict["evidence"].items() if value >= 0.005)
+    detail = f"confidence {verdict['confidence']:.2f}" + (f": {evidence}" if evidence else "")
+    action = verdict["action"]
+    if action == "recovered":
+        return f"{bitaxe_ip} -> Stall cleared ({detail}).", "success"
+    if action == REAPPLY:
+        return f"{bitaxe_ip} -> Stall suspected ({detail}). Re-applying settings...", "warning"
+    if action == SOFT_RESET:
+        return f"{bitaxe_ip} -> Still stalled ({detail}). Soft reset: bouncing frequency...", "warning"
+    if action == RESTART:
+        return f"{bitaxe_ip} -> Still stalled ({detail}). Restarting...", "error"
+    return f"{bitaxe_ip} -> Still stalled ({detail}). Restart deferred: restart rate limit reached.", "error"
+
+
+def forget_miner(bitaxe_ip):
+    """Drop a miner's detector state. Restart history is kept so rate limits survive a tuner restart."""
+    with _lock:
+        tracker = _miners.get(bitaxe_ip)
+        if tracker is not None:
+            restarts = tracker.restarts
+            _miners[bitaxe_ip] = _Tracker()
+            _miners[bitaxe_ip].restarts = restarts
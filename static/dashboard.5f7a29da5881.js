@@ -0,0 +1,538 @@
+let contextMenuIp = null;
+let configData = {};
+let autotunerClipboard = null;
+let editingMiners = new Set();
+async function apiCall(url, options = {}) {
+try {
+const response = await fetch(url, options);
+if (!response.ok) {
+const errorData = await response.json().catch(() => ({ message: 'Unknown error' }));
+throw new Error(`HTTP error! status: ${response.status}, message: ${errorData.message}`);
+}
+return response.json();
+} catch (error) {
+console.error(`API call to ${url} failed:`, error);
+logMessage(`Error: ${error.message}`, 'error');
+throw error;
+}
+}
+function logMessage(message, level = 'info') {
+const logOutput = document.getElementById('log-output');
+const now = new Date().toISOString().slice(11, 19);
+const levelColors = { info: 'text-gray-300', success: 'text-green-400', warning: 'text-yellow-400', error: 'text-red-400' };
+const colorClass = levelColors[level] || 'text-gray-300';
+logOutput.innerHTML += `<div class="${colorClass}">[${now}] ${message}</div>`;
+logOutput.scrollTop = logOutput.scrollHeight;
+}
+let liveData = {};
+let configTypes = {};
+const liveCells = {
+frequency: [3, v => v || '-'],
+coreVoltage: [4, v => v || '-'],
+temp: [5, v => v ? `${v.toFixed(1)}°C` : '-'],
+vrTemp: [6, v => v ? `${v.toFixed(1)}°C` : '-'],
+hashRate: [7, v => v ? `${v.toFixed(2)} GH/s` : '-'],
+power: [8, v => v ? `${v.toFixed(2)} W` : '-'],
+};
+function displayType(ip) {
+const live = liveData[ip] || {};
+const type = configTypes[ip] || (live.online === false ? 'Offline' : 'Unknown');
+const lowerCaseType = type.toLowerCase();
+if ((lowerCaseType === 'unknown' || lowerCaseType === 'offline') && live.online && live.ASICModel) {
+return live.ASICModel;
+}
+return type;
+}
+function renderLive(row, ip, fields) {
+const live = liveData[ip] || {};
+const cells = row.cells;
+if ('online' in fields || 'ASICModel' in fields) cells[1].textContent = displayType(ip);
+for (const [field, [index, format]] of Object.entries(liveCells)) {
+if (field in fields || 'online' in fields) {
+cells[index].textContent = live.online ? format(live[field]) : '-';
+}
+}
+if ('power' in fields || 'hashRate' in fields || 'online' in fields) {
+cells[9].textContent = live.online && live.hashRate > 0 ? (live.power / (live.hashRate / 1000)).toFixed(1) : '-';
+}
+}
+function applyDelta(ip, changes) {
+if (changes.removed) {
+delete liveData[ip];
+return;
+}
+liveData[ip] = Object.assign(liveData[ip] || {}, changes);
+const row = document.querySelector(`tr[data-ip="${CSS.escape(ip)}"]`);
+if (row && !editingMiners.has(ip)) renderLive(row, ip, changes);
+}
+function connectStream() {
+const source = new EventSource('/api/stream');
+source.addEventListener('snapshot', e => {
+liveData = {};
+for (const [ip, fields] of Object.entries(JSON.parse(e.data))) applyDelta(ip, fields);
+});
+source.addEventListener('delta', e => {
+for (const [ip, changes] of Object.entries(JSON.parse(e.data))) applyDelta(ip, changes);
+});
+}
+const ROW_HEIGHT = 41;
+const OVERSCAN = 10;
+const PAGE_SIZE = 200;
+const MAX_PAGE_SIZE = 1000;
+let minerRows = [];
+let totalMiners = 0;
+let nextCursor = null;
+let listSort = 'ip';
+let listRequest = 0;
+let loadingPage = false;
+let renderQueued = false;
+function listParams(limit, cursor) {
+const params = new URLSearchParams({ sort: listSort, limit });
+for (const key of ['status', 'group', 'model']) {
+const value = document.getElementById(`filter-${key}`).value.trim();
+if (value) params.set(key, value);
+}
+if (cursor) params.set('cursor', cursor);
+return params;
+}
+async function loadMiners(reset) {
+if (!reset && (loadingPage || !nextCursor)) return;
+const request = ++listRequest;
+loadingPage = true;
+try {
+const limit = reset ? Math.min(MAX_PAGE_SIZE, Math.max(PAGE_SIZE, minerRows.length)) : PAGE_SIZE;
+const page = await apiCall(`/api/miners?${listParams(limit, reset ? null : nextCursor)}`);
+if (request !== listRequest) return; // A newer sort, filter or refresh superseded this one
+minerRows = reset ? page.miners : minerRows.concat(page.miners);
+nextCursor = page.next_cursor;
+totalMiners = page.total;
+for (const miner of page.miners) {
+configTypes[miner.ip] = miner.type;
+if (!(miner.ip in liveData) && miner.online !== null) liveData[miner.ip] = miner;
+}
+document.getElementById('miners-count').textContent = `${totalMiners} miners`;
+renderWindow();
+} finally {
+if (request === listRequest) loadingPage = false;
+}
+}
+function fillRow(row, miner) {
+row.setAttribute('data-ip', miner.ip);
+row.cells[0].textContent = miner.nickname || '';
+row.cells[2].textContent = miner.ip;
+renderLive(row, miner.ip, { online: true });
+}
+function renderWindow() {
+if (editingMiners.size) return; // Keep the rows being edited in place until they are saved
+const viewport = document.getElementById('miners-viewport');
+const topSpacer = document.getElementById('spacer-top');
+const bottomSpacer = document.getElementById('spacer-bottom');
+const first = Math.min(minerRows.length, Math.max(0, Math.floor(viewport.scrollTop / ROW_HEIGHT) - OVERSCAN));
+const last = Math.min(minerRows.length, first + Math.ceil(viewport.clientHeight / ROW_HEIGHT) + 2 * OVERSCAN);
+topSpacer.cells[0].style.height = `${first * ROW_HEIGHT}px`;
+bottomSpacer.cells[0].style.height = `${Math.max(0, totalMiners - last) * ROW_HEIGHT}px`;
+const rendered = [...viewport.querySelectorAll('tr.miner-row')];
+while (rendered.length < last - first) {
+const row = document.createElement('tr');
+row.className = 'miner-row';
+row.innerHTML = '<td class="px-6"></td>'.repeat(10);
+row.addEventListener('contextmenu', showContextMenu);
+bottomSpacer.before(row);
+rendered.push(row);
+}
+while (rendered.length > last - first) rendered.pop().remove();
+rendered.forEach((row, i) => fillRow(row, minerRows[first + i]));
+if (last >= minerRows.length - OVERSCAN) loadMiners(false);
+}
+function queueRender() {
+if (renderQueued) return;
+renderQueued = true;
+requestAnimationFrame(() => { renderQueued = false; renderWindow(); });
+}
+function restartList() {
+minerRows = [];
+nextCursor = null;
+document.getElementById('miners-viewport').scrollTop = 0;
+loadMiners(true);
+}
+function applyListFilters() { restartList(); }
+function sortBy(field) {
+const numeric = !['nickname', 'type', 'ip'].includes(field);
+listSort = listSort.replace('-', '') === field ? (listSort.startsWith('-') ? field : `-${field}`) : (numeric ? `-${field}` : field);
+document.querySelectorAll('#miners-table th[data-sort]').forEach(th => {
+const active = listSort.replace('-', '') === th.dataset.sort;
+th.textContent = th.textContent.replace(/ [▲▼]$/, '') + (active ? (listSort.startsWith('-') ? ' ▼' : ' ▲') : '');
+});
+restartList();
+}
+async function unifiedRefresh() {
+try {
+await loadMiners(true);
+if (!window.EventSource) {
+const ips = [...document.querySelectorAll('tr.miner-row')].map(row => row.dataset.ip);
+const results = await Promise.all(ips.map(ip => apiCall(`/api/miner-info/${ip}`).catch(e => null)));
+ips.forEach((ip, index) => applyDelta(ip, results[index] ? Object.assign(results[index], { online: true }) : { online: false }));
+}
+} catch (error) {
+console.error("Unified refresh failed:", error);
+logMessage("Failed to refresh miner data.", "error");
+}
+}
+async function fetchLogs() {
+try {
+const logs = await apiCall('/api/logs');
+const logOutput = document.getElementById('log-output');
+logOutput.innerHTML = logs.map(l => {
+const levelMatch = l.match(/\[(.*?)\]/g);
+if (levelMatch && levelMatch[1]) {
+const level = levelMatch[1].replace(/[\[\]]/g, '').toLowerCase();
+const levelColors = { info: 'text-gray-300', success: 'text-green-400', warning: 'text-yellow-400', error: 'text-red-400' };
+const colorClass = levelColors[level] || 'text-gray-300';
+return `<div class="${colorClass}">${l}</div>`;
+}
+return `<div>${l}</div>`; // Fallback for logs without level
+}).join('');
+logOutput.scrollTop = logOutput.scrollHeight;
+} catch (error) { /* Already logged in apiCall */ }
+}
+async function scanNetwork() {
+const start_ip = document.getElementById('start-ip').value;
+const end_ip = document.getElementById('end-ip').value;
+logMessage(`Starting network scan from ${start_ip} to ${end_ip}...`, 'info');
+try {
+await apiCall('/api/scan', {
+method: 'POST',
+headers: { 'Content-Type': 'application/json' },
+body: JSON.stringify({ start_ip, end_ip })
+});
+logMessage('Scan initiated. New miners will appear in the list upon discovery.', 'success');
+} finally {
+closeModal('scan-modal');
+}
+}
+async function addMiner() {
+const nickname = document.getElementById('add-nickname').value;
+const ip = document.getElementById('add-ip').value;
+if (!ip) { alert('IP address is required.'); return; }
+try {
+await apiCall('/api/miners', {
+method: 'POST',
+headers: { 'Content-Type': 'application/json' },
+body: JSON.stringify({ nickname, ip })
+});
+logMessage(`Added miner ${nickname || ip}.`, 'success');
+unifiedRefresh();
+} finally {
+closeModal('add-miner-modal');
+}
+}
+async function saveSettings() {
+const rows = [...document.querySelectorAll('#miners-table tr.miner-row')];
+const miners = [];
+for (const row of rows) {
+const cells = row.getElementsByTagName('td');
+miners.push({
+nickname: cells[0].textContent,
+type: cells[1].textContent,
+ip: cells[2].textContent
+});
+const model = minerRows.find(m => m.ip === row.dataset.ip);
+if (model) model.nickname = cells[0].textContent;
+}
+try {
+await apiCall('/api/miners/save', {
+method: 'POST',
+headers: { 'Content-Type': 'application/json' },
+body: JSON.stringify({ miners })
+});
+logMessage('Successfully saved miner configuration.', 'success');
+rows.forEach(row => {
+if (!editingMiners.has(row.dataset.ip)) {
+row.cells[0].contentEditable = 'false';
+row.cells[1].contentEditable = 'false';
+}
+});
+renderWindow();
+} catch (error) { /* Already logged in apiCall */ }
+}
+async function startAutotuning() {
+try {
+await apiCall('/api/autotune/start', { method: 'POST' });
+logMessage('Autotuning started for enabled miners.', 'success');
+document.getElementById('start-autotuner-btn').classList.add('opacity-50', 'cursor-not-allowed');
+} catch (error) { /* Already logged in apiCall */ }
+}
+async function stopAutotuning() {
+try {
+await apiCall('/api/autotune/stop', { method: 'POST' });
+logMessage('Stopping all autotuning processes...', 'warning');
+document.getElementById('start-autotuner-btn').classList.remove('opacity-50', 'cursor-not-allowed');
+} catch (error) { /* Already logged in apiCall */ }
+}
+function showContextMenu(e) {
+e.preventDefault();
+const menu = document.getElementById('context-menu');
+contextMenuIp = e.currentTarget.getAttribute('data-ip');
+menu.style.top = `${e.pageY}px`;
+menu.style.left = `${e.pageX}px`;
+menu.style.display = 'block';
+}
+async function saveEditedMiner(ip) {
+if (!editingMiners.has(ip)) return;
+const row = document.querySelector(`tr[data-ip="${ip}"]`);
+if (!row) return;
+editingMiners.delete(ip);
+const nicknameCell = row.cells[0];
+const typeCell = row.cells[1];
+nicknameCell.classList.remove('editing');
+typeCell.classList.remove('editing');
+nicknameCell.contentEditable = 'false';
+typeCell.contentEditable = 'false';
+logMessage(`Saving changes for ${ip}...`, 'info');
+try {
+await saveSettings();
+} catch (error) {
+logMessage(`Failed to save changes for ${ip}. Reverting.`, 'error');
+}
+}
+function editMinerSettings() {
+if (!contextMenuIp) return;
+const row = document.querySelector(`tr[data-ip="${contextMenuIp}"]`);
+if (row && !editingMiners.has(contextMenuIp)) {
+editingMiners.add(contextMenuIp);
+const nicknameCell = row.cells[0];
+const typeCell = row.cells[1];
+nicknameCell.classList.add('editing');
+typeCell.classList.add('editing');
+nicknameCell.contentEditable = 'true';
+typeCell.contentEditable = 'true';
+const handleBlur = () => {
+setTimeout(() => {
+const activeElement = document.activeElement;
+if (activeElement !== nicknameCell && activeElement !== typeCell) {
+saveEditedMiner(contextMenuIp);
+}
+}, 100);
+};
+const handleKeydown = (event) => {
+if (event.key === 'Enter') {
+event.preventDefault();
+event.target.blur();
+} else if (event.key === 'Escape') {
+editingMiners.delete(contextMenuIp);
+nicknameCell.classList.remove('editing');
+typeCell.classList.remove('editing');
+nicknameCell.contentEditable = 'false';
+typeCell.contentEditable = 'false';
+logMessage(`Canceled editing for ${contextMenuIp}.`, 'info');
+unifiedRefresh(); // Force a refresh to restore original values
+}
+};
+nicknameCell.addEventListener('blur', handleBlur, { once: true });
+typeCell.addEventListener('blur', handleBlur, { once: true });
+nicknameCell.addEventListener('keydown', handleKeydown);
+typeCell.addEventListener('keydown', handleKeydown);
+nicknameCell.focus();
+logMessage(`Editing mode for ${contextMenuIp}. Press Enter or click away to save. Press Esc to cancel.`, 'info');
+}
+document.getElementById('context-menu').style.display = 'none';
+}
+async function refreshMiner() {
+if (!contextMenuIp) return;
+logMessage(`Refreshing data for ${contextMenuIp}...`, 'info');
+const row = document.querySelector(`tr[data-ip="${contextMenuIp}"]`);
+if (!row) return;
+try {
+const data = await apiCall(`/api/miner-info/${contextMenuIp}`);
+applyDelta(contextMenuIp, Object.assign(data, { online: true }));
+} catch (error) {
+logMessage(`Failed to refresh miner ${contextMenuIp}. It may be offline.`, 'warning');
+}
+document.getElementById('context-menu').style.display = 'none';
+}
+async function restartMiner() {
+if (contextMenuIp) {
+await apiCall(`/api/restart-miner/${contextMenuIp}`, { method: 'POST' });
+}
+document.getElementById('context-menu').style.display = 'none';
+}
+async function openMinerWebUI() {
+if (contextMenuIp) {
+await apiCall(`/api/open-web-ui/${contextMenuIp}`);
+}
+document.getElementById('context-menu').style.display = 'none';
+}
+async function deleteMiner() {
+if (contextMenuIp && confirm(`Are you sure you want to delete miner ${contextMenuIp}?`)) {
+await apiCall(`/api/miners/${contextMenuIp}`, { method: 'DELETE' });
+unifiedRefresh();
+}
+document.getElementById('context-menu').style.display = 'none';
+}
+function openModal(id) { document.getElementById(id).style.display = 'block'; }
+function closeModal(id) { document.getElementById(id).style.display = 'none'; }
+function openScanModal() { openModal('scan-modal'); }
+function openAddMinerModal() { openModal('add-miner-modal'); }
+async function openGlobalSettings() {
+try {
+configData = await apiCall('/api/settings');
+const form = document.getElementById('global-settings-form');
+form.innerHTML = `
+<div class="grid grid-cols-2 gap-4">
+<p>Voltage Step (mV): <input type="number" id="gs-voltage_step" value="${configData.voltage_step || 10}"></p>
+<p>Frequency Step (MHz): <input type="number" id="gs-frequency_step" value="${configData.frequency_step || 5}"></p>
+<p>Monitor Interval (sec): <input type="number" id="gs-monitor_interval" value="${configData.monitor_interval || 10}"></p>
+<p>Default Target Temp (°C): <input type="number" id="gs-default_target_temp" value="${configData.default_target_temp || 85}"></p>
+<p>Temp Tolerance (°C): <input type="number" id="gs-temp_tolerance" value="${configData.temp_tolerance || 2}"></p>
+<p>Autotuner UI Refresh (sec): <input type="number" id="gs-refresh_interval" value="${configData.refresh_interval || 5}"></p>
+<p>Daily Reset Time (HH:MM): <input type="text" id="gs-daily_reset_time" value="${configData.daily_reset_time || '03:00'}"></p>
+<p>Flatline Repeat Count: <input type="number" id="gs-flatline_hashrate_repeat_count" value="${configData.flatline_hashrate_repeat_count || 5}"></p>
+<label class="flex items-center"><input type="checkbox" id="gs-enforce_safe_pairing" ${configData.enforce_safe_pairing ? 'checked' : ''}> Enforce Safe Tiers</label>
+<label class="flex items-center"><input type="checkbox" id="gs-daily_reset_enabled" ${configData.daily_reset_enabled ? 'checked' : ''}> Enable Daily Reset</label>
+<label class="flex items-center"><input type="checkbox" id="gs-flatline_detection_enabled" ${configData.flatline_detection_enabled ? 'checked' : ''}> Enable Flatline Detection</label>
+</div>`;
+openModal('global-settings-modal');
+} catch (error) { /* Already logged */ }
+}
+async function saveGlobalSettings() {
+configData.voltage_step = parseInt(document.getElementById('gs-voltage_step').value);
+configData.frequency_step = parseInt(document.getElementById('gs-frequency_step').value);
+configData.monitor_interval = parseInt(document.getElementById('gs-monitor_interval').value);
+configData.default_target_temp = parseInt(document.getElementById('gs-default_target_temp').value);
+configData.temp_tolerance = parseInt(document.getElementById('gs-temp_tolerance').value);
+configData.refresh_interval = parseInt(document.getElementById('gs-refresh_interval').value);
+configData.daily_reset_time = document.getElementById('gs-daily_reset_time').value;
+configData.flatline_hashrate_repeat_count = parseInt(document.getElementById('gs-flatline_hashrate_repeat_count').value);
+configData.enforce_safe_pairing = document.getElementById('gs-enforce_safe_pairing').checked;
+configData.daily_reset_enabled = document.getElementById('gs-daily_reset_enabled').checked;
+configData.flatline_detection_enabled = document.getElementById('gs-flatline_detection_enabled').checked;
+try {
+await apiCall('/api/settings', {
+method: 'POST',
+headers: { 'Content-Type': 'application/json' },
+body: JSON.stringify(configData)
+});
+logMessage('Global settings saved.', 'success');
+} finally {
+closeModal('global-settings-modal');
+}
+}
+async function openAutotunerSettings() {
+try {
+configData = await apiCall('/api/settings');
+const miners = configData.miners || [];
+const form = document.getElementById('autotuner-settings-form');
+let tableHTML = `<table class="w-full text-sm text-left text-gray-400">
+<thead class="text-xs uppercase bg-gray-700 text-gray-300">
+<tr>
+<th class="p-2">Enable</th>
+<th class="p-2">Miner</th>
+<th class="p-2">Min Freq</th>
+<th class="p-2">Max Freq</th>
+<th class="p-2">Start Freq</th>
+<th class="p-2">Min Volt</th>
+<th class="p-2">Max Volt</th>
+<th class="p-2">Start Volt</th>
+<th class="p-2">Max Temp</th>
+<th class="p-2">Max Watts</th>
+<th class="p-2">Max VR Temp</th>
+<th class="p-2">Actions</th>
+</tr>
+</thead><tbody>`;
+miners.forEach((miner, i) => {
+tableHTML += `<tr class="border-b border-gray-700">
+<td class="p-2"><input type="checkbox" id="at-enabled-${i}" ${miner.enabled ? 'checked' : ''}></td>
+<td class="p-2">${miner.nickname}(${miner.ip})</td>
+<td class="p-2"><input type="number" id="at-min_freq-${i}" value="${miner.min_freq || ''}" class="w-20"></td>
+<td class="p-2"><input type="number" id="at-max_freq-${i}" value="${miner.max_freq || ''}" class="w-20"></td>
+<td class="p-2"><input type="number" id="at-start_freq-${i}" value="${miner.start_freq || ''}" class="w-20"></td>
+<td class="p-2"><input type="number" id="at-min_volt-${i}" value="${miner.min_volt || ''}" class="w-20"></td>
+<td class="p-2"><input type="number" id="at-max_volt-${i}" value="${miner.max_volt || ''}" class="w-20"></td>
+<td class="p-2"><input type="number" id="at-start_volt-${i}" value="${miner.start_volt || ''}" class="w-20"></td>
+<td class="p-2"><input type="number" id="at-max_temp-${i}" value="${miner.max_temp || ''}" class="w-20"></td>
+<td class="p-2"><input type="number" id="at-max_watts-${i}" value="${miner.max_watts || ''}" class="w-20"></td>
+<td class="p-2"><input type="number" id="at-max_vr_temp-${i}" value="${miner.max_vr_temp || ''}" class="w-20"></td>
+<td class="p-2">
+<div class="flex gap-1">
+<button onclick="copyAutotunerRow(${i})" class="btn btn-small">Copy</button>
+<button onclick="pasteAutotunerRow(${i})" class="btn btn-small">Paste</button>
+</div>
+</td>
+</tr>`;
+});
+form.innerHTML = tableHTML + '</tbody></table>';
+openModal('autotuner-settings-modal');
+} catch (error) { /* Already logged */ }
+}
+function copyAutotunerRow(index) {
+autotunerClipboard = {
+min_freq: document.getElementById(`at-min_freq-${index}`).value,
+max_freq: document.getElementById(`at-max_freq-${index}`).value,
+start_freq: document.getElementById(`at-start_freq-${index}`).value,
+min_volt: document.getElementById(`at-min_volt-${index}`).value,
+max_volt: document.getElementById(`at-max_volt-${index}`).value,
+start_volt: document.getElementById(`at-start_volt-${index}`).value,
+max_temp: document.getElementById(`at-max_temp-${index}`).value,
+max_watts: document.getElementById(`at-max_watts-${index}`).value,
+max_vr_temp: document.getElementById(`at-max_vr_temp-${index}`).value,
+};
+logMessage(`Copied settings from row ${index + 1}.`, 'info');
+}
+function pasteAutotunerRow(index) {
+if (!autotunerClipboard) {
+logMessage('Clipboard is empty. Please copy a row first.', 'warning');
+return;
+}
+document.getElementById(`at-min_freq-${index}`).value = autotunerClipboard.min_freq;
+document.getElementById(`at-max_freq-${index}`).value = autotunerClipboard.max_freq;
+document.getElementById(`at-start_freq-${index}`).value = autotunerClipboard.start_freq;
+document.getElementById(`at-min_volt-${index}`).value = autotunerClipboard.min_volt;
+document.getElementById(`at-max_volt-${index}`).value = autotunerClipboard.max_volt;
+document.getElementById(`at-start_volt-${index}`).value = autotunerClipboard.start_volt;
+document.getElementById(`at-max_temp-${index}`).value = autotunerClipboard.max_temp;
+document.getElementById(`at-max_watts-${index}`).value = autotunerClipboard.max_watts;
+document.getElementById(`at-max_vr_temp-${index}`).value = autotunerClipboard.max_vr_temp;
+logMessage(`Pasted settings to row ${index + 1}.`, 'info');
+}
+async function saveAutotunerSettings() {
+const miners = configData.miners || [];
+miners.forEach((miner, i) => {
+miner.enabled = document.getElementById(`at-enabled-${i}`).checked;
+miner.min_freq = parseInt(document.getElementById(`at-min_freq-${i}`).value) || null;
+miner.max_freq = parseInt(document.getElementById(`at-max_freq-${i}`).value) || null;
+miner.start_freq = parseInt(document.getElementById(`at-start_freq-${i}`).value) || null;
+miner.min_volt = parseInt(document.getElementById(`at-min_volt-${i}`).value) || null;
+miner.max_volt = parseInt(document.getElementById(`at-max_volt-${i}`).value) || null;
+miner.start_volt = parseInt(document.getElementById(`at-start_volt-${i}`).value) || null;
+miner.max_temp = parseInt(document.getElementById(`at-max_temp-${i}`).value) || null;
+miner.max_watts = parseInt(document.getElementById(`at-max_watts-${i}`).value) || null;
+miner.max_vr_temp = parseInt(document.getElementById(`at-max_vr_temp-${i}`).value) || null;
+});
+try {
+await apiCall('/api/settings', {
+method: 'POST',
+headers: { 'Content-Type': 'application/json' },
+body: JSON.stringify(configData)
+});
+logMessage('Autotuner settings saved.', 'success');
+} finally {
+closeModal('autotuner-settings-modal');
+}
+}
+window.onload = function() {
+unifiedRefresh();
+if (window.EventSource) connectStream();
+fetchLogs();
+document.getElementById('miners-viewport').addEventListener('scroll', queueRender);
+window.addEventListener('resize', queueRender);
+document.querySelectorAll('#miners-table th[data-sort]').forEach(th => {
+th.addEventListener('click', () => sortBy(th.dataset.sort));
+});
+document.addEventListener('click', (e) => {
+if (!document.getElementById('context-menu').contains(e.target)) {
+document.getElementById('context-menu').style.display = 'none';
+}
+});
+setInterval(fetchLogs, 5000);
+setInterval(unifiedRefresh, window.EventSource ? 60000 : 15000);
+};
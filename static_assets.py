@@ -0,0 +1,111 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+
+try:
+    import brotli
+except ImportError:  # Optional: only needed to build .br variants
+    brotli = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIR = os.path.join(BASE_DIR, "assets")
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+MANIFEST_FILE = "manifest.json"
+SOURCES = ("dashboard.css", "dashboard.js", "fleet.js")
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+_manifest = None
+
+
+def minify_css(text):
+    text = re.sub(r"/\*.*?\*/", "", text, flags=re.S)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s*([{};,>])\s*", r"\1", text)
+    text = re.sub(r"\s*:\s*", ":", text)
+    return text.replace(";}", "}").strip()
+
+
+def minify_js(text):
+    """Conservative minification: drop comment-only lines, indentation and blank lines.
+
+    Nothing inside a line is rewritten, so strings, template literals and regular
+    expressions are left alone.
+    """
+    lines = (line.strip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line and not line.startswith("//")) + "\n"
+
+
+def build(log=print):
+    """Minify each source in assets/ into static/ under a content-hashed name, with gzip and brotli copies.
+
+    Writes static/manifest.json mapping each source name to its built file, and
+    removes builds of the same asset that are no longer referenced.
+    """
+    os.makedirs(STATIC_DIR, exist_ok=True)
+    manifest = {}
+    for name in SOURCES:
+        stem, ext = os.path.splitext(name)
+        with open(os.path.join(SOURCE_DIR, name), "r", encoding="utf-8") as f:
+            text = f.read()
+        data = (minify_css(text) if ext == ".css" else minify_js(text)).encode("utf-8")
+        built = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+        manifest[name] = built
+
+        with open(os.path.join(STATIC_DIR, built), "wb") as f:
+            f.write(data)
+        # mtime=0 so rebuilding unchanged sources gives byte-identical files
+        with open(os.path.join(STATIC_DIR, built + ".gz"), "wb") as f:
+            f.write(gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(os.path.join(STATIC_DIR, built + ".br"), "wb") as f:
+                f.write(brotli.compress(data, quality=11))
+
+        stale = re.compile(rf"^{re.escape(stem)}\.[0-9a-f]{{12}}{re.escape(ext)}(\.gz|\.br)?$")
+        for existing in os.listdir(STATIC_DIR):
+            if stale.match(existing) and not existing.startswith(built):
+                os.remove(os.path.join(STATIC_DIR, existing))
+        log(f"{name} -> static/{built} ({len(text)} -> {len(data)} bytes)")
+
+    with open(os.path.join(STATIC_DIR, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    if brotli is None:
+        log("brotli is not installed; built gzip variants only (pip install brotli to add .br files).")
+    return manifest
+
+
+def load_manifest():
+    global _manifest
+    if _manifest is None:
+        try:
+            with open(os.path.join(STATIC_DIR, MANIFEST_FILE), "r") as f:
+                _manifest = json.load(f)
+        except (OSError, ValueError):
+            _manifest = {}
+    return _manifest
+
+
+def asset_url(name):
+    """URL of the built copy of an asset, for templates."""
+    return f"/static/{load_manifest().get(name, name)}"
+
+
+def resolve(filename, accept_encoding):
+    """Path to serve for a built asset and its Content-Encoding (None for the plain file).
+
+    Only files listed in the manifest are served. The smallest precompressed
+    variant the client accepts is preferred.
+    """
+    if filename not in load_manifest().values():
+        return None, None
+    path = os.path.join(STATIC_DIR, filename)
+    accepted = {token.split(";")[0].strip().lower() for token in accept_encoding.split(",")}
+    for encoding, suffix in ENCODINGS:
+        if encoding in accepted and os.path.exists(path + suffix):
+            return path + suffix, encoding
+    return (path, None) if os.path.exists(path) else (None, None)
+
+
+if __name__ == "__main__":
+    build()
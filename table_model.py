@@ -0,0 +1,149 @@
+def _plain(value):
+    return value
+
+
+def _degrees(value):
+    return f"{value}°C"
+
+
+def _hashrate(value):
+    return f"{float(value):.2f} GH/s"
+
+
+def _watts(value):
+    return f"{float(value):.2f} W"
+
+
+# (heading, row key, formatter) for each Treeview column, in display order
+COLUMNS = (
+    ("Nickname", "nickname", _plain),
+    ("Type", "type", _plain),
+    ("IP", "ip", _plain),
+    ("Applied Freq", "frequency", _plain),
+    ("Current Voltage mVA", "coreVoltage", _plain),
+    ("Current Temp", "temp", _degrees),
+    ("VR Temp", "vrTemp", _degrees),
+    ("Current Hash Rate", "hashRate", _hashrate),
+    ("Current Watts", "power", _watts),
+)
+LIVE_KEYS = ("frequency", "coreVoltage", "temp", "vrTemp", "hashRate", "power", "ASICModel")
+FILTER_KEYS = ("nickname", "type", "ip", "ASICModel")
+
+
+class MinerTableModel:
+    """Rows for the desktop miner table, kept separate from the Treeview that shows them.
+
+    Config and live updates are merged per IP and only rows whose values actually
+    changed are marked dirty, so the view rewrites just those rows and cells. The
+    sorted and filtered order is cached and only rebuilt when the miner list, the
+    sort or filter settings, or a value they depend on changes.
+    """
+
+    def __init__(self):
+        self._rows = {}        # ip -> {key: raw value}
+        self._config_order = []
+        self._dirty = set()
+        self._view = None
+        self.sort_key = None   # None keeps config.json order
+        self.descending = False
+        self.filter_text = ""
+
+    def __contains__(self, bitaxe_ip):
+        return bitaxe_ip in self._rows
+
+    def ips(self):
+        """Every miner in config.json order, including ones hidden by the filter."""
+        return list(self._config_order)
+
+    def row(self, bitaxe_ip):
+        return self._rows[bitaxe_ip]
+
+    def set_miners(self, miners):
+        """Sync with the config.json miner list. Returns (added, removed) IPs."""
+        seen, seen_set = [], set()
+        added = []
+        for miner in miners:
+            ip = miner["ip"]
+            if ip in seen_set:
+                continue  # Duplicate config entry
+            seen.append(ip)
+            seen_set.add(ip)
+            config = {"nickname": miner.get("nickname", f"Miner-{ip}"), "type": miner.get("type"), "ip": ip}
+            row = self._rows.get(ip)
+            if row is None:
+                self._rows[ip] = dict(config, **{key: None for key in LIVE_KEYS})
+                added.append(ip)
+                self._dirty.add(ip)
+            elif any(row[key] != value for key, value in config.items()):
+                row.update(config)
+                self._dirty.add(ip)
+                self._view = None
+        removed = [ip for ip in self._rows if ip not in seen_set]
+        for ip in removed:
+            del self._rows[ip]
+            self._dirty.discard(ip)
+        if added or removed or seen != self._config_order:
+            self._view = None
+        self._config_order = seen
+        return added, removed
+
+    def update(self, bitaxe_ip, changes):
+        """Merge live values for a miner. Unknown miners and unchanged values are ignored."""
+        row = self._rows.get(bitaxe_ip)
+        if row is None:
+            return
+        for key in LIVE_KEYS:
+            if key in changes and changes[key] is not None and row[key] != changes[key]:
+                row[key] = changes[key]
+                self._dirty.add(bitaxe_ip)
+                if key == self.sort_key or (self.filter_text and key in FILTER_KEYS):
+                    self._view = None
+
+    def values(self, bitaxe_ip):
+        """Display strings for each column; "-" until a value has been read."""
+        row = self._rows[bitaxe_ip]
+        return tuple("-" if row[key] is None else str(fmt(row[key])) for _, key, fmt in COLUMNS)
+
+    def take_dirty(self):
+        """IPs whose displayed values may have changed since the last call."""
+        dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    def sort_by(self, key):
+        """Sort on a column; choosing the same column again flips the direction."""
+        if key == self.sort_key:
+            self.descending = not self.descending
+        else:
+            self.sort_key, self.descending = key, False
+        self._view = None
+
+    def set_filter(self, text):
+        text = text.strip().lower()
+        if text != self.filter_text:
+            self.filter_text = text
+            self._view = None
+
+    def view(self):
+        """IPs to show, filtered and sorted. Rows without a value for the sort column come last."""
+        if self._view is not None:
+            return self._view
+        ips = self._config_order
+        if self.filter_text:
+            ips = [ip for ip in ips
+                   if any(self.filter_text in str(self._rows[ip][key] or "").lower() for key in FILTER_KEYS)]
+        if self.sort_key is not None:
+            key = self.sort_key
+            present = [ip for ip in ips if self._rows[ip][key] is not None]
+            missing = [ip for ip in ips if self._rows[ip][key] is None]
+
+            def sort_value(ip):
+                value = self._rows[ip][key]
+                return value.lower() if isinstance(value, str) else value
+
+            try:
+                present.sort(key=sort_value, reverse=self.descending)
+            except TypeError:
+                present.sort(key=lambda ip: str(sort_value(ip)), reverse=self.descending)
+            ips = present + missing
+        self._view = list(ips)
+        return self._view
@@ -0,0 +1,140 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Fields pushed to dashboard clients
+FIELDS = ("frequency", "coreVoltage", "temp", "vrTemp", "hashRate", "power", "ASICModel")
+
+_lock = threading.Lock()
+_latest = {}        # ip -> {field: value, "online": bool, "updated": timestamp}
+_subscribers = set()
+_listeners = []
+_poller_started = False
+
+
+class Subscriber:
+    """One dashboard connection.
+
+    Changes are merged per miner until the connection drains them, so a slow client
+    holds at most one pending entry per miner rather than a growing queue.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._pending = {}
+
+    def push(self, bitaxe_ip, changes):
+        with self._cond:
+            self._pending.setdefault(bitaxe_ip, {}).update(changes)
+            self._cond.notify()
+
+    def drain(self, timeout):
+        """Wait up to timeout seconds for changes. Returns {ip: changes}, empty on timeout."""
+        with self._cond:
+            if not self._pending:
+                self._cond.wait(timeout)
+            pending, self._pending = self._pending, {}
+            return pending
+
+
+def _broadcast(bitaxe_ip, changes):
+    for subscriber in list(_subscribers):
+        subscriber.push(bitaxe_ip, changes)
+
+
+def publish(bitaxe_ip, info):
+    """Record a fresh /api/system/info reading and push the fields that changed."""
+    with _lock:
+        entry = _latest.setdefault(bitaxe_ip, {"online": False})
+        changes = {field: info.get(field) for field in FIELDS if entry.get(field) != info.get(field)}
+        if not entry["online"]:
+            changes["online"] = True
+        entry.update(changes)
+        entry["updated"] = time.time()
+        if changes:
+            _broadcast(bitaxe_ip, changes)
+    for listener in _listeners:
+        listener(bitaxe_ip, info)
+
+
+def publish_offline(bitaxe_ip):
+    """Mark a miner offline after a failed request."""
+    with _lock:
+        entry = _latest.setdefault(bitaxe_ip, {"online": True})
+        entry["updated"] = time.time()
+        if entry["online"]:
+            entry["online"] = False
+            _broadcast(bitaxe_ip, {"online": False})
+
+
+def forget(bitaxe_ip):
+    """Drop a miner that was removed from the config."""
+    with _lock:
+        _latest.pop(bitaxe_ip, None)
+        _broadcast(bitaxe_ip, {"removed": True})
+
+
+def _current():
+    return {ip: {k: v for k, v in entry.items() if k != "updated"} for ip, entry in _latest.items()}
+
+
+def snapshot():
+    """Latest known fields for every miner."""
+    with _lock:
+        return _current()
+
+
+def subscribe(subscriber=None):
+    """Register a dashboard connection. Returns (subscriber, snapshot) taken atomically."""
+    if subscriber is None:
+        subscriber = Subscriber()
+    with _lock:
+        _subscribers.add(subscriber)
+        return subscriber, _current()
+
+
+def unsubscribe(subscriber):
+    with _lock:
+        _subscribers.discard(subscriber)
+
+
+def add_listener(listener):
+    """Call listener(ip, info) with every reading published, after the lock is released.
+
+    Unlike subscribers, listeners see the full reading each time, not just the fields
+    that changed. They run on the thread that took the reading, so keep them fast.
+    """
+    with _lock:
+        if listener not in _listeners:
+            _listeners.append(listener)
+
+
+def start_poller(fetch, list_ips, interval_fn):
+    """Keep readings fresh while dashboards are connected (once per process).
+
+    Tuner threads already publish every reading they take. This poller only fetches
+    miners whose last reading is older than interval_fn() seconds, so an idle
+    dashboard still updates while autotuning is stopped, without doubling the
+    requests to miners that are being tuned. fetch is get_system_info, which
+    publishes the result itself.
+    """
+    global _poller_started
+    if _poller_started:
+        return
+    _poller_started = True
+
+    def poll_loop():
+        with ThreadPoolExecutor(max_workers=16, thread_name_prefix="telemetry-poll") as executor:
+            while True:
+                time.sleep(1)
+                with _lock:
+                    if not _subscribers:
+                        continue
+                    updated = {ip: entry.get("updated", 0) for ip, entry in _latest.items()}
+                interval = interval_fn()
+                now = time.time()
+                stale = [ip for ip in list_ips() if now - updated.get(ip, 0) >= interval]
+                if stale:
+                    list(executor.map(fetch, stale))
+
+    threading.Thread(target=poll_loop, name="telemetry-poller", daemon=True).start()
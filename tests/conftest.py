@@ -0,0 +1,78 @@
+import os
+import random
+import sys
+
+# The modules live at the repository root and read their data files relative to it
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import autotune  # noqa: E402
+from config import get_default_config  # noqa: E402
+from models import MinerConfig  # noqa: E402
+
+# Built from the defaults rather than config.json, so a local config cannot change test outcomes.
+# Background checks that need wall-clock time or their own threads are off unless a test turns them on.
+BASE_CONFIG = dict(get_default_config(), monitor_interval=5, refresh_interval=30, thermal_watchdog_enabled=False,
+                   calibration_enabled=False, share_tuning_enabled=False, flatline_detection_enabled=False)
+
+
+def make_config(miner, **settings):
+    """BASE_CONFIG with the given overrides and miner as its only miner."""
+    config = dict(BASE_CONFIG, **settings)
+    config["miners"] = [dict(miner)]
+    return config
+
+
+class FakeMiner(autotune.MinerApi):
+    """A simulated miner for driving tune_miner on a SimulatedClock.
+
+    Telemetry follows the settings written to it; any field passed as a keyword is
+    reported as that fixed value instead. It sets stop_event after polls readings.
+    """
+
+    def __init__(self, config, clock, stop_event, polls=20, voltage=1100, frequency=400, report_frequency=True,
+                 fail_every=0, **reading):
+        self.config = config
+        self.clock = clock
+        self.stop_event = stop_event
+        self.polls = polls
+        self.voltage, self.frequency = voltage, frequency
+        self.report_frequency = report_frequency
+        self.fail_every = fail_every
+        self.reading = reading
+        self.writes, self.fans = [], []
+        self.rng = random.Random(7)
+
+    def get_system_info(self, bitaxe_ip):
+        self.clock.now += 0.05  # Request latency
+        self.polls -= 1
+        if self.polls <= 0:
+            self.stop_event.set()
+        info = {"temp": round(45 + (self.frequency - 400) * 0.1 + self.rng.random(), 1), "vrTemp": 50,
+                "hashRate": round(self.frequency * 2.04 * (0.9 + self.rng.random() * 0.15), 1),
+                "power": round(self.frequency * 0.03, 2), "frequency": self.frequency,
+                "coreVoltage": self.voltage, "smallCoreCount": 2040, "asicCount": 1}
+        info.update(self.reading)
+        if not self.report_frequency:
+            del info["frequency"]
+        return info
+
+    def set_system_settings(self, bitaxe_ip, core_voltage, frequency):
+        self.writes.append((core_voltage, frequency))
+        if self.fail_every and len(self.writes) % self.fail_every == 0:
+            return f"{bitaxe_ip} -> Error setting system settings: timed out"
+        self.voltage, self.frequency = core_voltage, frequency
+        return f"{bitaxe_ip} -> Applied settings: Voltage = {core_voltage}mV, Frequency = {frequency}MHz"
+
+    def set_fan_speed(self, bitaxe_ip, fan_speed):
+        self.fans.append(fan_speed)
+        if fan_speed is not None:
+            self.reading["fanspeed"] = fan_speed
+        return f"{bitaxe_ip} -> Applied settings: Fan = {fan_speed}%"
+
+    def load_config(self):
+        return self.config
+
+    def load_miner(self, bitaxe_ip):
+        return MinerConfig.from_dict(self.config["miners"][0])
@@ -0,0 +1,226 @@
+import queue
+import threading
+
+import pytest
+
+import alerts
+from models import MinerConfig
+
+IP, OTHER = "10.99.11.1", "10.99.11.2"
+
+
+class Engine:
+    """The rule engine fed from an in-memory config; config.json is never touched."""
+
+    def __init__(self, monkeypatch):
+        self.config = {"alert_rules": [], "alert_sinks": []}
+        self.miners = {IP: MinerConfig(IP, nickname="one", group="rack"), OTHER: MinerConfig(OTHER, nickname="two")}
+        self.version = 0
+        monkeypatch.setattr(alerts, "load_config", lambda: self.config)
+        monkeypatch.setattr(alerts, "get_miner_configs", lambda: self.miners)
+        monkeypatch.setattr(alerts, "config_version", lambda: self.version)
+
+    def install(self, rules, sinks=(), now=0):
+        self.config = {"alert_rules": list(rules), "alert_sinks": list(sinks)}
+        self.version += 1
+        self.refresh(now)
+
+    def refresh(self, now):
+        alerts._settings_cache["loaded_at"] = now - 5
+        alerts._refresh(now)
+
+    def events(self):
+        found = []
+        while True:
+            try:
+                rule, ip, state, observed, _ = alerts._queue.get_nowait()
+            except queue.Empty:
+                return found
+            found.append((rule.name, ip, state, observed))
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    for name, value in (("_rules", {}), ("_by_ip", {}), ("_states", {}), ("_last_seen", {}), ("_sinks", []),
+                        ("_settings_cache", {"loaded_at": 0, "key": None}), ("_queue", queue.Queue(maxsize=1000)),
+                        ("_log_callback", lambda message, level: None)):
+        monkeypatch.setattr(alerts, name, value)
+    monkeypatch.setattr(alerts, "_stats", dict.fromkeys(alerts._stats, 0))
+    return Engine(monkeypatch)
+
+
+def hot(**rule):
+    return dict({"name": "hot", "field": "temp", "op": ">", "value": 65}, **rule)
+
+
+def test_threshold_fires_once_per_episode(engine):
+    engine.install([hot()])
+    alerts.observe(IP, {"temp": 60}, now=1)
+    alerts.observe(IP, {"temp": 70}, now=2)
+    alerts.observe(IP, {"temp": 72}, now=3)
+    assert engine.events() == [("hot", IP, "firing", 70)]
+    assert [(a["rule"], a["ip"], a["value"]) for a in alerts.active()] == [("hot", IP, 72)]
+
+    alerts.observe(IP, {"temp": 60}, now=4)
+    assert engine.events() == [("hot", IP, "resolved", 60)]
+    assert alerts.active() == []
+
+
+def test_readings_without_the_field_are_ignored(engine):
+    engine.install([hot()])
+    alerts.observe(IP, {"temp": None}, now=1)
+    alerts.observe(IP, {"temp": True}, now=2)
+    alerts.observe(IP, {}, now=3)
+    assert engine.events() == []
+
+
+def test_hysteresis_holds_until_the_clear_level(engine):
+    engine.install([hot(clear=60)])
+    alerts.observe(IP, {"temp": 66}, now=1)
+    alerts.observe(IP, {"temp": 64}, now=2)  # Below the trigger but not past the clear level
+    alerts.observe(IP, {"temp": 61}, now=3)
+    assert engine.events() == [("hot", IP, "firing", 66)]
+    alerts.observe(IP, {"temp": 60}, now=4)
+    assert engine.events() == [("hot", IP, "resolved", 60)]
+
+
+def test_for_needs_the_condition_to_hold_throughout(engine):
+    engine.install([hot(**{"for": 30})])
+    alerts.observe(IP, {"temp": 70}, now=0)
+    alerts.observe(IP, {"temp": 70}, now=20)
+    alerts.observe(IP, {"temp": 60}, now=25)  # A dip restarts the clock
+    alerts.observe(IP, {"temp": 70}, now=30)
+    alerts.observe(IP, {"temp": 70}, now=50)
+    assert engine.events() == []
+    alerts.observe(IP, {"temp": 70}, now=60)
+    assert engine.events() == [("hot", IP, "firing", 70)]
+
+
+def test_rate_is_smoothed(engine):
+    engine.install([{"name": "falling", "type": "rate", "field": "hashRate", "op": "<", "value": -100,
+                     "per": 60, "window": 60}])
+    now, hashrate = 0, 1000
+    for _ in range(10):
+        alerts.observe(IP, {"hashRate": hashrate}, now=now)
+        now += 10
+    # One sudden step of -180/min moves the average by only a sixth of it
+    hashrate -= 30
+    alerts.observe(IP, {"hashRate": hashrate}, now=now)
+    assert engine.events() == []
+    assert -40 < alerts._states[("falling", IP)].rate < -20
+
+    # A sustained fall gets through
+    for _ in range(10):
+        now, hashrate = now + 10, hashrate - 30
+        alerts.observe(IP, {"hashRate": hashrate}, now=now)
+    [(name, ip, state, rate)] = engine.events()
+    assert (name, ip, state) == ("falling", IP, "firing") and -180 < rate < -100
+
+
+def test_absence_fires_for_silent_miners_and_resolves_on_a_reading(engine):
+    engine.install([{"name": "silent", "type": "absence", "seconds": 60}], now=0)
+    alerts.observe(OTHER, {}, now=30)
+    alerts.check_absence(now=59)
+    assert engine.events() == []
+
+    alerts.check_absence(now=60)
+    assert engine.events() == [("silent", IP, "firing", 60)]
+    alerts.check_absence(now=80)
+    assert engine.events() == []  # Not fired again while it stays silent
+
+    alerts.observe(IP, {}, now=85)
+    assert engine.events() == [("silent", IP, "resolved", 0)]
+    alerts.check_absence(now=90)
+    assert engine.events() == [("silent", OTHER, "firing", 60)]
+
+
+def test_cooldown_suppresses_a_whole_episode(engine):
+    engine.install([hot(cooldown=300)])
+    alerts.observe(IP, {"temp": 70}, now=0)
+    alerts.observe(IP, {"temp": 60}, now=10)
+    assert [event[2] for event in engine.events()] == ["firing", "resolved"]
+
+    # Flapping inside the cooldown: neither the firing nor its resolution is sent
+    alerts.observe(IP, {"temp": 70}, now=20)
+    assert alerts.active()[0]["notified"] is False
+    alerts.observe(IP, {"temp": 60}, now=30)
+    assert engine.events() == []
+    assert alerts.stats()["suppressed"] == 1
+
+    alerts.observe(IP, {"temp": 70}, now=300)
+    assert engine.events() == [("hot", IP, "firing", 70)]
+
+
+def test_rules_cover_only_their_miners_and_groups(engine):
+    engine.install([hot(name="rack", groups=["rack"]), hot(name="two", miners=[OTHER])])
+    alerts.observe(IP, {"temp": 70}, now=1)
+    alerts.observe(OTHER, {"temp": 70}, now=1)
+    assert sorted(engine.events()) == [("rack", IP, "firing", 70), ("two", OTHER, "firing", 70)]
+
+
+def test_a_config_change_keeps_the_state_of_unchanged_rules(engine):
+    engine.install([hot(), hot(name="warm", value=60)])
+    alerts.observe(IP, {"temp": 70}, now=1)
+    assert len(engine.events()) == 2
+
+    engine.miners = dict(engine.miners, **{"10.99.11.3": MinerConfig("10.99.11.3")})
+    engine.install([hot(), hot(name="warm", value=62)], now=10)
+    alerts.observe(IP, {"temp": 70}, now=11)
+    alerts.observe("10.99.11.3", {"temp": 70}, now=11)
+    # "hot" is still firing on the first miner; "warm" changed, so it starts over
+    assert sorted(engine.events()) == [("hot", "10.99.11.3", "firing", 70), ("warm", IP, "firing", 70),
+                                       ("warm", "10.99.11.3", "firing", 70)]
+
+
+def test_miners_are_reloaded_when_only_the_miner_list_changes(engine):
+    engine.install([hot()])
+    engine.miners = {"10.99.11.3": MinerConfig("10.99.11.3")}
+    engine.refresh(now=10)
+    alerts.observe("10.99.11.3", {"temp": 70}, now=11)
+    assert engine.events() == []  # The file has not changed, so neither have the miners
+
+    engine.version += 1
+    engine.refresh(now=20)
+    alerts.observe("10.99.11.3", {"temp": 70}, now=21)
+    assert engine.events() == [("hot", "10.99.11.3", "firing", 70)]
+
+
+def test_invalid_rules_are_skipped(engine):
+    logs = []
+    alerts.set_log_callback(lambda message, level: logs.append(message))
+    engine.install([{"name": "broken", "field": "temp"}, hot()])
+    assert list(alerts._rules) == ["hot"]
+    assert logs == ["Alerts -> Error in rule 'broken': value is required"]
+
+
+class Recorder:
+    def __init__(self, options):
+        self.fail = options.get("fail", False)
+        self.sent = []
+        self.done = threading.Event()
+
+    def send(self, alert):
+        self.sent.append(alert)
+        self.done.set()
+        if self.fail:
+            raise RuntimeError("unreachable")
+
+
+def test_alerts_reach_the_sinks_their_rule_names(engine, monkeypatch):
+    monkeypatch.setitem(alerts.SINK_TYPES, "recorder", Recorder)
+    engine.install([hot(sinks=["broken", "pager"])], sinks=[
+        {"type": "recorder", "name": "broken", "fail": True},
+        {"type": "recorder", "name": "pager"},
+        {"type": "recorder", "name": "archive"},
+    ])
+    broken, pager, archive = (sink for _, sink in alerts._sinks)
+    threading.Thread(target=alerts._dispatch, daemon=True).start()
+
+    alerts.observe(IP, {"temp": 70}, now=1)
+    assert pager.done.wait(5)
+    [alert] = pager.sent
+    assert alert["rule"] == "hot" and alert["state"] == "firing" and alert["value"] == 70
+    assert alert["nickname"] == "one" and alert["group"] == "rack" and alert["threshold"] == 65
+    assert alert["message"] == f"{IP} -> ALERT hot: temp 70 > 65"
+    assert len(broken.sent) == 1 and alerts.stats()["sink_errors"] == 1  # Failed, but pager still got it
+    assert archive.sent == []
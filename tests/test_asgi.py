@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+import pytest
+
+import asgi
+import health
+
+IP = "10.99.12.1"
+
+
+class HangingClient:
+    """An httpx client whose requests never complete."""
+
+    def __init__(self):
+        self.started = asyncio.Event()
+
+    async def _hang(self, *args, **kwargs):
+        self.started.set()
+        await asyncio.sleep(3600)
+
+    get = post = _hang
+
+
+@pytest.fixture
+def open_circuit(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    monkeypatch.setattr(health, "_miners", {})
+    monkeypatch.setattr(health, "_settings", lambda: (3, 10, 40, 2))
+    monkeypatch.setattr(health, "_log_callback", lambda message, level: None)
+    for _ in range(3):
+        health.record_failure(IP, "timed out")
+    now[0] += 10  # Due for a probe
+    client = HangingClient()
+    monkeypatch.setattr(asgi, "_client", client)
+    return client
+
+
+@pytest.mark.parametrize("request_miner", [asgi.get_system_info, asgi.restart_bitaxe], ids=["info", "restart"])
+def test_a_cancelled_probe_lets_the_next_request_probe(open_circuit, request_miner):
+    async def cancel_probe():
+        probe = asyncio.ensure_future(request_miner(IP))
+        await open_circuit.started.wait()
+        assert health.before_request(IP, 10) is None  # The probe is in flight
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+    asyncio.run(cancel_probe())
+    assert health.is_open(IP)
+    assert health.before_request(IP, 10) == 2
@@ -0,0 +1,46 @@
+import threading
+
+import pytest
+
+import autotune
+import replay
+from conftest import FakeMiner, make_config
+from models import MinerConfig
+
+
+MINER = {"ip": "10.99.2.1", "enabled": True, "min_freq": 400, "max_freq": 600, "min_volt": 1100, "max_volt": 1250,
+         "max_temp": 65, "max_watts": 20, "max_vr_temp": 70, "start_freq": 550, "start_volt": 1150, "min_fan": 30,
+         "max_fan": 90}
+
+
+def tune(**reading):
+    """Tune a miner that reports fixed temperatures and power, whatever it is set to."""
+    config = make_config(MINER)
+    clock = replay.SimulatedClock(1_000_000.0)
+    stop_event = threading.Event()
+    reading = dict({"temp": 66, "vrTemp": 60, "power": 15, "hashRate": 1000, "autofanspeed": 0, "fanspeed": 50},
+                   **reading)
+    api = FakeMiner(config, clock, stop_event, voltage=1150, frequency=550, **reading)
+    logs = []
+    autotune.tune_miner(MinerConfig.from_dict(MINER), lambda message, level="info": logs.append(message),
+                        stop_event=stop_event, clock=clock, api=api)
+    return api, [getattr(message, "event", None) for message in logs]
+
+
+def test_fan_instead_of_drop_when_only_chip_is_hot():
+    api, events = tune()
+    assert "fan_instead_of_drop" in events
+    assert all(frequency == 550 for _, frequency in api.writes)
+    assert max(fan for fan in api.fans if fan is not None) > 50
+
+
+@pytest.mark.parametrize("reading", [{"vrTemp": 75}, {"power": 22}], ids=["vr_temp", "power"])
+def test_other_limits_still_drop_the_tier(reading):
+    api, events = tune(**reading)
+    assert "fan_instead_of_drop" not in events
+    assert any(frequency < 550 for _, frequency in api.writes)
+
+
+def test_unreported_fan_speed_starts_at_max_fan():
+    api, events = tune(fanspeed=None, temp=50)
+    assert api.fans[0] == 90
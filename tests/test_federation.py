@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+import federation
+
+SITES = {"http://a": [{"ip": "10.99.13.1"}], "http://b": [{"ip": "10.99.13.2"}, {"ip": "10.99.13.3"}]}
+
+
+class Response:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+def fake_get(url, timeout):
+    base, _, path = url.partition("/api/")
+    if path == "miners":
+        return Response(SITES[base])
+    return Response({"hashRate": 1000, "power": 15, "temp": 60})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    monkeypatch.setattr(federation.requests, "get", fake_get)
+    monkeypatch.setattr(federation, "_cache", {})
+    monkeypatch.setattr(federation, "_inflight", {})
+    monkeypatch.setattr(federation, "_executor", None)
+    monkeypatch.setattr(federation, "_executor_workers", None)
+    return now
+
+
+def config(*urls, **settings):
+    return dict({"federation_sites": [{"name": url, "url": url} for url in urls], "federation_deadline": 5},
+                **settings)
+
+
+def test_entries_of_removed_sites_are_evicted(clock):
+    fleet = federation.get_fleet(config("http://a", "http://b"))
+    assert fleet["totals"]["online"] == 3
+    assert len(federation._cache) == 5
+
+    clock[0] += 200
+    federation.get_fleet(config("http://a"))  # Site b removed
+    assert len(federation._cache) == 5  # Not yet past federation_cache_max_age
+
+    clock[0] += 200
+    federation.get_fleet(config("http://a"))
+    assert sorted(federation._cache) == ["http://a/api/miner-info/10.99.13.1", "http://a/api/miners"]
+
+
+def test_a_site_that_stays_down_keeps_its_last_data(clock, monkeypatch):
+    federation.get_fleet(config("http://a"))
+
+    def unreachable(url, timeout):
+        raise federation.requests.exceptions.ConnectionError("refused")
+
+    monkeypatch.setattr(federation.requests, "get", unreachable)
+    for _ in range(10):
+        clock[0] += 60
+        fleet = federation.get_fleet(config("http://a"))
+    # Failed fetches still count as fetches, so the stale data is kept and shown
+    assert fleet["sites"]["http://a"]["status"] == "stale"
+    assert fleet["sites"]["http://a"]["error"] == "refused"
+    assert fleet["miners"][0]["online"] and fleet["miners"][0]["stale"]
+
+
+def test_executor_follows_the_configured_concurrency(clock):
+    federation.get_fleet(config("http://a", federation_max_concurrency=2))
+    first = federation._executor
+    assert first._max_workers == 2
+
+    clock[0] += 60
+    federation.get_fleet(config("http://a", federation_max_concurrency=2))
+    assert federation._executor is first
+
+    clock[0] += 60
+    fleet = federation.get_fleet(config("http://a", federation_max_concurrency=4))
+    assert federation._executor._max_workers == 4
+    assert fleet["sites"]["http://a"]["status"] == "ok"
@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+
+import autotune
+import fleet_engine
+from fleet_engine import FleetTuner, check_against_scalar
+from models import MinerConfig
+
+
+@pytest.mark.parametrize("enforce_tiers", [True, False], ids=["tiers", "no_tiers"])
+@pytest.mark.parametrize("seed", range(3))
+def test_engine_matches_decide_step(seed, enforce_tiers):
+    mismatches, _, _ = check_against_scalar(miners=2000, seed=seed, enforce_tiers=enforce_tiers)
+    assert mismatches == []
+
+
+def run_fleet(monkeypatch, miners, fetch, ticks=3):
+    """Run a FleetTuner for a few ticks against fetch instead of real miners."""
+    config = {"monitor_interval": 0.01, "refresh_interval": 0, "enforce_safe_pairing": False,
+              "thermal_watchdog_enabled": False, "flatline_detection_enabled": False}
+    stop_event = threading.Event()
+    calls = []
+
+    def get_system_info(bitaxe_ip):
+        calls.append(bitaxe_ip)
+        if len(calls) >= ticks * len(miners):
+            stop_event.set()
+        return fetch(bitaxe_ip)
+
+    monkeypatch.setattr(fleet_engine, "load_config", lambda: config)
+    monkeypatch.setattr(fleet_engine, "get_system_info", get_system_info)
+    monkeypatch.setattr(autotune, "set_system_settings", lambda ip, voltage, frequency: f"{ip} -> Applied settings")
+    logs = []
+    FleetTuner(miners, lambda message, level="info": logs.append((str(message), level)), stop_event).run()
+    return calls, logs
+
+
+def miner(ip, **overrides):
+    fields = dict(min_freq=400, max_freq=600, min_volt=1100, max_volt=1250, max_temp=65, max_watts=20)
+    fields.update(overrides)
+    return MinerConfig(ip, **fields)
+
+
+def reading(bitaxe_ip):
+    return {"temp": 55, "vrTemp": 50, "hashRate": 900, "power": 15, "frequency": 400, "coreVoltage": 1100,
+            "smallCoreCount": 2040, "asicCount": 1}
+
+
+def test_miners_missing_limits_are_skipped(monkeypatch):
+    calls, logs = run_fleet(monkeypatch, [miner("10.99.6.1"), miner("10.99.6.2", max_watts=None)], reading)
+    assert set(calls) == {"10.99.6.1"}
+    assert ("10.99.6.2 -> Missing AutoTuner settings. Skipping tuning.", "error") in logs
+
+
+def test_a_failing_tick_does_not_stop_the_tuner(monkeypatch):
+    failures = [1]
+
+    def fetch(bitaxe_ip):
+        if failures:
+            failures.pop()
+            raise RuntimeError("boom")
+        return reading(bitaxe_ip)
+
+    calls, logs = run_fleet(monkeypatch, [miner("10.99.6.3")], fetch)
+    assert len(calls) == 3
+    assert ("Fleet tuner -> UNCAUGHT ERROR: boom", "error") in logs
+
+
+def test_a_moved_miner_keeps_its_row_at_the_new_address(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+
+    def fetch(bitaxe_ip):
+        now[0] += 2
+        return reading(bitaxe_ip)
+
+    moved = miner("10.99.6.6", mac="aa:05")
+    monkeypatch.setattr(fleet_engine, "moved_miner", lambda m: moved if m.ip == "10.99.6.5" else None)
+    calls, logs = run_fleet(monkeypatch, [miner("10.99.6.5", mac="aa:05")], fetch, ticks=8)
+
+    assert calls[0] == "10.99.6.5" and calls[-1] == "10.99.6.6"
+    assert ("10.99.6.5 -> Miner moved to 10.99.6.6. Tuning it there.", "warning") in logs
+    assert not autotune.is_tuned("10.99.6.5") and not autotune.is_tuned("10.99.6.6")
@@ -0,0 +1,58 @@
+import tracemalloc
+
+import pytest
+
+import headless
+from models import MinerConfig
+
+MINERS = {ip: MinerConfig(ip, enabled=True) for ip in ("10.99.8.1", "10.99.8.2")}
+
+
+@pytest.fixture
+def start(monkeypatch):
+    started = {"fleet": [], "single": []}
+
+    class FleetTuner:
+        def __init__(self, miners, log_callback):
+            started["fleet"].extend(m.ip for m in miners)
+
+        def run(self):
+            pass
+
+    def start_autotuning(config):
+        monkeypatch.setattr(headless, "load_config", lambda: config)
+        monkeypatch.setattr(headless, "get_miner_configs", lambda: MINERS)
+        monkeypatch.setattr(headless, "FleetTuner", FleetTuner)
+        monkeypatch.setattr(headless, "start_miner_tuner", lambda miner: started["single"].append(miner.ip))
+        monkeypatch.setattr(headless, "autotune_running", False)
+        monkeypatch.setattr(headless, "log_message", lambda *args: None)
+        response = headless.app.test_client().post("/api/autotune/start")
+        assert response.status_code == 200
+        return started
+
+    return start_autotuning
+
+
+def test_fleet_tuner_is_used_without_share_tuning(start):
+    started = start({"fleet_engine_enabled": True, "share_tuning_enabled": False})
+    assert sorted(started["fleet"]) == sorted(MINERS) and started["single"] == []
+
+
+def test_share_tuning_keeps_per_miner_tuners(start):
+    started = start({"fleet_engine_enabled": True})
+    assert started["fleet"] == [] and sorted(started["single"]) == sorted(MINERS)
+
+
+def test_reading_memory_diagnostics_does_not_start_tracing(monkeypatch):
+    monkeypatch.setattr(headless, "load_config", lambda: {"diagnostics_enabled": True})
+    client = headless.app.test_client()
+    try:
+        assert client.get("/api/diagnostics/memory").get_json() == {"tracing": False, "top": []}
+        assert not tracemalloc.is_tracing()
+
+        assert client.post("/api/diagnostics/memory?frames=5").status_code == 200
+        assert client.post("/api/diagnostics/memory").status_code == 409
+        assert client.get("/api/diagnostics/memory?top=5").get_json()["tracing"] is True
+    finally:
+        client.delete("/api/diagnostics/memory")
+    assert not tracemalloc.is_tracing()
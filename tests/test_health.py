@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+import health
+
+IP = "10.99.4.1"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    monkeypatch.setattr(health, "_miners", {})
+    monkeypatch.setattr(health, "_settings", lambda: (3, 10, 40, 2))  # threshold, backoff base, max, probe timeout
+    logs = []
+    monkeypatch.setattr(health, "_log_callback", lambda message, level: logs.append((message, level)))
+    return now, logs
+
+
+def test_opens_after_threshold_and_fails_fast(clock):
+    now, logs = clock
+    health.record_failure(IP, "timed out")
+    assert health.before_request(IP, 10) == 10
+    health.record_failure(IP, "timed out")
+    health.record_failure(IP, "timed out")
+    assert health.is_open(IP)
+    assert health.before_request(IP, 10) is None
+    assert [level for _, level in logs] == ["warning", "error"]  # Each state change is logged once
+
+
+def test_single_probe_with_doubling_backoff(clock):
+    now, _ = clock
+    for _ in range(3):
+        health.record_failure(IP, "timed out")
+    retry_waits = []
+    for _ in range(4):
+        opened_at = now[0]
+        while health.before_request(IP, 10) is None:
+            now[0] += 1
+        retry_waits.append(now[0] - opened_at)
+        assert health.before_request(IP, 10) is None  # Only one probe at a time
+        health.record_failure(IP, "timed out")
+    assert retry_waits == [10, 20, 40, 40]
+
+
+def test_probe_uses_short_timeout_and_success_closes(clock):
+    now, logs = clock
+    for _ in range(3):
+        health.record_failure(IP, "timed out")
+    now[0] += 10
+    assert health.before_request(IP, 10) == 2
+    health.record_success(IP)
+    assert not health.is_open(IP)
+    assert health.before_request(IP, 10) == 10
+    assert logs[-1][1] == "success"
+    assert health.get_health()[IP]["failures"] == 0
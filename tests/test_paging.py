@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from paging import parse_query, query_rows
+
+
+def make_rows(count, seed=0):
+    rng = random.Random(seed)
+    return [{"ip": f"10.99.5.{i}", "nickname": f"miner-{i}", "type": rng.choice(["Gamma", "Supra"]),
+             "group": rng.choice(["a", "b"]), "online": rng.choice([True, False, None]),
+             "temp": rng.choice([None, 55, 60, 65]), "hashRate": rng.choice([None, 900.0, 1000.0]),
+             "ASICModel": "BM1370"} for i in range(count)]
+
+
+def walk(rows, **args):
+    """Every page of a query, following next cursors."""
+    seen, cursor = [], None
+    while True:
+        query = parse_query(dict(args, cursor=cursor) if cursor else args)
+        page, cursor, total = query_rows(rows, query)
+        seen.extend(row["ip"] for row in page)
+        if cursor is None:
+            return seen, total
+
+
+@pytest.mark.parametrize("sort", ["ip", "temp", "-temp", "hashrate", "-hashrate", "nickname"])
+def test_pages_cover_every_row_once_in_order(sort):
+    rows = make_rows(57)
+    seen, total = walk(rows, sort=sort, limit="7")
+    everything, _, _ = query_rows(rows, parse_query({"sort": sort}))
+    assert seen == [row["ip"] for row in everything]
+    assert total == 57 and len(set(seen)) == 57
+
+
+def test_rows_without_a_value_sort_last_in_both_directions():
+    rows = make_rows(30)
+    for sort in ("temp", "-temp"):
+        seen, _ = walk(rows, sort=sort, limit="4")
+        values = [next(row["temp"] for row in rows if row["ip"] == ip) for ip in seen]
+        first_missing = values.index(None)
+        assert all(value is None for value in values[first_missing:])
+
+
+def test_inserted_rows_do_not_shift_later_pages():
+    rows = make_rows(20)
+    page, cursor, _ = query_rows(rows, parse_query({"sort": "temp", "limit": "5"}))
+    # A miner sorting before the cursor appears between requests
+    rows.append(dict(rows[0], ip="10.99.5.0a", temp=-1))
+    rest, _ = walk(rows, sort="temp", limit="5", cursor=cursor)
+    before = [row["ip"] for row in page]
+    assert not set(before) & set(rest)
+    assert len(before) + len(rest) == 20
+
+
+def test_filters():
+    rows = make_rows(40)
+    seen, total = walk(rows, status="online", group="a", limit="3")
+    expected = [row["ip"] for row in rows if row["online"] is True and row["group"] == "a"]
+    assert sorted(seen) == sorted(expected) and total == len(expected)
+
+
+@pytest.mark.parametrize("args", [{"limit": "0"}, {"limit": "x"}, {"sort": "bogus"}, {"status": "up"},
+                                  {"cursor": "not-a-cursor"}])
+def test_invalid_queries_are_rejected(args):
+    with pytest.raises(ValueError):
+        query_rows(make_rows(3), parse_query(args))
@@ -0,0 +1,89 @@
+import pytest
+
+import power_budget
+
+TIERS = [
+    {"frequency_(mhz)": 400, "voltage": 1100},
+    {"frequency_(mhz)": 450, "voltage": 1150},
+    {"frequency_(mhz)": 500, "voltage": 1200},
+    {"frequency_(mhz)": 550, "voltage": 1250},
+]
+CONFIG = {"power_budgets": {"shelf": 25}, "power_budget_rebalance_interval": 30, "power_budget_max_moves": 10}
+
+
+@pytest.fixture(autouse=True)
+def fresh(monkeypatch):
+    monkeypatch.setattr(power_budget, "_readings", {})
+    monkeypatch.setattr(power_budget, "_allocations", {})
+    monkeypatch.setattr(power_budget, "_last_rebalance", {})
+
+
+def report(ip, now, config=CONFIG, group="shelf", frequency=500, power=15):
+    """A miner reading 15 W / 1000 GH/s at 500 MHz, 1200 mV."""
+    power_budget.report_reading(ip, config, group, TIERS, frequency, 1200, power, 1000, 400, 550, now=now)
+
+
+def predicted_power(ip):
+    reading = power_budget._readings[ip]
+    tier = next(t for t in TIERS if t["frequency_(mhz)"] == power_budget.get_frequency_cap(ip))
+    return power_budget._predict(reading, tier)[0]
+
+
+def test_a_lone_miner_spends_the_headroom():
+    report("10.0.0.1", now=100)
+    assert power_budget.get_frequency_cap("10.0.0.1") == 550
+    assert predicted_power("10.0.0.1") <= 25
+
+
+def test_the_group_is_held_under_the_budget():
+    report("10.0.0.1", now=100)
+    report("10.0.0.2", now=101)  # Inside the rebalance interval: nothing moves yet
+    assert power_budget.get_frequency_cap("10.0.0.2") is None
+
+    report("10.0.0.1", now=140)
+    assert power_budget.get_frequency_cap("10.0.0.1") == 450
+    assert power_budget.get_frequency_cap("10.0.0.2") == 450
+    assert predicted_power("10.0.0.1") + predicted_power("10.0.0.2") <= 25
+
+
+def test_max_moves_limits_each_rebalance():
+    config = dict(CONFIG, power_budget_max_moves=1)
+    report("10.0.0.1", now=100, config=config)
+    report("10.0.0.2", now=101, config=config)
+    report("10.0.0.1", now=140, config=config)
+    caps = [power_budget.get_frequency_cap(ip) for ip in ("10.0.0.1", "10.0.0.2")]
+    assert caps == [500, 500]  # 550 -> 500 is the one step, still over budget
+
+    report("10.0.0.1", now=180, config=config)
+    caps = [power_budget.get_frequency_cap(ip) for ip in ("10.0.0.1", "10.0.0.2")]
+    assert sorted(caps) == [450, 500]
+
+
+def test_a_forgotten_miner_frees_its_share_at_once():
+    report("10.0.0.1", now=100)
+    report("10.0.0.2", now=101)
+    report("10.0.0.1", now=140)
+    assert power_budget.get_frequency_cap("10.0.0.1") == 450
+
+    power_budget.forget_miner("10.0.0.2")
+    assert power_budget._last_rebalance == {}
+    assert power_budget.get_frequency_cap("10.0.0.2") is None
+
+    report("10.0.0.1", now=141, frequency=450, power=12.4)  # Well inside the interval
+    assert power_budget.get_frequency_cap("10.0.0.1") == 550
+
+
+def test_a_stale_miner_counts_as_a_fixed_load():
+    report("10.0.0.1", now=100, power=20)
+    report("10.0.0.2", now=101)
+    # 10.0.0.1 stops reporting; its 20 W stays reserved and 10.0.0.2 is cut to fit the rest
+    report("10.0.0.2", now=300)
+    assert power_budget.get_frequency_cap("10.0.0.2") == 400
+    assert power_budget.get_frequency_cap("10.0.0.1") == 550  # Last allocation, left untouched
+
+
+def test_miners_without_a_budget_are_forgotten():
+    report("10.0.0.1", now=100)
+    report("10.0.0.1", now=200, group="rack")
+    assert power_budget.get_frequency_cap("10.0.0.1") is None
+    assert "10.0.0.1" not in power_budget._readings
@@ -0,0 +1,77 @@
+import autotune
+
+
+class Miner:
+    def __init__(self, fail=0):
+        self.fail = fail
+        self.writes = []
+
+    def set_system_settings(self, bitaxe_ip, core_voltage, frequency):
+        self.writes.append((core_voltage, frequency))
+        if self.fail:
+            self.fail -= 1
+            return f"{bitaxe_ip} -> Error setting system settings: timed out"
+        return f"{bitaxe_ip} -> Applied settings: Voltage = {core_voltage}mV, Frequency = {frequency}MHz"
+
+
+def reconciler(api, **options):
+    logs = []
+    rec = autotune.SettingsReconciler("10.99.3.1", lambda message, level="info": logs.append(message), api=api,
+                                      **options)
+    return rec, logs
+
+
+def reading(voltage, frequency):
+    return {"coreVoltage": voltage, "frequency": frequency}
+
+
+def test_writes_only_when_reported_settings_differ():
+    api = Miner()
+    rec, _ = reconciler(api)
+    rec.set_desired(1150, 500, now=0)
+    assert not rec.reconcile(reading(1150, 500), now=1)
+    assert api.writes == []
+
+    rec.set_desired(1160, 505, now=2)
+    assert rec.reconcile(reading(1150, 500), now=2)
+    assert not rec.reconcile(reading(1160, 505), now=7)  # Verified, nothing to send
+    assert api.writes == [(1160, 505)]
+
+
+def test_coalesces_changes_into_one_write():
+    api = Miner()
+    rec, _ = reconciler(api, coalesce_seconds=10)
+    rec.set_desired(1160, 505, now=0)
+    assert not rec.reconcile(reading(1150, 500), now=1)
+    rec.set_desired(1170, 510, now=5)
+    assert not rec.reconcile(reading(1150, 500), now=10)
+    assert rec.reconcile(reading(1150, 500), now=15)
+    assert api.writes == [(1170, 510)]
+
+
+def test_failed_writes_back_off_exponentially():
+    api = Miner(fail=3)
+    rec, _ = reconciler(api, retry_base=5, retry_max=300)
+    rec.set_desired(1160, 505, now=0)
+    sent_at = [now for now in range(0, 40) if rec.reconcile(reading(1150, 500), now=now)]
+    assert sent_at == [0, 5, 15, 35]  # Waits of 5, 10 and 20 seconds
+
+
+def test_unverified_write_is_retried_after_backoff():
+    api = Miner()
+    rec, logs = reconciler(api, retry_base=5)
+    rec.set_desired(1160, 505, now=0)
+    assert rec.reconcile(reading(1150, 500), now=0)
+    assert not rec.reconcile(reading(1150, 500), now=5)  # Miner did not take it: log drift, wait
+    assert any(getattr(message, "event", None) == "drift" for message in logs)
+    assert rec.reconcile(reading(1150, 500), now=10)
+    assert api.writes == [(1160, 505), (1160, 505)]
+
+
+def test_manual_change_is_corrected():
+    api = Miner()
+    rec, _ = reconciler(api)
+    rec.set_desired(1150, 500, now=0)
+    assert not rec.reconcile(reading(1150, 500), now=0)
+    assert rec.reconcile(reading(1200, 575), now=5)
+    assert api.writes == [(1150, 500)]
@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+import autotune
+import config
+import replay
+from conftest import FakeMiner, make_config
+from models import MinerConfig
+
+LIMITS = {"enabled": True, "min_freq": 400, "max_freq": 600, "min_volt": 1100, "max_volt": 1250, "max_temp": 65,
+          "max_watts": 25, "start_freq": 450, "start_volt": 1150}
+
+
+@pytest.fixture
+def miners(monkeypatch):
+    configured = {}
+    monkeypatch.setattr(config, "get_miner_configs", lambda: configured)
+    return configured
+
+
+def test_a_miner_at_its_own_address_has_not_moved(miners):
+    miner = MinerConfig("10.99.14.1", mac="aa:01")
+    miners.update({"10.99.14.1": miner, "10.99.14.9": MinerConfig("10.99.14.9", mac="aa:09")})
+    assert config.moved_miner(miner) is None
+
+
+def test_a_moved_miner_is_found_by_mac_then_hostname(miners):
+    moved = MinerConfig("10.99.14.2", mac="aa:01")
+    miners.update({"10.99.14.2": moved})
+    assert config.moved_miner(MinerConfig("10.99.14.1", mac="aa:01")) is moved
+
+    renamed = MinerConfig("10.99.14.4", hostname="bitaxe-4")
+    miners.update({"10.99.14.4": renamed, "10.99.14.3": MinerConfig("10.99.14.3", hostname="bitaxe-3")})
+    assert config.moved_miner(MinerConfig("10.99.14.3", hostname="bitaxe-4")) is renamed
+    assert config.moved_miner(MinerConfig("10.99.14.5")) is None  # No identity to match on
+
+
+class Site:
+    """One FakeMiner per address; the one at OLD reports that the miner moved to NEW after a few polls."""
+
+    OLD, NEW = "10.99.14.1", "10.99.14.2"
+
+    def __init__(self, stop_event, clock):
+        self.stop_event, self.clock = stop_event, clock
+        self.apis = {}
+
+    def api_for(self, ip):
+        site = self
+        config = make_config(dict(LIMITS, ip=ip, mac="aa:01"))
+
+        class Miner(FakeMiner):
+            def find_moved(self, miner):
+                if ip == site.OLD and self.polls <= 15:
+                    return MinerConfig.from_dict(dict(LIMITS, ip=site.NEW, mac="aa:01"))
+                return None
+
+        self.apis[ip] = Miner(config, self.clock, self.stop_event)
+        return self.apis[ip]
+
+
+def test_a_moved_miner_is_tuned_at_its_new_address():
+    clock = replay.SimulatedClock(1_000_000.0)
+    stop_event = autotune.new_stop_event()
+    site, logs = Site(stop_event, clock), []
+    thread = threading.Thread(target=autotune.run_tuner,
+                              args=(MinerConfig.from_dict(dict(LIMITS, ip=Site.OLD, mac="aa:01")),
+                                    lambda message, level="info": logs.append(str(message)), stop_event),
+                              kwargs={"api_for": site.api_for, "clock": clock})
+    thread.start()
+    thread.join(10)
+
+    assert list(site.apis) == [Site.OLD, Site.NEW]
+    assert site.apis[Site.NEW].polls <= 0  # Ran until its own stop
+    assert f"{Site.OLD} -> Miner moved to {Site.NEW}. Restarting its tuner there." in logs
+    assert not autotune.is_tuned(Site.OLD) and not autotune.is_tuned(Site.NEW)
+    assert stop_event not in autotune._stop_events
+
+
+def test_stop_autotuning_reaches_a_tuner_across_the_move(monkeypatch):
+    clock = replay.SimulatedClock(1_000_000.0)
+    stop_event = autotune.new_stop_event()
+    site = Site(stop_event, clock)
+    registered = []
+    real_tune_miner = autotune.tune_miner
+
+    def tune_miner(miner, *args, **kwargs):
+        registered.append(stop_event in autotune._stop_events)
+        return real_tune_miner(miner, *args, **kwargs)
+
+    monkeypatch.setattr(autotune, "tune_miner", tune_miner)
+    autotune.run_tuner(MinerConfig.from_dict(dict(LIMITS, ip=Site.OLD, mac="aa:01")), lambda *args: None,
+                       stop_event, api_for=site.api_for, clock=clock)
+    assert registered == [True, True]  # Never unregistered between the two runs
@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+
+import autotune
+import calibration
+import replay
+from conftest import FakeMiner, make_config
+from models import MinerConfig
+
+
+class RecordedMiner(replay.RecordingApi, FakeMiner):
+    def __init__(self, directory, config, clock, stop_event, **miner):
+        FakeMiner.__init__(self, config, clock, stop_event, **miner)
+        replay.RecordingApi.__init__(self, config["miners"][0]["ip"], config, directory, clock=clock)
+
+
+@pytest.fixture(autouse=True)
+def calibration_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(calibration, "CALIBRATION_DIR", str(tmp_path / "calibration"))
+    monkeypatch.setattr(calibration, "_pending", {})
+
+
+def record(tmp_path, ip, polls=200, **miner):
+    config = make_config({"ip": ip, "enabled": True, "min_freq": 400, "max_freq": 600, "min_volt": 1100,
+                          "max_volt": 1250, "max_temp": 65, "max_watts": 25, "start_freq": 450, "start_volt": 1150},
+                         settings_retry_base=5, calibration_enabled=True)
+    clock = replay.SimulatedClock(time.time())
+    stop_event = threading.Event()
+    api = RecordedMiner(str(tmp_path), config, clock, stop_event, polls=polls, **miner)
+    autotune.tune_miner(MinerConfig.from_dict(config["miners"][0]), lambda message, level="info": None,
+                        stop_event=stop_event, clock=clock, api=api)
+    return api.path
+
+
+@pytest.mark.parametrize("miner", [
+    {},
+    {"report_frequency": False},
+    {"fail_every": 3},
+], ids=["obedient", "no_frequency_reported", "failing_writes"])
+def test_replay_matches_recording(tmp_path, monkeypatch, miner):
+    path = record(tmp_path, "10.99.0.1", **miner)
+    _, _, recorded = replay.load_recording(path)
+
+    # Recordings are replayed long after they were made; nothing in the replay may depend on the wall clock
+    wall = time.time
+    monkeypatch.setattr(time, "time", lambda: wall() + 3600)
+    result = replay.replay(path)
+
+    assert len(recorded) > 5
+    assert result["divergence"] is None
+    assert len(result["decisions"]) == len(recorded)
+    assert result["decisions"][0]["voltage"] == 1150
+
+
+def test_calibration_is_stamped_with_the_tuner_clock(tmp_path):
+    path = record(tmp_path, "10.99.0.2")
+    header, samples, _ = replay.load_recording(path)
+    with open(calibration.observations_path("10.99.0.2")) as f:
+        stamps = [int(line.split(",")[0]) for line in f.readlines()[1:]]
+
+    assert len(stamps) > 5
+    # The recording spans about 1000 simulated seconds but only a moment of wall-clock time
+    assert header["started"] + samples[0][0] - 1 <= stamps[0] and stamps[-1] <= header["started"] + samples[-1][0]
+    assert stamps[-1] - stamps[0] > 500
@@ -0,0 +1,139 @@
+import threading
+import time
+
+import pytest
+
+import autotune
+import sharding
+from models import MinerConfig
+
+CONFIG = {"shard_lease_ttl": 30, "shard_node_ttl": 10, "shard_heartbeat_interval": 0.01}
+MINERS = {f"10.99.7.{i}": MinerConfig(f"10.99.7.{i}", enabled=True) for i in range(12)}
+
+
+class Tuners:
+    """start_tuner stand-in: a thread per miner that runs until its stop event is set."""
+
+    def __init__(self, exit_delay=0):
+        self.exit_delay = exit_delay
+        self.running = {}
+        self.lock = threading.Lock()
+
+    def start(self, node_id):
+        def start_tuner(miner, stop_event):
+            def run():
+                with self.lock:
+                    assert miner.ip not in self.running, f"{miner.ip} tuned twice"
+                    self.running[miner.ip] = node_id
+                stop_event.wait()
+                time.sleep(self.exit_delay)
+                with self.lock:
+                    if self.running.get(miner.ip) == node_id:
+                        del self.running[miner.ip]
+                autotune.release_stop_event(stop_event)
+
+            thread = threading.Thread(target=run, daemon=True)
+            thread.start()
+            return thread
+        return start_tuner
+
+    def kill(self, node_id):
+        """The node's machine goes away: its tuners stop without it releasing anything."""
+        with self.lock:
+            self.running = {ip: owner for ip, owner in self.running.items() if owner != node_id}
+
+    def owners(self):
+        time.sleep(0.05)  # Let started threads register
+        with self.lock:
+            return dict(self.running)
+
+
+@pytest.fixture
+def cluster(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    monkeypatch.setattr(sharding, "load_config", lambda: CONFIG)
+    monkeypatch.setattr(sharding, "get_miner_configs", lambda: MINERS)
+    store = sharding.SQLiteLeaseStore(str(tmp_path / "shards.sqlite"))
+    tuners = Tuners()
+    nodes = {node_id: sharding.ShardNode(tuners.start(node_id), lambda *args: None, node_id, store)
+             for node_id in ("a", "b")}
+    yield now, store, tuners, nodes
+    for node in nodes.values():
+        node.stop()
+
+
+def test_every_miner_is_tuned_by_exactly_one_node(cluster):
+    now, store, tuners, nodes = cluster
+    for node in nodes.values():
+        node.sync(CONFIG)
+    for node in nodes.values():
+        node.sync(CONFIG)  # Second round: both nodes see each other on the ring
+    owners = tuners.owners()
+    assert set(owners) == set(MINERS)
+    assert set(owners.values()) == {"a", "b"}
+    assert {miner: lease["owner"] for miner, lease in store.leases().items()} == owners
+
+
+def test_dead_node_leases_expire_before_handover(cluster):
+    now, store, tuners, nodes = cluster
+    for _ in range(2):
+        for node in nodes.values():
+            node.sync(CONFIG)
+    b_miners = {ip for ip, owner in tuners.owners().items() if owner == "b"}
+    assert b_miners
+    tuners.kill("b")
+
+    # b's heartbeat is stale, so a owns every miner, but b's leases have not run out yet
+    now[0] += 11
+    nodes["a"].sync(CONFIG)
+    assert not b_miners & set(tuners.owners())
+
+    now[0] += 20
+    nodes["a"].sync(CONFIG)
+    assert set(tuners.owners()) == set(MINERS)
+    assert all(lease["owner"] == "a" for lease in store.leases().values())
+
+
+def test_tuners_stop_before_an_unrenewable_lease_runs_out(cluster, monkeypatch):
+    now, store, tuners, nodes = cluster
+    node = nodes["a"]
+    node.sync(CONFIG)
+    assert tuners.owners()
+
+    def unreachable(*args):
+        raise sharding.sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(store, "heartbeat", unreachable)
+    now[0] += 26  # Within the 5 s safety margin of the 30 s lease
+    with pytest.raises(sharding.sqlite3.OperationalError):
+        node.sync(CONFIG)
+    node._expire_tuners(now[0], CONFIG["shard_lease_ttl"])
+    assert tuners.owners() == {}
+
+
+def test_stop_returns_at_once_and_releases_leases_when_tuners_exit(cluster):
+    now, store, tuners, nodes = cluster
+    tuners.exit_delay = 0.5
+    node = nodes["a"]
+    node.start()
+    deadline = time.monotonic() + 5
+    while len(tuners.owners()) < len(MINERS) and time.monotonic() < deadline:
+        pass
+    assert len(tuners.owners()) == len(MINERS)
+
+    started = time.monotonic()
+    node.stop()
+    assert time.monotonic() - started < 0.2
+    node.join(timeout=5)
+    assert not node.is_alive()
+    assert tuners.owners() == {}
+    assert store.leases() == {}
+
+
+def test_stop_autotuning_reaches_shard_tuners(cluster):
+    now, store, tuners, nodes = cluster
+    nodes["a"].sync(CONFIG)
+    assert tuners.owners()
+    autotune.stop_autotuning()
+    assert tuners.owners() == {}
@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+import shares
+
+DIFFICULTY = 1000
+POLL = 5
+
+
+@pytest.fixture(autouse=True)
+def forget():
+    yield
+    shares.forget_miner("10.99.1.1")
+
+
+def feed(rng, frequency, polls, now, counters, work_per_mhz=1.0, reject_rate=0.0):
+    """Poll a miner whose accepted work follows frequency, with Poisson share arrivals."""
+    rate = frequency * work_per_mhz / (DIFFICULTY * shares.GH_PER_DIFFICULTY)  # Shares per second
+    for _ in range(polls):
+        now += POLL
+        t = rng.expovariate(rate)
+        while t < POLL:
+            if rng.random() < reject_rate:
+                counters["rejected"] += 1
+            else:
+                counters["accepted"] += 1
+            t += rng.expovariate(rate)
+        info = {"sharesAccepted": counters["accepted"], "sharesRejected": counters["rejected"],
+                "hashRate": frequency * work_per_mhz, "poolDifficulty": DIFFICULTY}
+        shares.record("10.99.1.1", info, frequency, window_seconds=600, stats_ttl=1800, now=now)
+    return now
+
+
+def run(seed, higher_work_per_mhz=1.0, polls=40):
+    rng = random.Random(seed)
+    counters = {"accepted": 0, "rejected": 0}
+    now = feed(rng, 500, polls, 1000.0, counters)
+    now = feed(rng, 505, polls, now, counters, work_per_mhz=higher_work_per_mhz)
+    return shares.assess("10.99.1.1", 505, now=now)
+
+
+def test_noisy_shares_do_not_back_off():
+    # About 25 shares per frequency: far noisier than the 1% a 5 MHz step should add
+    verdicts = []
+    for seed in range(100):
+        verdicts.append(run(seed))
+        shares.forget_miner("10.99.1.1")
+    assert sum(verdict is not None for verdict in verdicts) <= 3
+
+
+def test_clear_loss_backs_off():
+    # With plenty of shares, a frequency that yields 30% less work is told apart from noise
+    verdict = run(1, higher_work_per_mhz=0.7, polls=300)
+    assert verdict is not None and verdict[:2] == ("effective", 500)
+
+
+def test_reject_rate_backs_off():
+    rng = random.Random(3)
+    counters = {"accepted": 0, "rejected": 0}
+    now = feed(rng, 500, 80, 1000.0, counters, reject_rate=0.2)
+    verdict = shares.assess("10.99.1.1", 500, max_reject_rate=0.02, now=now)
+    assert verdict[0] == "reject_rate" and verdict[1] > 0.02
@@ -0,0 +1,117 @@
+from collections import deque
+
+import pytest
+
+import stall
+
+CONFIG = {}  # The detector's defaults
+
+
+@pytest.fixture(autouse=True)
+def fresh(monkeypatch):
+    monkeypatch.setattr(stall, "_miners", {})
+    monkeypatch.setattr(stall, "_fleet_restarts", deque())
+
+
+class Miner:
+    """Readings from a miner that has been up for a while; each signal can be frozen independently."""
+
+    def __init__(self, ip="10.99.10.1"):
+        self.ip = ip
+        self.t = 0
+        self.uptime = 1000
+        self.accepted = 0
+
+    def poll(self, frozen_hashrate=False, silent=False, frozen_uptime=False, config=CONFIG):
+        self.t += 10
+        if not frozen_uptime:
+            self.uptime += 10
+        if not silent:
+            self.accepted += 3
+        info = {"hashRate": 1000 if frozen_hashrate else 1000 + self.t % 70, "sharesAccepted": self.accepted,
+                "uptimeSeconds": self.uptime, "frequency": 500, "smallCoreCount": 2040, "asicCount": 1,
+                "poolDifficulty": 1000}
+        return stall.observe(self.ip, info, now=self.t, config=config)
+
+
+def settle(miner, polls=10, **signals):
+    verdict = None
+    for _ in range(polls):
+        verdict = miner.poll(**signals)
+    return verdict
+
+
+@pytest.mark.parametrize("signals, stalled", [
+    ({}, False),
+    ({"frozen_hashrate": True}, False),  # 0.6: a flat hashrate alone is not a stall
+    ({"silent": True}, False),  # 0.5: a quiet pool alone is not a stall
+    ({"frozen_uptime": True}, True),  # 0.9: stale API state is
+    ({"frozen_hashrate": True, "silent": True}, True),  # 1 - 0.4 * 0.5 = 0.8
+    ({"frozen_hashrate": True, "silent": True, "frozen_uptime": True}, True),
+])
+def test_signal_combinations(signals, stalled):
+    verdict = settle(Miner(), **signals)
+    assert verdict["stalled"] is stalled
+    assert verdict["confidence"] == pytest.approx(stall.confidence(verdict["evidence"]), abs=1e-3)
+
+
+def test_confidence_weights():
+    none = {"hashrate": 0.0, "shares": 0.0, "uptime": 0.0}
+    assert stall.confidence(dict(none, hashrate=1.0)) == pytest.approx(0.6)
+    assert stall.confidence(dict(none, shares=1.0)) == pytest.approx(0.5)
+    assert stall.confidence(dict(none, uptime=1.0)) == pytest.approx(0.9)
+    assert stall.confidence(dict(none, hashrate=1.0, shares=1.0)) == pytest.approx(0.8)
+
+
+def test_escalation_order_and_per_miner_restart_limit():
+    miner = Miner()
+    actions = []
+    for _ in range(500):
+        verdict = miner.poll(frozen_uptime=True)
+        if verdict is not None and verdict["action"] is not None:
+            actions.append((miner.t, verdict["action"]))
+    names = [action for _, action in actions]
+    # At most two restarts an hour; the third waits until the first is an hour old
+    assert names[:5] == ["reapply", "soft_reset", "restart", "restart", "restart_deferred"]
+    restarts = [t for t, action in actions if action == "restart"]
+    assert len(restarts) >= 3 and restarts[2] - restarts[0] > 3600
+
+
+def test_escalation_waits_between_steps():
+    miner = Miner()
+    times = []
+    for _ in range(40):
+        verdict = miner.poll(frozen_uptime=True)
+        if verdict is not None and verdict["action"] is not None:
+            times.append(miner.t)
+    assert times[1] - times[0] >= 120 and times[2] - times[1] >= 120
+
+
+def test_restart_grace_reports_stalled_without_action():
+    miner = Miner()
+    while (miner.poll(frozen_uptime=True) or {}).get("action") != "restart":
+        pass
+    restarted = miner.t
+    while miner.t < restarted + 170:
+        verdict = miner.poll(frozen_uptime=True)
+        assert verdict["stalled"] and verdict["action"] is None
+
+
+def test_recovery_is_reported():
+    miner = Miner()
+    settle(miner, frozen_uptime=True)
+    verdict = settle(miner, polls=1)
+    assert verdict["action"] == "recovered" and not verdict["stalled"]
+
+
+def test_fleet_restart_limit():
+    config = {"stall_fleet_restarts_per_hour": 1}
+    miners = [Miner("10.99.10.1"), Miner("10.99.10.2")]
+    actions = {miner.ip: [] for miner in miners}
+    for _ in range(40):
+        for miner in miners:
+            verdict = miner.poll(frozen_uptime=True, config=config)
+            if verdict is not None and verdict["action"] is not None:
+                actions[miner.ip].append(verdict["action"])
+    assert "restart" in actions["10.99.10.1"]
+    assert "restart" not in actions["10.99.10.2"] and "restart_deferred" in actions["10.99.10.2"]
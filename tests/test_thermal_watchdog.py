@@ -0,0 +1,89 @@
+import threading
+
+import pytest
+
+import thermal_watchdog
+from models import MinerConfig
+
+IP = "10.99.9.1"
+SETTINGS = {"enabled": True, "interval": 1, "margin": 5, "max_rise": 1.0, "rise_window": 5, "rise_floor": 10,
+            "drop_percent": 15, "settle": 10}
+TIERS = [{"frequency_(mhz)": f, "voltage": v} for f, v in ((400, 1100), (450, 1120), (500, 1150), (550, 1180))]
+
+
+class Writes:
+    def __init__(self, block=None):
+        self.block = block
+        self.calls = []
+        self.done = threading.Event()
+
+    def apply(self, bitaxe_ip, voltage, frequency):
+        if self.block is not None:
+            self.block.wait(5)
+        self.calls.append((voltage, frequency))
+        self.done.set()
+        return f"{bitaxe_ip} -> Applied settings: Voltage = {voltage}mV, Frequency = {frequency}MHz"
+
+
+@pytest.fixture
+def guard(monkeypatch):
+    monkeypatch.setattr(thermal_watchdog, "_start", lambda: None)
+    monkeypatch.setattr(thermal_watchdog, "_guards", {})
+    writes, logs = Writes(), []
+    miner = MinerConfig(IP, min_freq=400, max_freq=600, min_volt=1100, max_volt=1250, max_temp=65, max_vr_temp=80)
+    thermal_watchdog.watch(miner, TIERS, lambda *args: writes.apply(*args), lambda message, level: logs.append(message))
+    return writes, logs
+
+
+def reading(temp, vr_temp=60, frequency=550, voltage=1180):
+    return {"temp": temp, "vrTemp": vr_temp, "frequency": frequency, "coreVoltage": voltage}
+
+
+def check(info, now):
+    return thermal_watchdog.check(IP, info, now=now, settings=SETTINGS)
+
+
+def test_hard_temp_limit_drops_a_tier(guard):
+    writes, logs = guard
+    assert check(reading(60), 0) is None
+    assert check(reading(70), 1) == (1120, 450)  # 15% below 550 MHz is 467.5: the 450 MHz tier
+    assert writes.done.wait(2) and writes.calls == [(1120, 450)]
+    assert thermal_watchdog.take_emergency(IP) == (1120, 450)
+    assert thermal_watchdog.take_emergency(IP) is None
+
+
+def test_hard_vr_temp_limit_drops_a_tier(guard):
+    assert check(reading(55, vr_temp=85), 0) == (1120, 450)
+
+
+def test_fast_rise_near_the_limit_drops_a_tier(guard):
+    assert check(reading(57), 0) is None
+    assert check(reading(59), 2) is None  # Not half the rise window yet
+    assert check(reading(61), 3) == (1120, 450)  # 4°C in 3 s, within 10°C of the limit
+
+
+def test_fast_rise_far_below_the_limit_is_ignored(guard):
+    assert check(reading(35), 0) is None
+    assert check(reading(45), 3) is None  # Warming up after a restart
+
+
+def test_drops_settle_before_the_next_one(guard):
+    assert check(reading(70), 0) == (1120, 450)
+    assert check(reading(70, frequency=450, voltage=1120), 5) is None
+    assert check(reading(70, frequency=450, voltage=1120), 11) == (1100, 400)
+
+
+def test_minimum_frequency_is_reported_once(guard):
+    writes, logs = guard
+    assert check(reading(70, frequency=400, voltage=1100), 0) is None
+    assert check(reading(70, frequency=400, voltage=1100), 1) is None
+    assert len(logs) == 1 and "already at the minimum frequency" in logs[0]
+
+
+def test_check_does_not_wait_for_the_write(guard):
+    writes, logs = guard
+    writes.block = threading.Event()
+    assert check(reading(70), 0) == (1120, 450)  # Returns while the write is still blocked
+    assert writes.calls == []
+    writes.block.set()
+    assert writes.done.wait(2)
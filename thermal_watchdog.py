@@ -0,0 +1,219 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import health
+import logstore
+import telemetry
+from config import load_config
+
+_lock = threading.Lock()
+_guards = {}   # ip -> _Guard for every miner with a running tuner
+_local = threading.local()
+_settings_cache = {"loaded_at": 0, "values": None}
+_started = False
+# check() runs on whichever thread published the reading, possibly an event loop; writes never block it
+_writer = ThreadPoolExecutor(max_workers=4, thread_name_prefix="thermal-write")
+
+
+class _Guard:
+    __slots__ = ("miner", "tiers", "apply", "log_callback", "temps", "last_drop", "pending", "at_minimum")
+
+    def __init__(self, miner, tiers, apply, log_callback):
+        self.miner = miner
+        self.tiers = sorted(tiers, key=lambda t: t["frequency_(mhz)"])
+        self.apply = apply
+        self.log_callback = log_callback
+        self.temps = deque()      # (time, temp) over the rise window
+        self.last_drop = None
+        self.pending = None       # (voltage, frequency) the tuner has not picked up yet
+        self.at_minimum = False   # Already reported that there is no lower tier
+
+
+def _settings():
+    """Watchdog settings from config.json, re-read at most every 5 seconds."""
+    if time.time() - _settings_cache["loaded_at"] > 5:
+        config = load_config()
+        _settings_cache["values"] = {
+            "enabled": config.get("thermal_watchdog_enabled", True),
+            "interval": config.get("thermal_watchdog_interval", 1),
+            "margin": config.get("thermal_watchdog_margin", 5),
+            "max_rise": config.get("thermal_watchdog_max_rise", 1.0),
+            "rise_window": config.get("thermal_watchdog_rise_window", 5),
+            "rise_floor": config.get("thermal_watchdog_rise_floor", 10),
+            "drop_percent": config.get("thermal_watchdog_drop_percent", 15),
+            "settle": config.get("thermal_watchdog_settle", 10),
+        }
+        _settings_cache["loaded_at"] = time.time()
+    return _settings_cache["values"]
+
+
+def watch(miner, tiers, apply, log_callback):
+    """Guard a miner while its tuner runs.
+
+    apply(ip, voltage, frequency) writes the emergency settings (set_system_settings).
+    The tuner must call take_emergency() before reconciling each reading so it adopts
+    settings the watchdog wrote instead of writing its own back.
+    """
+    with _lock:
+        _guards[miner.ip] = _Guard(miner, tiers, apply, log_callback)
+    _start()
+
+
+def unwatch(bitaxe_ip):
+    with _lock:
+        _guards.pop(bitaxe_ip, None)
+
+
+def take_emergency(bitaxe_ip):
+    """(voltage, frequency) written by the watchdog since the last call, or None."""
+    with _lock:
+        guard = _guards.get(bitaxe_ip)
+        if guard is None or guard.pending is None:
+            return None
+        pending, guard.pending = guard.pending, None
+        return pending
+
+
+def _emergency_target(guard, frequency, voltage, drop_percent):
+    """The highest tier at least drop_percent below the reported frequency (min_freq if none is).
+
+    The voltage is that tier's, but never above the current voltage. Returns None
+    when the miner is already at min_freq.
+    """
+    miner = guard.miner
+    if frequency <= miner.min_freq:
+        return None
+    ceiling = frequency * (1 - drop_percent / 100)
+    lower = [t for t in guard.tiers if miner.min_freq <= t["frequency_(mhz)"] <= ceiling]
+    if lower:
+        target_frequency, target_voltage = lower[-1]["frequency_(mhz)"], lower[-1]["voltage"]
+    else:
+        target_frequency = miner.min_freq
+        below = [t for t in guard.tiers if t["frequency_(mhz)"] <= target_frequency] or guard.tiers[:1]
+        target_voltage = below[-1]["voltage"] if below else miner.min_volt
+    target_voltage = min(max(target_voltage, miner.min_volt), miner.max_volt)
+    if voltage is not None:
+        target_voltage = min(target_voltage, voltage)
+    return int(target_voltage), int(target_frequency)
+
+
+def check(bitaxe_ip, info, now=None, settings=None):
+    """Check one reading of a watched miner against the hard limits and the rise rate.
+
+    When one is crossed, queues an emergency drop on the writer pool and returns the
+    (voltage, frequency) being written, or None. Never blocks on the miner.
+    """
+    now = time.time() if now is None else now
+    settings = settings or _settings()
+    if not settings["enabled"]:
+        return None
+    temp, vr_temp = info.get("temp"), info.get("vrTemp")
+    with _lock:
+        guard = _guards.get(bitaxe_ip)
+        if guard is None or not isinstance(temp, (int, float)):
+            return None
+        miner = guard.miner
+
+        temps = guard.temps
+        temps.append((now, temp))
+        while len(temps) > 1 and now - temps[1][0] >= settings["rise_window"]:
+            temps.popleft()
+        rise = (temp - temps[0][1]) / (now - temps[0][0]) if now > temps[0][0] else 0
+
+        reason = None
+        hard_temp = miner.max_temp + settings["margin"]
+        if temp >= hard_temp:
+            reason = f"temp {temp}°C is over the hard limit of {hard_temp}°C"
+        elif (miner.max_vr_temp is not None and isinstance(vr_temp, (int, float))
+              and vr_temp >= miner.max_vr_temp + settings["margin"]):
+            reason = f"VR temp {vr_temp}°C is over the hard limit of {miner.max_vr_temp + settings['margin']}°C"
+        elif (settings["max_rise"] and now - temps[0][0] >= settings["rise_window"] / 2
+              and rise >= settings["max_rise"] and temp >= miner.max_temp - settings["rise_floor"]):
+            # Only near the limit: a miner warming up after a restart also rises quickly
+            reason = f"temp rising {rise:.1f}°C/s to {temp}°C"
+        if reason is None:
+            guard.at_minimum = False
+            return None
+        if guard.last_drop is not None and now - guard.last_drop < settings["settle"]:
+            return None  # Give the last drop time to take effect
+
+        frequency = info.get("frequency")
+        target = (_emergency_target(guard, frequency, info.get("coreVoltage"), settings["drop_percent"])
+                  if isinstance(frequency, (int, float)) else None)
+        if target is None:
+            if guard.at_minimum:
+                return None
+            guard.at_minimum = True
+            message, level = f"{bitaxe_ip} -> THERMAL EMERGENCY: {reason}, already at the minimum frequency.", "error"
+        else:
+            # Published before the write, so a reading that shows the new settings is never
+            # reconciled by the tuner against its old ones
+            guard.pending = target
+            guard.last_drop = now
+            guard.temps.clear()
+            message = f"{bitaxe_ip} -> THERMAL EMERGENCY: {reason}. Dropping to {target[1]} MHz / {target[0]} mV"
+            level = "error"
+        apply, log_callback = guard.apply, guard.log_callback
+
+    log_callback(logstore.line(message, "thermal_emergency", bitaxe_ip, temp=temp, vr_temp=vr_temp,
+                               voltage=target[0] if target else None, frequency=target[1] if target else None), level)
+    if target is not None:
+        _writer.submit(_write, bitaxe_ip, target, apply, log_callback)
+    return target
+
+
+def _write(bitaxe_ip, target, apply, log_callback):
+    try:
+        result = apply(bitaxe_ip, target[0], target[1])
+    except Exception as e:
+        result = f"{bitaxe_ip} -> Error applying emergency settings: {e}"
+    log_callback(logstore.line(result, "write_error" if " -> Error" in result else "write", bitaxe_ip,
+                               voltage=target[0], frequency=target[1]),
+                 "error" if " -> Error" in result else "warning")
+
+
+def _read(bitaxe_ip, timeout):
+    """Take a reading with a short timeout and publish it, which runs check() through telemetry.
+
+    Failures are left to the tuner to report.
+    """
+    if health.is_open(bitaxe_ip):
+        return None
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+    try:
+        response = session.get(f"http://{bitaxe_ip}/api/system/info", timeout=timeout)
+        response.raise_for_status()
+        info = response.json()
+    except (requests.exceptions.RequestException, ValueError):
+        return None
+    telemetry.publish(bitaxe_ip, info)
+    return info
+
+
+def _start():
+    global _started
+    with _lock:
+        if _started:
+            return
+        _started = True
+    # Readings taken by the tuners and the dashboard poller are checked as well
+    telemetry.add_listener(check)
+
+    def loop():
+        with ThreadPoolExecutor(max_workers=16, thread_name_prefix="thermal-poll") as executor:
+            while True:
+                started = time.time()
+                settings = _settings()
+                with _lock:
+                    ips = list(_guards) if settings["enabled"] else []
+                timeout = max(min(settings["interval"] * 2, 3), 0.5)
+                list(executor.map(lambda ip: _read(ip, timeout), ips))
+                time.sleep(max(settings["interval"] - (time.time() - started), 0.1))
+
+    threading.Thread(target=loop, name="thermal-watchdog", daemon=True).start()